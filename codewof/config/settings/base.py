@@ -392,6 +392,26 @@ TESTING = False
 BREADCRUMBS_TEMPLATE = 'django_bootstrap_breadcrumbs/bootstrap4.html'
 QUESTIONS_BASE_PATH = os.path.join(str(ROOT_DIR.path('programming')), 'content')
 CUSTOM_VERTO_TEMPLATES = os.path.join(str(ROOT_DIR.path('utils')), 'custom_converter_templates', '')
+# Cache alias and timeout (in seconds) for storing each user's question recommendations
+RECOMMENDATIONS_CACHE = 'default'
+RECOMMENDATIONS_CACHE_TIMEOUT = 60 * 60 * 24
+# Grade attempts by running test cases on the server, rather than trusting results from the browser
+PROGRAMMING_SERVER_GRADING = False
+# Number of worker processes per web process for running test cases (0 runs tests from the web process),
+# limits of seconds and bytes of memory for each test case, and number of attempts before a worker is replaced
+PROGRAMMING_GRADER_WORKERS = 2
+# Isolate test cases from the network, file system and website user (see programming.sandbox). This requires
+# permission to create namespaces, and worker processes. Server grading cannot be enabled without isolation.
+PROGRAMMING_GRADER_ISOLATION = True
+PROGRAMMING_GRADER_TIME_LIMIT = 2
+PROGRAMMING_GRADER_MEMORY_LIMIT = 128 * 1024 * 1024
+PROGRAMMING_GRADER_MAX_JOBS_PER_WORKER = 1000
+# Queue attempts to be saved in batches by the process_attempt_queue command, rather than saving them in the request
+PROGRAMMING_ATTEMPT_QUEUE = False
+# Class of store for leaderboards, and keyword arguments to create it with. The in-memory store is not shared
+# between processes, so programming.leaderboard.RedisLeaderboardStore should be used when deployed.
+LEADERBOARD_STORE = 'programming.leaderboard.InMemoryLeaderboardStore'
+LEADERBOARD_STORE_OPTIONS = {}
 
 SVG_DIRS = [os.path.join(str(ROOT_DIR.path('staticfiles')), 'svg')]
 # Key 'example_code' uses underscore to be accessible in templates
@@ -423,8 +443,16 @@ def fizzbuzz():
 # Add slug key to values for each language
 for slug, data in STYLE_CHECKER_LANGUAGES.items():
     data['slug'] = slug
-STYLE_CHECKER_TEMP_FILES_ROOT = os.path.join(str(ROOT_DIR), 'temp', 'style')
 STYLE_CHECKER_MAX_CHARACTER_COUNT = 10000
+# Number of worker processes per web process for checking code style (0 checks code in the web process),
+# seconds to wait for a check, and number of checks before a worker is replaced
+STYLE_CHECKER_WORKERS = 2
+STYLE_CHECKER_JOB_TIMEOUT = 10
+STYLE_CHECKER_MAX_JOBS_PER_WORKER = 1000
+# Number of style check results stored in each web process, for code that is checked again
+STYLE_CHECKER_RESULT_CACHE_SIZE = 1000
+# Seconds between saving style error occurence counts to the database (0 saves counts immediately)
+STYLE_CHECKER_ERROR_COUNT_FLUSH_INTERVAL = 60
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -117,3 +117,9 @@ with open(env("SAMPLE_DATA_ADMIN_PASSWORD_FILE")) as file:  # noqa: F405
 
 with open(env("SAMPLE_DATA_USER_PASSWORD_FILE")) as file:  # noqa: F405
     SAMPLE_DATA_USER_PASSWORD = file.read().strip()
+
+# Leaderboards
+# ------------------------------------------------------------------------------
+# Required, as the in-memory store is not shared between processes
+LEADERBOARD_STORE = 'programming.leaderboard.RedisLeaderboardStore'
+LEADERBOARD_STORE_OPTIONS = {'url': env('LEADERBOARD_REDIS_URL')}  # noqa: F405
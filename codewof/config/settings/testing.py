@@ -74,6 +74,20 @@ EMAIL_HOST = "localhost"
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-port
 EMAIL_PORT = 1025
 
+# STYLE CHECKER
+# ------------------------------------------------------------------------------
+# Check code in the test process, rather than starting worker processes
+STYLE_CHECKER_WORKERS = 0
+# Save style error counts immediately
+STYLE_CHECKER_ERROR_COUNT_FLUSH_INTERVAL = 0
+
+# PROGRAMMING
+# ------------------------------------------------------------------------------
+# Run test cases from the test process, rather than starting worker processes. Test code is trusted, and tests may
+# be run without permission to create namespaces, so test cases are not isolated.
+PROGRAMMING_GRADER_WORKERS = 0
+PROGRAMMING_GRADER_ISOLATION = False
+
 # reCAPTCHA
 # ------------------------------------------------------------------------------
 # Use default test keys
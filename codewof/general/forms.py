@@ -2,12 +2,12 @@
 
 from django import forms
 from django.conf import settings
-from django.core.mail import send_mail, mail_managers
 from django.template.loader import render_to_string, get_template
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Submit, HTML
 from captcha.fields import ReCaptchaField
 from captcha.widgets import ReCaptchaV3
+from general.outbox import queue_email, queue_mail_managers
 
 MESSAGE_TEMPLATE = "{}\n\n-----\nMessage sent from {} <{}>\n\n{}\n"
 
@@ -30,18 +30,16 @@ class ContactForm(forms.Form):
         message = self.cleaned_data['message']
         plain = MESSAGE_TEMPLATE.format(message, name, from_email, settings.CODEWOF_DOMAIN)
         html = self.build_email_html(name, subject, message, from_email)
-        mail_managers(
+        queue_mail_managers(
             subject,
             plain,
             html_message=html
         )
         if self.cleaned_data.get('cc_sender'):
-            send_mail(
+            queue_email(
                 subject,
                 plain,
-                settings.DEFAULT_FROM_EMAIL,
                 [from_email],
-                fail_silently=False,
                 html_message=html
             )
 
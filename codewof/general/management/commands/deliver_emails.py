@@ -0,0 +1,56 @@
+"""Module for the custom Django deliver_emails command."""
+
+from django.core.management.base import BaseCommand
+from general.outbox import OUTBOX_BATCH_SIZE, deliver_outbox, deliver_outbox_in_threads, get_delivery_metrics
+
+
+class Command(BaseCommand):
+    """Required command class for the custom Django deliver_emails command."""
+
+    help = 'Send emails from the outbox in batches, waiting for more emails until stopped'
+
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            '--batch_size',
+            default=OUTBOX_BATCH_SIZE,
+            help='maximum number of emails to claim and send in each batch',
+        )
+        parser.add_argument(
+            '--workers',
+            default=1,
+            help='number of threads sending emails, each with its own connection',
+        )
+        parser.add_argument(
+            '--interval',
+            default=5,
+            help='seconds to wait for more emails when none are due',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='stop once no emails are due',
+        )
+        parser.add_argument(
+            '--metrics',
+            action='store_true',
+            help='print delivery metrics of the last hour, without sending emails',
+        )
+
+    def handle(self, *args, **options):
+        """Automatically called when the deliver_emails command is given."""
+        if options['metrics']:
+            for name, value in get_delivery_metrics().items():
+                self.stdout.write('{}: {}'.format(name, value))
+            return
+        kwargs = {
+            'batch_size': int(options['batch_size']),
+            'interval': float(options['interval']),
+            'once': options['once'],
+        }
+        workers = int(options['workers'])
+        if workers > 1:
+            num_sent, num_failed = deliver_outbox_in_threads(workers, **kwargs)
+        else:
+            num_sent, num_failed = deliver_outbox(**kwargs)
+        self.stdout.write('{} emails sent, {} failed attempts.'.format(num_sent, num_failed))
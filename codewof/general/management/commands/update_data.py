@@ -1,6 +1,7 @@
 """Module for the custom Django update_data command."""
 
 from django.core import management
+from programming.models import Question
 
 
 class Command(management.base.BaseCommand):
@@ -15,6 +16,10 @@ class Command(management.base.BaseCommand):
             action='store_true',
             help='skip backdate step',
         )
+        parser.add_argument(
+            '--snapshot',
+            help='question bank snapshot to restore before loading questions, if no questions have been loaded',
+        )
 
     def handle(self, *args, **options):
         """Automatically called when the sampledata command is given."""
@@ -23,6 +28,11 @@ class Command(management.base.BaseCommand):
         management.call_command('load_user_types')
         print('User types loaded.\n')
 
+        if options['snapshot'] and not Question.objects.exists():
+            # Only content that has changed since the snapshot was created is then loaded
+            management.call_command('restore_question_snapshot', options['snapshot'])
+            print('Question bank snapshot restored.\n')
+
         management.call_command('load_questions')
         print('Programming questions loaded.\n')
 
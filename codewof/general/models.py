@@ -0,0 +1,45 @@
+"""Models for general application."""
+
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    """An email waiting to be sent by the deliver_emails command."""
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_message = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    recipients = ArrayField(models.EmailField())
+    # Emails with the same key are only added to the outbox once
+    dedup_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    date_created = models.DateTimeField(default=timezone.now)
+    date_next_attempt = models.DateTimeField(default=timezone.now)
+    date_last_attempt = models.DateTimeField(null=True, blank=True)
+    date_sent = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        """Text representation of an outbox email."""
+        return '{} to {}'.format(self.subject, ', '.join(self.recipients))
+
+    class Meta:
+        """Meta options for class."""
+
+        indexes = [
+            models.Index(fields=['status', 'date_next_attempt']),
+            models.Index(fields=['date_created']),
+        ]
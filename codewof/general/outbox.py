@@ -0,0 +1,320 @@
+"""
+Outbox of emails, sent in the background by the deliver_emails command.
+
+All emails from the website are added to the outbox, in the same transaction as the changes they are about, so a
+slow or unavailable email provider does not delay the request, and an email is only sent if its transaction is
+committed. An email can be given a dedup key, so it is only added once, for example when a command is run twice.
+
+The deliver_emails command sends pending emails in batches. Each worker keeps its connection to the email provider
+open while there are emails to send, and opens a new connection after an error. Emails that cannot be sent are
+retried with exponential backoff from OUTBOX_RETRY_DELAY, until they have been attempted OUTBOX_MAX_ATTEMPTS times.
+
+Each batch is claimed in a short transaction, which counts an attempt of each email and leases it by moving its next
+attempt OUTBOX_LEASE ahead, and is then sent outside of any transaction. Several workers can run at once without
+holding locks while waiting for the email provider, and emails claimed by a worker that stops before recording
+the result are sent again once their lease has passed.
+
+Sent and failed emails are kept for OUTBOX_RETENTION, for the delivery metrics of the outbox.
+"""
+
+import datetime
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Min, Q
+from django.utils import timezone
+from general.models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = datetime.timedelta(minutes=5)
+OUTBOX_MAX_RETRY_DELAY = datetime.timedelta(hours=6)
+OUTBOX_RETENTION = datetime.timedelta(days=7)
+OUTBOX_LEASE = datetime.timedelta(minutes=10)
+
+
+def create_outbox_email(subject, body, recipients, html_message='', from_email=None, dedup_key=None):
+    """Return an unsaved outbox email.
+
+    Args:
+        subject (str): Subject of the email.
+        body (str): Plain text body of the email.
+        recipients (list): List of email addresses to send the email to.
+        html_message (str): HTML body of the email, if any.
+        from_email (str): Address to send from, defaults to the DEFAULT_FROM_EMAIL setting.
+        dedup_key (str): Key of the email, if an email with the same key should not be sent again.
+
+    Returns:
+        OutboxEmail object.
+    """
+    return OutboxEmail(
+        subject=subject,
+        body=body,
+        html_message=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+        dedup_key=dedup_key,
+    )
+
+
+def queue_email(subject, body, recipients, html_message='', from_email=None, dedup_key=None):
+    """Add an email to the outbox, taking the same arguments as create_outbox_email.
+
+    Returns:
+        True if the email was added, or False if an email with the same dedup key is already in the outbox.
+    """
+    return queue_emails([
+        create_outbox_email(subject, body, recipients, html_message, from_email, dedup_key),
+    ]) == 1
+
+
+def queue_emails(outbox_emails):
+    """Add the given unsaved outbox emails to the outbox with one insert.
+
+    Emails with the dedup key of an email already in the outbox are skipped.
+
+    Returns:
+        Number of emails added.
+    """
+    if not outbox_emails:
+        return 0
+    dedup_keys = [outbox_email.dedup_key for outbox_email in outbox_emails if outbox_email.dedup_key]
+    if not dedup_keys:
+        OutboxEmail.objects.bulk_create(outbox_emails)
+        return len(outbox_emails)
+    # Primary keys are not set when conflicts are ignored, so emails added are counted by their keys
+    with transaction.atomic():
+        num_existing = OutboxEmail.objects.filter(dedup_key__in=dedup_keys).count()
+        OutboxEmail.objects.bulk_create(outbox_emails, ignore_conflicts=True)
+        num_added = OutboxEmail.objects.filter(dedup_key__in=dedup_keys).count() - num_existing
+    return len(outbox_emails) - len(dedup_keys) + num_added
+
+
+def queue_mail_managers(subject, body, html_message=''):
+    """Add an email to the managers of the website to the outbox, like django.core.mail.mail_managers."""
+    if not settings.MANAGERS:
+        return False
+    return queue_email(
+        '{}{}'.format(settings.EMAIL_SUBJECT_PREFIX, subject),
+        body,
+        [email for _, email in settings.MANAGERS],
+        html_message=html_message,
+        from_email=settings.SERVER_EMAIL,
+    )
+
+
+def get_message(outbox_email, email_connection):
+    """Return the email message to send for an outbox email."""
+    message = EmailMultiAlternatives(
+        outbox_email.subject,
+        outbox_email.body,
+        outbox_email.from_email,
+        outbox_email.recipients,
+        connection=email_connection,
+    )
+    if outbox_email.html_message:
+        message.attach_alternative(outbox_email.html_message, 'text/html')
+    return message
+
+
+def get_retry_delay(attempts):
+    """Return the time to wait before retrying an email that has been attempted the given number of times."""
+    return min(OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), OUTBOX_MAX_RETRY_DELAY)
+
+
+def record_failure(outbox_email, error):
+    """Record an error sending an outbox email, scheduling it to be retried if it has attempts remaining."""
+    logger.warning('Could not send email %s: %s', outbox_email.pk, error)
+    outbox_email.last_error = str(error) or error.__class__.__name__
+    if outbox_email.attempts >= OUTBOX_MAX_ATTEMPTS:
+        outbox_email.status = OutboxEmail.FAILED
+    else:
+        outbox_email.date_next_attempt = timezone.now() + get_retry_delay(outbox_email.attempts)
+
+
+def claim_emails(batch_size=OUTBOX_BATCH_SIZE):
+    """Claim a batch of pending emails that are due, oldest first, so they are not sent by other workers.
+
+    Claimed emails are counted as attempted, and are not due again until OUTBOX_LEASE has passed.
+
+    Returns:
+        List of claimed outbox emails.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        outbox_emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True).filter(
+                status=OutboxEmail.PENDING,
+                date_next_attempt__lte=now,
+            ).order_by('date_next_attempt', 'pk')[:batch_size]
+        )
+        for outbox_email in outbox_emails:
+            outbox_email.attempts += 1
+            outbox_email.date_last_attempt = now
+            outbox_email.date_next_attempt = now + OUTBOX_LEASE
+        OutboxEmail.objects.bulk_update(outbox_emails, ['attempts', 'date_last_attempt', 'date_next_attempt'])
+    return outbox_emails
+
+
+def deliver_emails(batch_size=OUTBOX_BATCH_SIZE, email_connection=None):
+    """Send a batch of pending emails that are due, oldest first.
+
+    Args:
+        batch_size (int): Maximum number of emails to send.
+        email_connection: Open email backend to send with, which is closed after an error so it can be opened
+            again. If not given, a connection is opened for the batch.
+
+    Returns:
+        Tuple of the number of emails sent and the number of emails that could not be sent.
+    """
+    if email_connection is None:
+        with get_connection(fail_silently=False) as email_connection:
+            return deliver_emails(batch_size, email_connection)
+
+    outbox_emails = claim_emails(batch_size)
+    if not outbox_emails:
+        return 0, 0
+    num_sent = 0
+    for outbox_email in outbox_emails:
+        outbox_email.date_last_attempt = timezone.now()
+        try:
+            # Opens the connection again if it was closed after an error
+            email_connection.open()
+            get_message(outbox_email, email_connection).send()
+        except Exception as error:
+            record_failure(outbox_email, error)
+            try:
+                email_connection.close()
+            except Exception:
+                pass
+        else:
+            outbox_email.status = OutboxEmail.SENT
+            outbox_email.date_sent = outbox_email.date_last_attempt
+            outbox_email.last_error = ''
+            num_sent += 1
+    OutboxEmail.objects.bulk_update(
+        outbox_emails,
+        ['status', 'last_error', 'date_next_attempt', 'date_last_attempt', 'date_sent'],
+    )
+    return num_sent, len(outbox_emails) - num_sent
+
+
+def purge_outbox(now=None):
+    """Delete sent and failed emails older than OUTBOX_RETENTION.
+
+    Returns:
+        Number of emails deleted.
+    """
+    if now is None:
+        now = timezone.now()
+    num_deleted, _ = OutboxEmail.objects.filter(
+        status__in=[OutboxEmail.SENT, OutboxEmail.FAILED],
+        date_created__lt=now - OUTBOX_RETENTION,
+    ).delete()
+    return num_deleted
+
+
+def get_delivery_metrics(period=datetime.timedelta(hours=1), now=None):
+    """Return metrics of the delivery of emails from the outbox.
+
+    Args:
+        period (timedelta): Period before now to count sent and failed emails over.
+        now (datetime): Current time, defaults to now.
+
+    Returns:
+        Dictionary of metrics: the number of emails pending, due and retrying; the number sent and failed in the
+        period, with the average seconds from being added to being sent; and the age in seconds of the oldest
+        due email.
+    """
+    if now is None:
+        now = timezone.now()
+    since = now - period
+    metrics = OutboxEmail.objects.aggregate(
+        pending=Count('pk', filter=Q(status=OutboxEmail.PENDING)),
+        due=Count('pk', filter=Q(status=OutboxEmail.PENDING, date_next_attempt__lte=now)),
+        retrying=Count('pk', filter=Q(status=OutboxEmail.PENDING, attempts__gt=0)),
+        sent=Count('pk', filter=Q(status=OutboxEmail.SENT, date_sent__gte=since)),
+        failed=Count('pk', filter=Q(status=OutboxEmail.FAILED, date_last_attempt__gte=since)),
+        average_latency=Avg(F('date_sent') - F('date_created'), filter=Q(date_sent__gte=since)),
+        oldest_due=Min('date_created', filter=Q(status=OutboxEmail.PENDING, date_next_attempt__lte=now)),
+    )
+    average_latency = metrics.pop('average_latency')
+    metrics['average_latency'] = average_latency.total_seconds() if average_latency is not None else None
+    oldest_due = metrics.pop('oldest_due')
+    metrics['oldest_due_age'] = (now - oldest_due).total_seconds() if oldest_due is not None else None
+    return metrics
+
+
+def deliver_outbox(batch_size=OUTBOX_BATCH_SIZE, interval=5, once=False):
+    """Send emails from the outbox until stopped, waiting for the given interval whenever none are due.
+
+    The connection to the email provider is kept open while there are emails to send, and sent and failed emails
+    older than OUTBOX_RETENTION are deleted whenever no emails are due.
+
+    Args:
+        batch_size (int): Maximum number of emails to claim and send in each batch.
+        interval (float): Seconds to wait when no emails are due.
+        once (bool): Return once no emails are due, instead of waiting for more emails.
+
+    Returns:
+        Tuple of the number of emails sent and the number of failed attempts to send an email.
+    """
+    total_sent = 0
+    total_failed = 0
+    email_connection = get_connection(fail_silently=False)
+    try:
+        while True:
+            start_time = time.perf_counter()
+            try:
+                num_sent, num_failed = deliver_emails(batch_size, email_connection)
+            except Exception:
+                if once:
+                    raise
+                logger.exception('Could not deliver emails.')
+                # The connection may be unusable after a database error
+                connection.close()
+                num_sent, num_failed = 0, 0
+            total_sent += num_sent
+            total_failed += num_failed
+            if num_sent or num_failed:
+                duration = time.perf_counter() - start_time
+                logger.info(
+                    'Sent %d emails in %.3f seconds (%.1f emails/sec), %d failed.',
+                    num_sent, duration, num_sent / max(duration, 1e-9), num_failed,
+                )
+                continue
+            email_connection.close()
+            purge_outbox()
+            if once:
+                return total_sent, total_failed
+            time.sleep(interval)
+    finally:
+        email_connection.close()
+
+
+def deliver_outbox_in_threads(workers, **kwargs):
+    """Run deliver_outbox in the given number of threads, taking the same keyword arguments.
+
+    Returns:
+        Tuple of the total number of emails sent and the number of failed attempts to send an email.
+    """
+    results = []
+
+    def deliver():
+        try:
+            results.append(deliver_outbox(**kwargs))
+        finally:
+            # Each thread has its own database connection
+            connection.close()
+
+    threads = [threading.Thread(target=deliver) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(sent for sent, _ in results), sum(failed for _, failed in results)
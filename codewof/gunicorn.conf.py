@@ -14,3 +14,11 @@ secure_scheme_headers = {"X-APPENGINE-HTTPS": "on"}
 # Logging
 errorlog = "-"
 accesslog = "-"
+
+
+def post_worker_init(worker):
+    """Start processes for grading attempts, so they are ready before the first request."""
+    from django.conf import settings
+    if settings.PROGRAMMING_SERVER_GRADING:
+        from programming.grader import SANDBOX_POOL
+        SANDBOX_POOL.start()
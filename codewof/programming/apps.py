@@ -7,3 +7,7 @@ class ProgrammingConfig(AppConfig):
     """Application configuration for programming application."""
 
     name = 'programming'
+
+    def ready(self):
+        """Import signals upon intialising application."""
+        import programming.signals  # noqa F401
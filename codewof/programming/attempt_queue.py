@@ -0,0 +1,152 @@
+"""
+Write-behind queue for saving attempts.
+
+When PROGRAMMING_ATTEMPT_QUEUE is enabled, the save attempt view only inserts a queued attempt, and responds with
+the points the attempt is expected to award. The process_attempt_queue command then saves queued attempts in batches,
+creating attempts and test case attempts with bulk inserts, and adding points, achievements and statistics for the
+saved attempts to the affected profiles once per batch.
+
+Queued attempts are locked while a batch is processed and deleted in the same transaction that saves them, so each
+queued attempt is saved exactly once, even with several consumers running.
+"""
+
+import logging
+import time
+from django.db import connection, transaction
+from programming.codewof_utils import POINTS_SOLUTION, add_attempts_to_profiles
+from programming.group_feed import update_feeds_for_attempts
+from programming.models import Achievement, Attempt, QueuedAttempt, TestCase, TestCaseAttempt
+
+logger = logging.getLogger(__name__)
+
+ATTEMPT_QUEUE_BATCH_SIZE = 200
+
+
+def get_previous_user_code(profile, question):
+    """Return the code of the user's most recent attempt of a question, including queued attempts.
+
+    Returns:
+        Code as a string, or None if the question has not been attempted.
+    """
+    user_code = QueuedAttempt.objects.filter(
+        profile=profile,
+        question=question,
+    ).order_by('-pk').values_list('user_code', flat=True).first()
+    if user_code is None:
+        user_code = Attempt.objects.filter(
+            profile=profile,
+            question=question,
+        ).order_by('-datetime').values_list('user_code', flat=True).first()
+    return user_code
+
+
+def queue_attempt(profile, question, user_code, test_cases):
+    """Add an attempt to the queue.
+
+    Args:
+        profile (Profile): Profile of user making the attempt.
+        question (Question): Question attempted.
+        user_code (str): Code submitted by the user.
+        test_cases (dict): Dictionary of test case primary key to a dictionary containing whether it 'passed'.
+
+    Returns:
+        Number of points the attempt is expected to award, not including achievements.
+    """
+    passed_tests = all(test_case['passed'] for test_case in test_cases.values())
+    point_diff = 0
+    if passed_tests:
+        # Points are only awarded for the first solution, which may also be waiting in the queue
+        solved = (
+            Attempt.objects.filter(profile=profile, question=question, passed_tests=True).exists()
+            or QueuedAttempt.objects.filter(profile=profile, question=question, passed_tests=True).exists()
+        )
+        if not solved:
+            point_diff = POINTS_SOLUTION
+    QueuedAttempt.objects.create(
+        profile=profile,
+        question=question,
+        user_code=user_code,
+        passed_tests=passed_tests,
+        test_cases={
+            str(test_case_id): bool(test_case_data['passed'])
+            for test_case_id, test_case_data in test_cases.items()
+        },
+    )
+    return point_diff
+
+
+def process_queued_attempts(batch_size=ATTEMPT_QUEUE_BATCH_SIZE):
+    """Save a batch of queued attempts, oldest first.
+
+    Queued attempts locked by another consumer are skipped. Points, achievements and statistics are added to each
+    affected profile for the saved attempts, as when attempts are saved individually.
+
+    Args:
+        batch_size (int): Maximum number of queued attempts to save.
+
+    Returns:
+        Number of attempts saved.
+    """
+    with transaction.atomic():
+        queued_attempts = list(
+            QueuedAttempt.objects.select_for_update(skip_locked=True).order_by('pk')[:batch_size]
+        )
+        if not queued_attempts:
+            return 0
+        attempts = Attempt.objects.bulk_create([
+            Attempt(
+                profile_id=queued_attempt.profile_id,
+                question_id=queued_attempt.question_id,
+                datetime=queued_attempt.datetime,
+                user_code=queued_attempt.user_code,
+                passed_tests=queued_attempt.passed_tests,
+            ) for queued_attempt in queued_attempts
+        ])
+        # Test cases deleted since the attempt was queued are skipped, so they cannot block the queue
+        test_case_ids = set(TestCase.objects.filter(
+            pk__in={int(pk) for queued_attempt in queued_attempts for pk in queued_attempt.test_cases}
+        ).values_list('pk', flat=True))
+        TestCaseAttempt.objects.bulk_create([
+            TestCaseAttempt(
+                attempt=attempt,
+                test_case_id=int(test_case_id),
+                passed=passed,
+            )
+            for queued_attempt, attempt in zip(queued_attempts, attempts)
+            for test_case_id, passed in queued_attempt.test_cases.items()
+            if int(test_case_id) in test_case_ids
+        ])
+        # Signals are not sent for bulk inserts, so profiles and group feeds are updated here
+        add_attempts_to_profiles(attempts, list(Achievement.objects.all()))
+        update_feeds_for_attempts(attempts)
+        QueuedAttempt.objects.filter(pk__in=[queued_attempt.pk for queued_attempt in queued_attempts]).delete()
+    return len(queued_attempts)
+
+
+def process_attempt_queue(batch_size=ATTEMPT_QUEUE_BATCH_SIZE, interval=1, once=False):
+    """Save queued attempts until stopped, waiting for the given interval whenever the queue is empty.
+
+    Args:
+        batch_size (int): Maximum number of queued attempts to save in each transaction.
+        interval (float): Seconds to wait when the queue is empty.
+        once (bool): Return once the queue is empty, instead of waiting for more attempts.
+
+    Returns:
+        Number of attempts saved.
+    """
+    total = 0
+    while True:
+        try:
+            processed = process_queued_attempts(batch_size)
+        except Exception:
+            if once:
+                raise
+            logger.exception('Could not save queued attempts.')
+            # The connection may be unusable after a database error
+            connection.close()
+            processed = 0
+        total += processed
+        if not processed:
+            if once:
+                return total
+            time.sleep(interval)
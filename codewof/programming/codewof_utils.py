@@ -9,15 +9,23 @@ import json
 import logging
 import time
 import statistics
+from collections import defaultdict
+from itertools import groupby
 from dateutil.relativedelta import relativedelta
 
 from programming.models import (
     Profile,
+    ProfileStats,
     Attempt,
     Achievement,
     Earned,
 )
+from programming.leaderboard import update_leaderboards
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
 from django.http import JsonResponse
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +42,9 @@ LOGGING = {
 POINTS_ACHIEVEMENT = 10
 POINTS_SOLUTION = 10
 
+#  Number of profiles backdated per set of bulk queries
+BACKDATE_CHUNK_SIZE = 1000
+
 
 def add_points(question, profile, attempt):
     """
@@ -42,14 +53,16 @@ def add_points(question, profile, attempt):
     Adds points to a user's profile for when the user answers a question correctly for the first time.
     Subsequent correct answers should not award any points.
     """
-    attempts = Attempt.objects.filter(question=question, profile=profile)
-    is_first_correct = len(attempts.filter(passed_tests=True)) == 1
-
-    if attempt.passed_tests and is_first_correct:
-        profile.points += POINTS_SOLUTION
-
-    profile.full_clean()
-    profile.save()
+    if attempt.passed_tests:
+        previously_solved = Attempt.objects.filter(
+            question=question,
+            profile=profile,
+            passed_tests=True,
+        ).exclude(pk=attempt.pk).exists()
+        if not previously_solved:
+            profile.points += POINTS_SOLUTION
+            profile.full_clean()
+            profile.save()
     return profile.points
 
 
@@ -80,38 +93,168 @@ def get_days_consecutively_answered(profile, user_attempts=None):
 
     # get datetimes from attempts in date form)
     attempts = user_attempts.datetimes('datetime', 'day', 'DESC')
+    return calculate_streaks([attempt.date() for attempt in attempts])[1]
+
+
+def calculate_streaks(dates):
+    """
+    Calculate the current and longest streaks of consecutive days from the given dates.
 
-    if len(attempts) <= 0:
-        return 0
+    The dates must be unique and in descending order. The current streak is the streak ending on the most recent date.
+    Returns a tuple of (current streak, longest streak).
+    """
+    if len(dates) <= 0:
+        return 0, 0
 
     # first attempt is the start of the first streak
     streak = 1
+    current_streak = None
     highest_streak = 0
-    expected_date = attempts[0].date() - datetime.timedelta(days=1)
+    expected_date = dates[0] - datetime.timedelta(days=1)
 
-    for attempt in attempts[1:]:
-        if attempt.date() == expected_date:
+    for date in dates[1:]:
+        if date == expected_date:
             # continue the streak
             streak += 1
         else:
             # streak has ended
+            if current_streak is None:
+                current_streak = streak
             if streak > highest_streak:
                 highest_streak = streak
             streak = 1
         # compare the next item to yesterday
-        expected_date = attempt.date() - datetime.timedelta(days=1)
+        expected_date = date - datetime.timedelta(days=1)
 
+    if current_streak is None:
+        current_streak = streak
     if streak > highest_streak:
         highest_streak = streak
 
-    return highest_streak
+    return current_streak, highest_streak
 
 
-def filter_attempts_in_past_month(attempts):
-    """Filter the given attempts by only returning those within the past month."""
+def get_attempt_date(attempt):
+    """Get the local date an attempt was made on, matching the day boundaries used when calculating streaks."""
+    attempt_datetime = attempt.datetime
+    if isinstance(attempt_datetime, datetime.datetime):
+        if timezone.is_aware(attempt_datetime):
+            attempt_datetime = timezone.localtime(attempt_datetime)
+        return attempt_datetime.date()
+    return attempt_datetime
+
+
+def calculate_profile_stats(profile, user_attempts=None):
+    """
+    Calculate the attempt statistics of a user profile by scanning all of their attempts.
+
+    This is the reference for the counters stored in ProfileStats, and is used to build them for
+    profiles without any, and to verify them.
+    """
+    if user_attempts is None:
+        user_attempts = Attempt.objects.filter(profile=profile)
+
+    dates = [attempt.date() for attempt in user_attempts.datetimes('datetime', 'day', 'DESC')]
+    current_streak, longest_streak = calculate_streaks(dates)
+    return {
+        'attempts_made': user_attempts.count(),
+        'questions_solved': user_attempts.filter(passed_tests=True).values('question').distinct().count(),
+        'current_streak': current_streak,
+        'longest_streak': longest_streak,
+        'last_attempt_date': dates[0] if dates else None,
+    }
+
+
+def rebuild_profile_stats(profile):
+    """Recalculate and save the statistics of a user profile from all of their attempts."""
+    stats, created = ProfileStats.objects.update_or_create(
+        profile=profile,
+        defaults=calculate_profile_stats(profile),
+    )
+    return stats
+
+
+def get_profile_stats(profile):
+    """
+    Get the statistics of a user profile.
+
+    Statistics are read from the database rather than the cached profile relation, as they are updated
+    as attempts are saved. Profiles without statistics have them built from their attempts.
+    """
+    stats = ProfileStats.objects.filter(profile=profile).first()
+    if stats is None:
+        stats = rebuild_profile_stats(profile)
+    return stats
+
+
+def verify_profile_stats(profile):
+    """
+    Compare the stored statistics of a user profile against a full scan of their attempts.
+
+    Returns a dictionary of mismatched fields, mapping to a tuple of (stored value, expected value).
+    """
+    stats = get_profile_stats(profile)
+    expected = calculate_profile_stats(profile)
+    mismatches = dict()
+    for field, expected_value in expected.items():
+        stored_value = getattr(stats, field)
+        if stored_value != expected_value:
+            mismatches[field] = (stored_value, expected_value)
+    return mismatches
+
+
+def update_profile_stats(attempt):
+    """
+    Update the statistics of the attempt's user profile for a newly created attempt.
+
+    This runs a constant number of queries regardless of how many attempts the user has made. Streaks are only
+    recalculated from all attempts if the attempt is dated before the user's most recent attempt.
+    """
+    # No savepoint is needed, as any error is raised to the caller
+    with transaction.atomic(savepoint=False):
+        try:
+            stats = ProfileStats.objects.select_for_update().get(profile_id=attempt.profile_id)
+        except ProfileStats.DoesNotExist:
+            # Statistics built from all attempts already include this attempt
+            return rebuild_profile_stats(attempt.profile)
+
+        stats.attempts_made += 1
+        if attempt.passed_tests:
+            previously_solved = Attempt.objects.filter(
+                profile_id=attempt.profile_id,
+                question_id=attempt.question_id,
+                passed_tests=True,
+            ).exclude(pk=attempt.pk).exists()
+            if not previously_solved:
+                stats.questions_solved += 1
+
+        attempt_date = get_attempt_date(attempt)
+        if stats.last_attempt_date is None or attempt_date > stats.last_attempt_date:
+            if stats.last_attempt_date is not None and \
+                    attempt_date - stats.last_attempt_date == datetime.timedelta(days=1):
+                stats.current_streak += 1
+            else:
+                stats.current_streak = 1
+            stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+            stats.last_attempt_date = attempt_date
+        elif attempt_date < stats.last_attempt_date:
+            attempts = Attempt.objects.filter(profile_id=attempt.profile_id)
+            dates = [day.date() for day in attempts.datetimes('datetime', 'day', 'DESC')]
+            stats.current_streak, stats.longest_streak = calculate_streaks(dates)
+        stats.save()
+    return stats
+
+
+def get_start_of_past_month():
+    """Get the earliest date included in the past month."""
     today = datetime.datetime.now().replace(tzinfo=None) + relativedelta(days=1)
     last_month = today - relativedelta(months=1)
-    solved = attempts.filter(datetime__gte=last_month.date())
+    return last_month.date()
+
+
+def filter_attempts_in_past_month(attempts):
+    """Filter the given attempts by only returning those within the past month."""
+    solved = attempts.filter(datetime__gte=get_start_of_past_month())
     return solved
 
 
@@ -132,95 +275,75 @@ def check_achievement_conditions(profile, user_attempts=None):
     Achievements available to be checked for are profile creation, number of attempts made,
     number of questions answered, and number of days with consecutive attempts.
 
-    An achievement will not be removed if the user had earned it before but now doesn't meet the conditions
+    An achievement will not be removed if the user had earned it before but now doesn't meet the conditions.
+
+    The user's stored statistics are used unless their attempts are given, in which case the attempts are scanned.
     """
     if user_attempts is None:
-        user_attempts = Attempt.objects.filter(profile=profile)
+        stats = get_profile_stats(profile)
+        num_solved = stats.questions_solved
+        num_attempted = stats.attempts_made
+        num_consec_days = stats.longest_streak
+    else:
+        stats = calculate_profile_stats(profile, user_attempts=user_attempts)
+        num_solved = stats['questions_solved']
+        num_attempted = stats['attempts_made']
+        num_consec_days = stats['longest_streak']
+
+    achievement_objects = list(Achievement.objects.all())
+    earned_achievement_ids = set(profile.earned_achievements.values_list('pk', flat=True))
+    if not any(achievement.id_name == "create-account" for achievement in achievement_objects):
+        logger.warning("No such achievement: create-account")
 
-    achievement_objects = Achievement.objects.all()
-    earned_achievements = profile.earned_achievements.all()
-    new_achievement_names = ""
-    new_achievement_objects = []
+    new_achievement_objects = get_new_achievements(
+        achievement_objects,
+        earned_achievement_ids,
+        num_solved,
+        num_attempted,
+        num_consec_days,
+    )
+    Earned.objects.bulk_create(
+        [Earned(profile=profile, achievement=achievement) for achievement in new_achievement_objects]
+    )
+    new_achievement_names = "".join(achievement.display_name + "\n" for achievement in new_achievement_objects)
+
+    if new_achievement_objects:
+        profile.points += calculate_achievement_points(new_achievement_objects)
+        profile.full_clean()
+        profile.save()
+    return new_achievement_names
+
+
+def get_new_achievements(achievements, earned_achievement_ids, num_solved, num_attempted, num_consec_days):
+    """
+    Get the achievements newly earned by a user profile with the given statistics.
+
+    The achievements must be in tier order. Within each category of achievement, checking stops at the first
+    unearned tier whose condition is not met, as the user won't have met the conditions of any higher tiers.
+    Returns a list of new achievements, ordered by category and then tier.
+    """
+    new_achievements = []
 
     # account creation achievement
-    try:
-        creation_achievement = achievement_objects.get(id_name="create-account")
-        if creation_achievement not in earned_achievements:
-            # create a new account creation
-            Earned.objects.create(
-                profile=profile,
-                achievement=creation_achievement
-            )
-            new_achievement_names += creation_achievement.display_name + "\n"
-            new_achievement_objects.append(creation_achievement)
-    except Achievement.DoesNotExist:
-        logger.warning("No such achievement: create-account")
-        pass
-
-    # check questions solved achievements
-    try:
-        question_achievements = achievement_objects.filter(id_name__contains="questions-solved")
-        solved = user_attempts.filter(passed_tests=True).distinct('question__slug')
-        for question_achievement in question_achievements:
-            if question_achievement not in earned_achievements:
-                num_questions = int(question_achievement.id_name.split("-")[2])
-                if len(solved) >= num_questions:
-                    Earned.objects.create(
-                        profile=profile,
-                        achievement=question_achievement
-                    )
-                    new_achievement_names += question_achievement.display_name + "\n"
-                    new_achievement_objects.append(question_achievement)
-                else:
-                    # hasn't achieved the current achievement tier so won't achieve any higher ones
-                    break
-    except Achievement.DoesNotExist:
-        logger.warning("No such achievements: questions-solved")
-        pass
-
-    # checked questions attempted achievements
-    try:
-        attempt_achievements = achievement_objects.filter(id_name__contains="attempts-made")
-        attempted = user_attempts
-        for attempt_achievement in attempt_achievements:
-            if attempt_achievement not in earned_achievements:
-                num_questions = int(attempt_achievement.id_name.split("-")[2])
-                if len(attempted) >= num_questions:
-                    Earned.objects.create(
-                        profile=profile,
-                        achievement=attempt_achievement
-                    )
-                    new_achievement_names += attempt_achievement.display_name + "\n"
-                    new_achievement_objects.append(attempt_achievement)
+    for achievement in achievements:
+        if achievement.id_name == "create-account" and achievement.pk not in earned_achievement_ids:
+            new_achievements.append(achievement)
+
+    # questions solved, questions attempted, and consecutive days achievements
+    categories = (
+        ("questions-solved", num_solved),
+        ("attempts-made", num_attempted),
+        ("consecutive-days", num_consec_days),
+    )
+    for category, count in categories:
+        for achievement in achievements:
+            if category in achievement.id_name and achievement.pk not in earned_achievement_ids:
+                if count >= int(achievement.id_name.split("-")[2]):
+                    new_achievements.append(achievement)
                 else:
                     # hasn't achieved the current achievement tier so won't achieve any higher ones
                     break
-    except Achievement.DoesNotExist:
-        logger.warning("No such achievements: attempts-made")
-        pass
-
-    # consecutive days logged in achievements
-    num_consec_days = get_days_consecutively_answered(profile, user_attempts=user_attempts)
-    consec_achievements = achievement_objects.filter(id_name__contains="consecutive-days")
-    for consec_achievement in consec_achievements:
-        if consec_achievement not in earned_achievements:
-            n_days = int(consec_achievement.id_name.split("-")[2])
-            if n_days <= num_consec_days:
-                Earned.objects.create(
-                    profile=profile,
-                    achievement=consec_achievement
-                )
-                new_achievement_names += consec_achievement.display_name + "\n"
-                new_achievement_objects.append(consec_achievement)
-            else:
-                # hasn't achieved the current achievement tier so won't achieve any higher ones
-                break
-
-    new_points = calculate_achievement_points(new_achievement_objects)
-    profile.points += new_points
-    profile.full_clean()
-    profile.save()
-    return new_achievement_names
+    return new_achievements
 
 
 def calculate_achievement_points(achievements):
@@ -294,6 +417,238 @@ def backdate_points_and_achievements(n=-1, ignore_flags=True):
         logger.info(f"Backdate duration {duration:0.4f} seconds")
 
 
+def backdate_points_and_achievements_in_bulk(n=-1, ignore_flags=True, chunk_size=BACKDATE_CHUNK_SIZE):
+    """
+    Perform batch backdate of all points and achievements for n profiles in the system, using set-based queries.
+
+    Profiles are backdated in chunks, where each chunk uses grouped queries to calculate the statistics of every
+    profile in the chunk, and bulk queries to write earned achievements, points, and statistics. The number of
+    queries depends on the number of chunks rather than the number of profiles or attempts.
+    """
+    time_before = time.perf_counter()
+    profiles = Profile.objects.order_by('pk')
+    if not ignore_flags:
+        profiles = profiles.filter(has_backdated=False)
+    if (n > 0):
+        profiles = profiles[:n]
+    profile_ids = list(profiles.values_list('pk', flat=True))
+    num_profiles = len(profile_ids)
+    achievements = list(Achievement.objects.all())
+
+    for chunk_start in range(0, num_profiles, chunk_size):
+        chunk_profile_ids = profile_ids[chunk_start:chunk_start + chunk_size]
+        chunk_time_before = time.perf_counter()
+        with transaction.atomic():
+            backdate_profiles(chunk_profile_ids, achievements)
+        chunk_duration = time.perf_counter() - chunk_time_before
+        num_backdated = chunk_start + len(chunk_profile_ids)
+        print("Backdated users: {}/{} ({:0.0f} users per second)".format(
+            num_backdated,
+            num_profiles,
+            len(chunk_profile_ids) / chunk_duration if chunk_duration > 0 else float('inf'),
+        ))
+    time_after = time.perf_counter()
+    print("\nBackdate complete.")
+
+    duration = time_after - time_before
+    if num_profiles > 0:
+        logger.info(
+            f"Backdate duration {duration:0.4f} seconds, {num_profiles / duration:0.1f} users per second"
+        )
+    else:
+        logger.info("No users were backdated")
+        logger.info(f"Backdate duration {duration:0.4f} seconds")
+
+
+def backdate_profiles(profile_ids, achievements):
+    """
+    Backdate points, achievements, and statistics for the given profiles with a constant number of queries.
+
+    The achievements must be in tier order.
+    """
+    profile_stats = calculate_profile_stats_in_bulk(profile_ids)
+    achievement_tiers = {achievement.pk: achievement.achievement_tier for achievement in achievements}
+    earned_achievement_ids = defaultdict(list)
+    earned = Earned.objects.filter(profile_id__in=profile_ids).values_list('profile_id', 'achievement_id')
+    for profile_id, achievement_id in earned:
+        earned_achievement_ids[profile_id].append(achievement_id)
+
+    new_earned = []
+    profiles = []
+    for profile_id in profile_ids:
+        stats = profile_stats[profile_id]
+        new_achievements = get_new_achievements(
+            achievements,
+            earned_achievement_ids[profile_id],
+            stats['questions_solved'],
+            stats['attempts_made'],
+            stats['longest_streak'],
+        )
+        for achievement in new_achievements:
+            new_earned.append(Earned(profile_id=profile_id, achievement=achievement))
+            earned_achievement_ids[profile_id].append(achievement.pk)
+
+        points = stats['questions_solved'] * POINTS_SOLUTION
+        for achievement_id in earned_achievement_ids[profile_id]:
+            points += POINTS_ACHIEVEMENT * achievement_tiers[achievement_id]
+        profiles.append(Profile(pk=profile_id, points=points, has_backdated=True))
+
+    Earned.objects.bulk_create(new_earned)
+    Profile.objects.bulk_update(profiles, ['points', 'has_backdated'])
+    save_profile_stats_in_bulk(profile_stats)
+    # Signals are not sent for bulk updates
+    update_leaderboards({profile.pk: profile.points for profile in profiles})
+
+
+def add_attempts_to_profiles(attempts, achievements):
+    """
+    Add points, achievements, and statistics for newly created attempts, with a constant number of queries.
+
+    Like saving a single attempt, points are only added for questions solved for the first time and for new
+    achievements, so points are not recalculated from all of a profile's attempts. Profiles without statistics
+    have them built from their attempts, and streaks are only recalculated for profiles with an attempt dated
+    before their most recent attempt. The achievements must be in tier order.
+    """
+    profile_ids = sorted({attempt.profile_id for attempt in attempts})
+    stats_objects = ProfileStats.objects.select_for_update().filter(profile_id__in=profile_ids).order_by('profile_id')
+    profile_stats = {
+        stats.profile_id: {
+            'attempts_made': stats.attempts_made,
+            'questions_solved': stats.questions_solved,
+            'current_streak': stats.current_streak,
+            'longest_streak': stats.longest_streak,
+            'last_attempt_date': stats.last_attempt_date,
+        } for stats in stats_objects
+    }
+    # Statistics built from all attempts already include the new attempts
+    missing_ids = [profile_id for profile_id in profile_ids if profile_id not in profile_stats]
+    built_ids = set(missing_ids)
+    profile_stats.update(calculate_profile_stats_in_bulk(missing_ids))
+
+    solved = set(
+        Attempt.objects.filter(
+            profile_id__in=profile_ids,
+            question_id__in={attempt.question_id for attempt in attempts},
+            passed_tests=True,
+        ).exclude(
+            pk__in=[attempt.pk for attempt in attempts],
+        ).values_list('profile_id', 'question_id').distinct()
+    )
+    point_diffs = defaultdict(int)
+    backdated_ids = []
+    for attempt in sorted(attempts, key=lambda attempt: (attempt.datetime, attempt.pk)):
+        if attempt.passed_tests and (attempt.profile_id, attempt.question_id) not in solved:
+            solved.add((attempt.profile_id, attempt.question_id))
+            point_diffs[attempt.profile_id] += POINTS_SOLUTION
+            if attempt.profile_id not in built_ids:
+                profile_stats[attempt.profile_id]['questions_solved'] += 1
+        if attempt.profile_id in built_ids:
+            continue
+        stats = profile_stats[attempt.profile_id]
+        stats['attempts_made'] += 1
+        attempt_date = get_attempt_date(attempt)
+        last_attempt_date = stats['last_attempt_date']
+        if last_attempt_date is None or attempt_date > last_attempt_date:
+            if last_attempt_date is not None and attempt_date - last_attempt_date == datetime.timedelta(days=1):
+                stats['current_streak'] += 1
+            else:
+                stats['current_streak'] = 1
+            stats['longest_streak'] = max(stats['longest_streak'], stats['current_streak'])
+            stats['last_attempt_date'] = attempt_date
+        elif attempt_date < last_attempt_date:
+            backdated_ids.append(attempt.profile_id)
+    for profile_id, stats in calculate_profile_stats_in_bulk(sorted(set(backdated_ids))).items():
+        for field in ('current_streak', 'longest_streak'):
+            profile_stats[profile_id][field] = stats[field]
+
+    earned_achievement_ids = defaultdict(list)
+    earned = Earned.objects.filter(profile_id__in=profile_ids).values_list('profile_id', 'achievement_id')
+    for profile_id, achievement_id in earned:
+        earned_achievement_ids[profile_id].append(achievement_id)
+    new_earned = []
+    for profile_id in profile_ids:
+        stats = profile_stats[profile_id]
+        new_achievements = get_new_achievements(
+            achievements,
+            earned_achievement_ids[profile_id],
+            stats['questions_solved'],
+            stats['attempts_made'],
+            stats['longest_streak'],
+        )
+        new_earned.extend(Earned(profile_id=profile_id, achievement=achievement) for achievement in new_achievements)
+        point_diffs[profile_id] += calculate_achievement_points(new_achievements)
+
+    changed_ids = [profile_id for profile_id, point_diff in point_diffs.items() if point_diff]
+    profiles = list(Profile.objects.select_for_update().filter(pk__in=changed_ids).order_by('pk').only('pk', 'points'))
+    for profile in profiles:
+        profile.points += point_diffs[profile.pk]
+    Earned.objects.bulk_create(new_earned)
+    Profile.objects.bulk_update(profiles, ['points'])
+    save_profile_stats_in_bulk(profile_stats)
+    # Signals are not sent for bulk updates
+    update_leaderboards({profile.pk: profile.points for profile in profiles})
+
+
+def calculate_profile_stats_in_bulk(profile_ids):
+    """
+    Calculate the attempt statistics of the given user profiles with grouped queries.
+
+    Returns a dictionary mapping each profile ID to the statistics calculated by calculate_profile_stats.
+    """
+    profile_stats = {
+        profile_id: {
+            'attempts_made': 0,
+            'questions_solved': 0,
+            'current_streak': 0,
+            'longest_streak': 0,
+            'last_attempt_date': None,
+        } for profile_id in profile_ids
+    }
+    attempts = Attempt.objects.filter(profile_id__in=profile_ids)
+
+    counts = attempts.values('profile_id').annotate(
+        attempts_made=Count('pk'),
+        questions_solved=Count('question', filter=Q(passed_tests=True), distinct=True),
+    ).order_by()
+    for count in counts:
+        profile_stats[count['profile_id']]['attempts_made'] = count['attempts_made']
+        profile_stats[count['profile_id']]['questions_solved'] = count['questions_solved']
+
+    # Dates are truncated in the current time zone, matching the dates used for individual profiles
+    attempt_dates = (
+        attempts.annotate(date=TruncDate('datetime'))
+        .values_list('profile_id', 'date')
+        .distinct()
+        .order_by('profile_id', '-date')
+    )
+    for profile_id, profile_dates in groupby(attempt_dates.iterator(), key=lambda row: row[0]):
+        dates = [row[1] for row in profile_dates]
+        stats = profile_stats[profile_id]
+        stats['current_streak'], stats['longest_streak'] = calculate_streaks(dates)
+        stats['last_attempt_date'] = dates[0]
+    return profile_stats
+
+
+def save_profile_stats_in_bulk(profile_stats):
+    """Save the given statistics, which map profile IDs to calculated statistics, with bulk queries."""
+    existing_ids = set(
+        ProfileStats.objects.filter(profile_id__in=profile_stats.keys()).values_list('profile_id', flat=True)
+    )
+    to_update = []
+    to_create = []
+    for profile_id, stats in profile_stats.items():
+        stats_object = ProfileStats(profile_id=profile_id, **stats)
+        if profile_id in existing_ids:
+            to_update.append(stats_object)
+        else:
+            to_create.append(stats_object)
+    ProfileStats.objects.bulk_update(
+        to_update,
+        ['attempts_made', 'questions_solved', 'current_streak', 'longest_streak', 'last_attempt_date'],
+    )
+    ProfileStats.objects.bulk_create(to_create)
+
+
 def backdate_points(profile, user_attempts=None):
     """Re-calculate points for the user profile."""
     if user_attempts is None:
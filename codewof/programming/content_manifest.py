@@ -0,0 +1,75 @@
+"""
+Manifest of the content loaded by the load_questions command.
+
+The manifest stores a hash of each structure file and question directory when it was loaded, so content that has not
+changed since it was last loaded can be skipped. Hashes cover the contents and relative paths of the files, so adding,
+changing, renaming or removing a file changes the hash.
+"""
+
+import hashlib
+import os
+
+from django.utils import timezone
+
+from programming.models import LoadedContent
+
+
+def hash_files(paths, base_path=''):
+    """Return a hash of the given files, with missing files hashed by their path.
+
+    Args:
+        paths (list): Paths of files to hash, in order.
+        base_path (str): Path the hashed paths are relative to, so the hash does not depend on where content is.
+
+    Returns:
+        Hex digest of the SHA-256 hash of the files.
+    """
+    content_hash = hashlib.sha256()
+    for path in paths:
+        content_hash.update(os.path.relpath(path, base_path).encode('utf-8'))
+        content_hash.update(b'\0')
+        try:
+            with open(path, 'rb') as content_file:
+                content_hash.update(hashlib.sha256(content_file.read()).digest())
+        except FileNotFoundError:
+            content_hash.update(b'missing')
+    return content_hash.hexdigest()
+
+
+def get_directory_files(path):
+    """Return the sorted paths of all files in the given directory and its subdirectories."""
+    paths = []
+    for directory, _, filenames in os.walk(path):
+        paths.extend(os.path.join(directory, filename) for filename in filenames)
+    return sorted(paths)
+
+
+def get_manifest(keys=None):
+    """Return a dictionary of the key to hash of loaded content.
+
+    Args:
+        keys (iterable): Keys to return hashes of, defaults to all keys.
+    """
+    loaded_content = LoadedContent.objects.all()
+    if keys is not None:
+        loaded_content = loaded_content.filter(key__in=keys)
+    return dict(loaded_content.values_list('key', 'content_hash'))
+
+
+def update_manifest(hashes):
+    """Store the hashes of loaded content, given as a dictionary of key to hash."""
+    now = timezone.now()
+    existing = LoadedContent.objects.filter(key__in=hashes).in_bulk(field_name='key')
+    for key, loaded_content in existing.items():
+        loaded_content.content_hash = hashes[key]
+        loaded_content.date_loaded = now
+    LoadedContent.objects.bulk_update(existing.values(), ['content_hash', 'date_loaded'])
+    LoadedContent.objects.bulk_create([
+        LoadedContent(key=key, content_hash=content_hash, date_loaded=now)
+        for key, content_hash in hashes.items() if key not in existing
+    ])
+
+
+def remove_from_manifest(keys):
+    """Remove the given keys from the manifest, so their content is loaded again."""
+    LoadedContent.objects.filter(key__in=keys).delete()
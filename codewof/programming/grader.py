@@ -0,0 +1,220 @@
+"""
+Grading of attempts on the server.
+
+Code is run against each of a question's test cases in the sandbox pool (see programming.sandbox), and a test case
+passes if its output matches the expected output, ignoring trailing whitespace, without a runtime error. This matches
+how test cases are checked when run in the browser.
+"""
+
+import difflib
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from programming.group_feed import update_feeds_for_attempts
+from programming.models import Attempt, Question, QuestionTypeProgram, TestCaseAttempt
+from programming.sandbox import Limits, SandboxPool
+
+if settings.PROGRAMMING_SERVER_GRADING and not settings.PROGRAMMING_GRADER_ISOLATION:
+    raise ImproperlyConfigured('PROGRAMMING_SERVER_GRADING requires PROGRAMMING_GRADER_ISOLATION.')
+
+SANDBOX_POOL = SandboxPool(
+    processes=settings.PROGRAMMING_GRADER_WORKERS,
+    limits=Limits(
+        time_limit=settings.PROGRAMMING_GRADER_TIME_LIMIT,
+        memory_limit=settings.PROGRAMMING_GRADER_MEMORY_LIMIT,
+        isolate=settings.PROGRAMMING_GRADER_ISOLATION,
+    ),
+    max_jobs_per_worker=settings.PROGRAMMING_GRADER_MAX_JOBS_PER_WORKER,
+)
+
+
+def get_test_cases(question):
+    """Return the test cases of a question, ordered by number.
+
+    Args:
+        question (Question): Question, as a subclass or the base class.
+
+    Returns:
+        List of test cases of the question's subclass.
+    """
+    if not hasattr(question, 'test_cases'):
+        question = Question.objects.get_subclass(pk=question.pk)
+    if not hasattr(question, 'test_cases'):
+        # Questions without a type have no test cases
+        return []
+    return list(question.test_cases.order_by('number', 'pk'))
+
+
+def get_test(question, test_case, user_code):
+    """Return the code and standard input for running the user's code against a test case.
+
+    Program questions are given the test case's input, while other questions run the test case's
+    code after the user's code.
+    """
+    if isinstance(question, QuestionTypeProgram):
+        return {
+            'code': user_code,
+            'stdin': test_case.test_input,
+        }
+    return {
+        'code': user_code + '\n' + test_case.test_code,
+        'stdin': '',
+    }
+
+
+def grade_results(test_cases, results):
+    """Return the grade of each test case from the results of running it.
+
+    Args:
+        test_cases (list): List of test cases.
+        results (list): List of sandbox results, in the same order as the test cases.
+
+    Returns:
+        Dictionary of test case primary key to a dictionary of 'passed', 'received_output' and 'runtime_error'.
+    """
+    grades = dict()
+    for test_case, result in zip(test_cases, results):
+        passed = result['output'].rstrip() == test_case.expected_output.rstrip() and not result['runtime_error']
+        grades[test_case.pk] = {
+            'passed': passed,
+            'received_output': result['output'],
+            'runtime_error': result['runtime_error'],
+        }
+    return grades
+
+
+def grade_attempts(submissions, pool=SANDBOX_POOL):
+    """Grade many submissions, running them in parallel across the sandbox pool.
+
+    Args:
+        submissions (list): List of tuples of question (as a subclass), list of its test cases, and user code.
+        pool (SandboxPool): Pool to run the submissions in.
+
+    Returns:
+        List of grades of each submission (see grade_results), in the same order as the submissions.
+
+    Raises:
+        SandboxError: If the submissions could not be graded in the sandbox, such as not in time.
+    """
+    jobs = [
+        [get_test(question, test_case, user_code) for test_case in test_cases]
+        for question, test_cases, user_code in submissions
+    ]
+    results = pool.run_many(jobs)
+    return [
+        grade_results(test_cases, job_results)
+        for (_, test_cases, _), job_results in zip(submissions, results)
+    ]
+
+
+def grade_attempt(question, user_code):
+    """Grade the user's code against the test cases of a question.
+
+    Args:
+        question (Question): Question, as a subclass or the base class.
+        user_code (str): Code submitted by the user.
+
+    Returns:
+        Grade of each test case (see grade_results).
+
+    Raises:
+        SandboxError: If the code could not be graded in the sandbox, such as not in time.
+    """
+    if not hasattr(question, 'test_cases'):
+        question = Question.objects.get_subclass(pk=question.pk)
+    test_cases = get_test_cases(question)
+    return grade_attempts([(question, test_cases, user_code)])[0]
+
+
+def get_questions_with_test_cases(question_pks):
+    """Return a dictionary of question primary key to a tuple of the question (as a subclass) and its test cases."""
+    questions = Question.objects.filter(pk__in=question_pks).select_subclasses()
+    return {question.pk: (question, get_test_cases(question)) for question in questions}
+
+
+def regrade_attempts(attempts, questions, pool=SANDBOX_POOL, save=True):
+    """Grade stored attempts again, updating their results.
+
+    Existing test case results are updated, and results are created for test cases added since the attempt was made.
+    Attempts of questions without test cases keep their result. Group feeds are updated, but points and achievements
+    are not changed.
+
+    Args:
+        attempts (list): List of Attempt objects.
+        questions (dict): Questions and test cases of the attempts, from get_questions_with_test_cases.
+        pool (SandboxPool): Pool to run the attempts in.
+        save (bool): Save changes to the database if True.
+
+    Returns:
+        List of attempts whose overall result changed.
+    """
+    submissions = [questions[attempt.question_id] + (attempt.user_code, ) for attempt in attempts]
+    grades = grade_attempts(submissions, pool)
+    test_case_attempts = {
+        (test_case_attempt.attempt_id, test_case_attempt.test_case_id): test_case_attempt
+        for test_case_attempt in TestCaseAttempt.objects.filter(attempt__in=attempts)
+    }
+    changed_attempts = []
+    changed_test_case_attempts = []
+    new_test_case_attempts = []
+    for attempt, attempt_grades in zip(attempts, grades):
+        for test_case_pk, grade in attempt_grades.items():
+            test_case_attempt = test_case_attempts.get((attempt.pk, test_case_pk))
+            if test_case_attempt is None:
+                new_test_case_attempts.append(
+                    TestCaseAttempt(attempt=attempt, test_case_id=test_case_pk, passed=grade['passed'])
+                )
+            elif test_case_attempt.passed != grade['passed']:
+                test_case_attempt.passed = grade['passed']
+                changed_test_case_attempts.append(test_case_attempt)
+        if not attempt_grades:
+            continue
+        passed_tests = all(grade['passed'] for grade in attempt_grades.values())
+        if attempt.passed_tests != passed_tests:
+            attempt.passed_tests = passed_tests
+            changed_attempts.append(attempt)
+    if save:
+        with transaction.atomic():
+            Attempt.objects.bulk_update(changed_attempts, ['passed_tests'])
+            TestCaseAttempt.objects.bulk_update(changed_test_case_attempts, ['passed'])
+            TestCaseAttempt.objects.bulk_create(new_test_case_attempts)
+            update_feeds_for_attempts(changed_attempts)
+    return changed_attempts
+
+
+def verify_solutions(questions, pool=SANDBOX_POOL):
+    """Run the solution of each question against its test cases, in parallel across the sandbox pool.
+
+    Args:
+        questions (dict): Questions and test cases to verify, from get_questions_with_test_cases.
+        pool (SandboxPool): Pool to run the solutions in.
+
+    Returns:
+        List of tuples of question, test case and grade (see grade_results) of each test case that failed,
+        ordered by question slug and test case number.
+
+    Raises:
+        SandboxError: If the solutions could not be run in the sandbox.
+    """
+    submissions = [
+        (question, test_cases, question.solution)
+        for question, test_cases in sorted(questions.values(), key=lambda item: item[0].slug)
+    ]
+    failures = []
+    for (question, test_cases, _), grades in zip(submissions, grade_attempts(submissions, pool)):
+        for test_case in test_cases:
+            grade = grades[test_case.pk]
+            if not grade['passed']:
+                failures.append((question, test_case, grade))
+    return failures
+
+
+def get_output_diff(expected_output, received_output):
+    """Return a diff of the expected and received output of a test case, ignoring trailing whitespace."""
+    return '\n'.join(difflib.unified_diff(
+        expected_output.rstrip().splitlines(),
+        received_output.rstrip().splitlines(),
+        fromfile='expected',
+        tofile='received',
+        lineterm='',
+    ))
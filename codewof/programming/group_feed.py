@@ -0,0 +1,263 @@
+"""
+Feeds of passed attempts made by members of groups.
+
+Each group with its feed enabled has a GroupFeedEntry for the passed attempts of its members, including the group
+members that have liked each attempt. Entries are written when attempts are passed, liked or unliked and when
+members join or leave, so showing a page of the feed takes the same number of queries for any group size.
+
+Entries are only stored for recent attempts. The feed_entries_after datetime of a group is the point from which
+its entries include every passed attempt of its members, and pages older than it are read from the attempts of
+members. A group without it, such as one that has just enabled its feed, has entries created from the most recent
+FEED_BACKFILL_SIZE passed attempts of its members when its feed is first read. A new member has their most recent
+FEED_BACKFILL_SIZE passed attempts since then added, moving the datetime forward if they have older attempts.
+
+Entries store the primary keys of the users that liked the attempt, and their names are read when the feed is shown
+so they are current.
+
+Pages are found with a cursor of the datetime and primary key of the last attempt shown, rather than an offset,
+so each page is read from an index.
+"""
+
+import datetime
+import operator
+from collections import defaultdict
+from functools import reduce
+from django.db import transaction
+from django.db.models import Q
+from programming.models import Attempt, GroupFeedEntry
+from users.models import Group, Membership, User
+
+FEED_PAGE_SIZE = 10
+FEED_BACKFILL_SIZE = 100
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def get_like_users(attempt_ids, group_ids):
+    """Return the group members that have liked each of the given attempts, with one query.
+
+    Args:
+        attempt_ids (iterable): Primary keys of attempts.
+        group_ids (iterable): Primary keys of groups.
+
+    Returns:
+        Dictionary of (group primary key, attempt primary key) to a list of the primary keys of the users.
+    """
+    like_users = defaultdict(list)
+    for key, users in Attempt.get_like_users_for_groups(attempt_ids, group_ids).items():
+        like_users[key] = [user.pk for user in users]
+    return like_users
+
+
+def create_entries(group_attempts):
+    """Create feed entries for the given attempts, skipping any that already exist.
+
+    Args:
+        group_attempts (list): List of tuples of group primary key and attempt.
+    """
+    if not group_attempts:
+        return
+    like_users = get_like_users(
+        {attempt.pk for _, attempt in group_attempts},
+        {group_id for group_id, _ in group_attempts},
+    )
+    GroupFeedEntry.objects.bulk_create([
+        GroupFeedEntry(
+            group_id=group_id,
+            attempt_id=attempt.pk,
+            datetime=attempt.datetime,
+            like_users=like_users[(group_id, attempt.pk)],
+        ) for group_id, attempt in group_attempts
+    ], ignore_conflicts=True)
+
+
+def refresh_like_users(entries):
+    """Update the like users of the given feed entries from the stored likes.
+
+    Args:
+        entries (QuerySet): Feed entries to update, which are locked until the transaction ends.
+    """
+    with transaction.atomic():
+        entries = list(entries.select_for_update().order_by('pk'))
+        if not entries:
+            return
+        like_users = get_like_users(
+            {entry.attempt_id for entry in entries},
+            {entry.group_id for entry in entries},
+        )
+        for entry in entries:
+            entry.like_users = like_users[(entry.group_id, entry.attempt_id)]
+        GroupFeedEntry.objects.bulk_update(entries, ['like_users'])
+
+
+def update_feeds_for_attempts(attempts):
+    """Add the given attempts to the feeds of their users' groups if they passed, otherwise remove them.
+
+    Args:
+        attempts (list): List of attempts.
+    """
+    passed_attempts = [attempt for attempt in attempts if attempt.passed_tests]
+    failed_attempt_ids = [attempt.pk for attempt in attempts if not attempt.passed_tests]
+    if failed_attempt_ids:
+        GroupFeedEntry.objects.filter(attempt_id__in=failed_attempt_ids).delete()
+    if passed_attempts:
+        # The primary key of a profile is the primary key of its user
+        group_ids = defaultdict(list)
+        memberships = Membership.objects.filter(
+            user_id__in={attempt.profile_id for attempt in passed_attempts},
+            group__feed_enabled=True,
+        ).values_list('user_id', 'group_id')
+        for user_id, group_id in memberships:
+            group_ids[user_id].append(group_id)
+        create_entries([
+            (group_id, attempt)
+            for attempt in passed_attempts
+            for group_id in group_ids[attempt.profile_id]
+        ])
+
+
+def get_member_attempts(group_id):
+    """Return a queryset of the passed attempts of members of a group, newest first."""
+    return Attempt.objects.filter(
+        passed_tests=True,
+        profile__user__membership__group_id=group_id,
+    ).order_by('-datetime', '-pk')
+
+
+def backfill_group_feed(group):
+    """Create feed entries for the most recent passed attempts of members of the group, and set feed_entries_after."""
+    attempts = list(get_member_attempts(group.pk).only('pk', 'datetime')[:FEED_BACKFILL_SIZE])
+    create_entries([(group.pk, attempt) for attempt in attempts])
+    entries_after = EPOCH
+    if len(attempts) == FEED_BACKFILL_SIZE:
+        # Other attempts made at the same time as the oldest entry may not have entries
+        entries_after = attempts[-1].datetime
+    Group.objects.filter(pk=group.pk, feed_entries_after__isnull=True).update(feed_entries_after=entries_after)
+    group.refresh_from_db(fields=['feed_entries_after'])
+
+
+def add_member(membership):
+    """Add the recent passed attempts of a new member to the group feed, and their likes to existing entries."""
+    group = membership.group
+    if not group.feed_enabled:
+        return
+    if group.feed_entries_after is not None:
+        attempts = list(Attempt.objects.filter(
+            profile_id=membership.user_id,
+            passed_tests=True,
+            datetime__gt=group.feed_entries_after,
+        ).order_by('-datetime', '-pk').only('pk', 'datetime')[:FEED_BACKFILL_SIZE])
+        create_entries([(group.pk, attempt) for attempt in attempts])
+        if len(attempts) == FEED_BACKFILL_SIZE:
+            # The older attempts of the member do not have entries, so are read from attempts instead
+            Group.objects.filter(
+                pk=group.pk,
+                feed_entries_after__lt=attempts[-1].datetime,
+            ).update(feed_entries_after=attempts[-1].datetime)
+    refresh_like_users(GroupFeedEntry.objects.filter(
+        group_id=membership.group_id,
+        attempt__like__user_id=membership.user_id,
+    ))
+
+
+def remove_member(membership):
+    """Remove the attempts and likes of a member that has left the group from the group feed."""
+    remove_members(membership.group_id, [membership.user_id])
+
+
+def remove_members(group_id, user_ids):
+    """Remove the attempts and likes of members that have left the group from the group feed, with one query each.
+
+    Args:
+        group_id (int): Primary key of the group.
+        user_ids (list): Primary keys of the users that have left the group.
+    """
+    if not user_ids:
+        return
+    GroupFeedEntry.objects.filter(group_id=group_id, attempt__profile_id__in=user_ids).delete()
+    refresh_like_users(GroupFeedEntry.objects.filter(group_id=group_id).filter(
+        reduce(operator.or_, (Q(like_users__contains=[user_id]) for user_id in user_ids)),
+    ))
+
+
+def get_cursor(entry):
+    """Return the cursor for the page of the feed after the given entry."""
+    return '{}_{}'.format((entry.datetime - EPOCH) // datetime.timedelta(microseconds=1), entry.attempt_id)
+
+
+def parse_cursor(cursor):
+    """Return a tuple of the datetime and attempt primary key of a cursor, or None if it is not valid."""
+    try:
+        microseconds, attempt_id = cursor.split('_')
+        attempt_id = int(attempt_id)
+        cursor_datetime = EPOCH + datetime.timedelta(microseconds=int(microseconds))
+    except (AttributeError, ValueError, OverflowError):
+        return None
+    # Primary keys outside the range of the column would raise a database error
+    if not 0 < attempt_id < 2 ** 63:
+        return None
+    return cursor_datetime, attempt_id
+
+
+def get_group_feed(group, cursor=None, page_size=FEED_PAGE_SIZE):
+    """Return a page of the feed of a group.
+
+    Args:
+        group (Group): Group to show the feed of.
+        cursor (str): Cursor of the page, from a previous page. If None or not valid, the first page is returned.
+        page_size (int): Number of entries in the page.
+
+    Returns:
+        Tuple of a list of feed entries, with their attempt, user and question and a group_like_users list of the
+        group members that have liked the attempt ordered by name, and the cursor of the next page (None if this is
+        the last page).
+    """
+    if group.feed_entries_after is None:
+        backfill_group_feed(group)
+    position = parse_cursor(cursor)
+    entries = GroupFeedEntry.objects.filter(group=group, datetime__gt=group.feed_entries_after)
+    if position is not None:
+        before_datetime, before_attempt_id = position
+        entries = entries.filter(
+            Q(datetime__lt=before_datetime) | Q(datetime=before_datetime, attempt_id__lt=before_attempt_id)
+        )
+    entries = entries.select_related(
+        'attempt__profile__user',
+        'attempt__question',
+    ).order_by('-datetime', '-attempt_id')
+    page = list(entries[:page_size + 1])
+
+    if len(page) <= page_size:
+        # Attempts older than the stored entries are read from the attempts of members
+        if page:
+            position = (page[-1].datetime, page[-1].attempt_id)
+        attempts = get_member_attempts(group.pk).filter(
+            datetime__lte=group.feed_entries_after,
+        ).select_related('profile__user', 'question')
+        if position is not None:
+            before_datetime, before_attempt_id = position
+            attempts = attempts.filter(
+                Q(datetime__lt=before_datetime) | Q(datetime=before_datetime, pk__lt=before_attempt_id)
+            )
+        attempts = list(attempts[:page_size + 1 - len(page)])
+        like_users = get_like_users([attempt.pk for attempt in attempts], [group.pk])
+        page.extend(
+            GroupFeedEntry(
+                group=group,
+                attempt=attempt,
+                datetime=attempt.datetime,
+                like_users=like_users[(group.pk, attempt.pk)],
+            ) for attempt in attempts
+        )
+
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = get_cursor(page[-1])
+
+    users = User.objects.in_bulk({user_id for entry in page for user_id in entry.like_users})
+    for entry in page:
+        entry.group_like_users = sorted(
+            (users[user_id] for user_id in entry.like_users if user_id in users),
+            key=lambda user: (user.first_name, user.last_name, user.pk),
+        )
+    return page, next_cursor
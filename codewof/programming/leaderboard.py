@@ -0,0 +1,340 @@
+"""
+Leaderboards ranking profiles by points, for all users and for each group.
+
+Rankings are kept in a sorted store, so finding the top profiles or the rank of a profile does not query the
+profile table. Scores are updated as points of profiles change, once the database transaction is committed.
+The store is chosen with the LEADERBOARD_STORE setting:
+
+- InMemoryLeaderboardStore keeps sorted lists in the current process, so is only suitable for tests and
+  development with a single process.
+- RedisLeaderboardStore keeps Redis sorted sets, shared between all processes.
+
+A leaderboard is built from the database the first time it is used, or by the rebuild_leaderboards command.
+Profiles with the same points share the same rank.
+"""
+
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+from programming.models import Profile
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_LEADERBOARD = 'global'
+
+
+def get_group_leaderboard_name(group_id):
+    """Return the name of the leaderboard of the given group."""
+    return 'group-{}'.format(group_id)
+
+
+class InMemoryLeaderboardStore:
+    """Leaderboards kept as sorted lists in memory.
+
+    Each leaderboard is a sorted list of (negative score, member) pairs and a dictionary of member to score,
+    so ranks are found by binary search.
+    """
+
+    def __init__(self):
+        """Create an empty store."""
+        self._boards = dict()
+        self._built = set()
+        self._lock = threading.Lock()
+
+    def update(self, board, scores):
+        """Set the score of each of the given members.
+
+        Args:
+            board (str): Name of leaderboard.
+            scores (dict): Dictionary of member to score.
+        """
+        with self._lock:
+            entries, member_scores = self._boards.setdefault(board, ([], dict()))
+            for member, score in scores.items():
+                if member in member_scores:
+                    del entries[bisect.bisect_left(entries, (-member_scores[member], member))]
+                bisect.insort(entries, (-score, member))
+                member_scores[member] = score
+
+    def remove(self, board, members):
+        """Remove the given members from the leaderboard."""
+        with self._lock:
+            entries, member_scores = self._boards.get(board, ([], dict()))
+            for member in members:
+                if member in member_scores:
+                    del entries[bisect.bisect_left(entries, (-member_scores.pop(member), member))]
+
+    def replace(self, board, scores):
+        """Replace all scores of the leaderboard with the given scores, and mark it as built."""
+        entries = sorted((-score, member) for member, score in scores.items())
+        with self._lock:
+            self._boards[board] = (entries, dict(scores))
+            self._built.add(board)
+
+    def delete(self, board):
+        """Delete the leaderboard."""
+        with self._lock:
+            self._boards.pop(board, None)
+            self._built.discard(board)
+
+    def is_built(self, board):
+        """Return True if the leaderboard has been built."""
+        return board in self._built
+
+    def top(self, board, count):
+        """Return a list of (member, score) pairs of the members with the highest scores."""
+        with self._lock:
+            entries, _ = self._boards.get(board, ([], dict()))
+            return [(member, -score) for score, member in entries[:count]]
+
+    def rank(self, board, member):
+        """Return a tuple of the rank of the member, starting from 1, and its score, or None if not ranked."""
+        with self._lock:
+            entries, member_scores = self._boards.get(board, ([], dict()))
+            if member not in member_scores:
+                return None
+            score = member_scores[member]
+            # Number of members with a higher score
+            return bisect.bisect_left(entries, (-score, )) + 1, score
+
+    def size(self, board):
+        """Return the number of members in the leaderboard."""
+        with self._lock:
+            return len(self._boards.get(board, ([], dict()))[1])
+
+    def clear(self):
+        """Delete all leaderboards."""
+        with self._lock:
+            self._boards.clear()
+            self._built.clear()
+
+
+class RedisLeaderboardStore:
+    """Leaderboards kept as Redis sorted sets.
+
+    Requires the redis package.
+    """
+
+    def __init__(self, url, prefix='leaderboard:'):
+        """Create a store using the Redis server at the given URL.
+
+        Args:
+            url (str): Redis URL, for example 'redis://redis:6379/0'.
+            prefix (str): Prefix of the keys of leaderboards.
+        """
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('The redis package is required for RedisLeaderboardStore.')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.built_key = prefix + 'built'
+
+    def get_key(self, board):
+        """Return the key of the sorted set of the leaderboard."""
+        return self.prefix + board
+
+    def update(self, board, scores):
+        """Set the score of each of the given members.
+
+        Args:
+            board (str): Name of leaderboard.
+            scores (dict): Dictionary of member to score.
+        """
+        if scores:
+            self.client.zadd(self.get_key(board), scores)
+
+    def remove(self, board, members):
+        """Remove the given members from the leaderboard."""
+        if members:
+            self.client.zrem(self.get_key(board), *members)
+
+    def replace(self, board, scores):
+        """Replace all scores of the leaderboard with the given scores, and mark it as built."""
+        key = self.get_key(board)
+        temp_key = key + ':rebuild'
+        pipeline = self.client.pipeline()
+        pipeline.delete(temp_key)
+        if scores:
+            pipeline.zadd(temp_key, scores)
+            pipeline.rename(temp_key, key)
+        else:
+            pipeline.delete(key)
+        pipeline.sadd(self.built_key, board)
+        pipeline.execute()
+
+    def delete(self, board):
+        """Delete the leaderboard."""
+        pipeline = self.client.pipeline()
+        pipeline.delete(self.get_key(board))
+        pipeline.srem(self.built_key, board)
+        pipeline.execute()
+
+    def is_built(self, board):
+        """Return True if the leaderboard has been built."""
+        return bool(self.client.sismember(self.built_key, board))
+
+    def top(self, board, count):
+        """Return a list of (member, score) pairs of the members with the highest scores."""
+        if count <= 0:
+            return []
+        entries = self.client.zrevrange(self.get_key(board), 0, count - 1, withscores=True)
+        return [(int(member), int(score)) for member, score in entries]
+
+    def rank(self, board, member):
+        """Return a tuple of the rank of the member, starting from 1, and its score, or None if not ranked."""
+        key = self.get_key(board)
+        score = self.client.zscore(key, member)
+        if score is None:
+            return None
+        # Number of members with a higher score
+        higher = self.client.zcount(key, '({}'.format(score), '+inf')
+        return higher + 1, int(score)
+
+    def size(self, board):
+        """Return the number of members in the leaderboard."""
+        return self.client.zcard(self.get_key(board))
+
+    def clear(self):
+        """Delete all leaderboards."""
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the leaderboard store given by the LEADERBOARD_STORE setting, creating it when first used."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store_class = import_string(settings.LEADERBOARD_STORE)
+                _store = store_class(**settings.LEADERBOARD_STORE_OPTIONS)
+    return _store
+
+
+def get_leaderboard_name(group=None):
+    """Return the name of the leaderboard of the given group, or the global leaderboard if no group is given."""
+    if group is None:
+        return GLOBAL_LEADERBOARD
+    return get_group_leaderboard_name(group.pk)
+
+
+def rebuild_leaderboard(group=None):
+    """Build the leaderboard of the given group, or the global leaderboard, from the points of profiles."""
+    profiles = Profile.objects.all()
+    if group is not None:
+        profiles = profiles.filter(user__membership__group=group)
+    get_store().replace(get_leaderboard_name(group), dict(profiles.values_list('pk', 'points')))
+
+
+def get_built_store(group=None):
+    """Return the leaderboard store, building the leaderboard of the given group if it has not been built."""
+    store = get_store()
+    if not store.is_built(get_leaderboard_name(group)):
+        rebuild_leaderboard(group)
+    return store
+
+
+def get_top_profiles(count, group=None):
+    """Return the profiles with the most points.
+
+    Args:
+        count (int): Maximum number of profiles to return.
+        group (Group): Group to rank members of, or None to rank all profiles.
+
+    Returns:
+        List of tuples of rank, profile and points, in rank order.
+    """
+    entries = get_built_store(group).top(get_leaderboard_name(group), count)
+    profiles = Profile.objects.select_related('user').in_bulk([profile_id for profile_id, _ in entries])
+    ranked_profiles = []
+    rank = 0
+    previous_points = None
+    for position, (profile_id, points) in enumerate(entries, start=1):
+        if points != previous_points:
+            rank = position
+            previous_points = points
+        if profile_id in profiles:
+            ranked_profiles.append((rank, profiles[profile_id], points))
+    return ranked_profiles
+
+
+def get_rank(profile, group=None):
+    """Return a tuple of the rank of the profile and its points, or None if it is not ranked.
+
+    Args:
+        profile (Profile): Profile to rank.
+        group (Group): Group to rank the profile in, or None to rank it against all profiles.
+    """
+    return get_built_store(group).rank(get_leaderboard_name(group), profile.pk)
+
+
+def get_leaderboard_size(group=None):
+    """Return the number of profiles ranked in the leaderboard of the given group, or the global leaderboard."""
+    return get_built_store(group).size(get_leaderboard_name(group))
+
+
+def update_leaderboards(profile_points):
+    """Update the scores of the given profiles in the global leaderboard and the leaderboards of their groups.
+
+    Scores are saved once the current transaction is committed.
+
+    Args:
+        profile_points (dict): Dictionary of profile primary key to points.
+    """
+    if not profile_points:
+        return
+    group_points = defaultdict(dict)
+    memberships = Profile.objects.filter(
+        pk__in=profile_points.keys(),
+        user__membership__isnull=False,
+    ).values_list('pk', 'user__membership__group')
+    for profile_id, group_id in memberships:
+        group_points[group_id][profile_id] = profile_points[profile_id]
+
+    def save_scores():
+        store = get_store()
+        try:
+            store.update(GLOBAL_LEADERBOARD, profile_points)
+            for group_id, points in group_points.items():
+                store.update(get_group_leaderboard_name(group_id), points)
+        except Exception:
+            # Leaderboards can be rebuilt from the database
+            logger.exception('Could not update leaderboards.')
+
+    transaction.on_commit(save_scores)
+
+
+def add_group_member(group_id, profile_id, points):
+    """Add a profile to the leaderboard of a group, once the current transaction is committed."""
+    transaction.on_commit(lambda: get_store().update(get_group_leaderboard_name(group_id), {profile_id: points}))
+
+
+def remove_group_member(group_id, profile_id):
+    """Remove a profile from the leaderboard of a group, once the current transaction is committed."""
+    remove_group_members(group_id, [profile_id])
+
+
+def remove_group_members(group_id, profile_ids):
+    """Remove profiles from the leaderboard of a group, once the current transaction is committed."""
+    transaction.on_commit(lambda: get_store().remove(get_group_leaderboard_name(group_id), profile_ids))
+
+
+def remove_profile(profile_id):
+    """Remove a profile from the global leaderboard, once the current transaction is committed."""
+    transaction.on_commit(lambda: get_store().remove(GLOBAL_LEADERBOARD, [profile_id]))
+
+
+def delete_group_leaderboard(group_id):
+    """Delete the leaderboard of a group, once the current transaction is committed."""
+    transaction.on_commit(lambda: get_store().delete(get_group_leaderboard_name(group_id)))
@@ -1,15 +1,27 @@
 """Custom loader for loading programming questions."""
 
-from os.path import join
+import hashlib
+from collections import defaultdict
+from os.path import exists, join
+import yaml
+from django.conf import settings
 from django.db import transaction
-from django.core.exceptions import ObjectDoesNotExist
 from utils.TranslatableModelLoader import TranslatableModelLoader
 from utils.errors.InvalidYAMLValueError import InvalidYAMLValueError
 from utils.errors.MissingRequiredFieldError import MissingRequiredFieldError
 from utils.errors.KeyNotFoundError import KeyNotFoundError
 
 from utils.language_utils import get_available_languages
+from programming.content_manifest import (
+    get_directory_files,
+    get_manifest,
+    hash_files,
+    remove_from_manifest,
+    update_manifest,
+)
+from programming.question_index import invalidate_question_index
 from programming.models import (
+    Question,
     QuestionTypeProgram,
     QuestionTypeProgramTestCase,
     QuestionTypeFunction,
@@ -50,7 +62,21 @@ TEST_CASE_FILE_TEMPLATE = 'test-case-{id}-{type}.txt'
 
 
 class QuestionsLoader(TranslatableModelLoader):
-    """Custom loader for loading questions."""
+    """Custom loader for loading questions.
+
+    Questions that have not changed since they were last loaded, according to the content manifest, are skipped.
+    """
+
+    def __init__(self, *args, full=False, **kwargs):
+        """Create a QuestionsLoader object, taking the same arguments as BaseLoader.
+
+        Args:
+            full (bool): Load every question, even those that have not changed since they were last loaded.
+        """
+        super().__init__(*args, **kwargs)
+        self.full = full
+        self.counts = None
+        self.loaded_slugs = []
 
     @transaction.atomic
     def load(self):
@@ -61,6 +87,11 @@ class QuestionsLoader(TranslatableModelLoader):
                 attribute.
         """
         questions_structure = self.load_yaml_file(self.structure_file_path)
+        manifest = get_manifest()
+        existing_slugs = set(Question.objects.values_list('slug', flat=True))
+        new_hashes = dict()
+        questions_to_load = []
+        counts = {'added': 0, 'changed': 0, 'unchanged': 0, 'deleted': 0}
 
         for (question_slug, question_data) in questions_structure.items():
             if 'type' in question_data:
@@ -104,211 +135,388 @@ class QuestionsLoader(TranslatableModelLoader):
                     'Question'
                 )
 
-            question_translations = self.get_blank_translation_dictionary()
-
-            # Read title and question text
-            content_filename = join(question_slug, 'question.md')
-            content_translations = self.get_markdown_translations(content_filename)
-            for language, content in content_translations.items():
-                question_translations[language]['title'] = content.title
-                question_translations[language]['question_text'] = content.html_string
-
-            # Read solution
-            solution_filename = join(question_slug, 'solution.py')
+            key = 'question:{}'.format(question_slug)
+            slugs = ['{}-{}'.format(question_slug, question_type) for question_type in question_types]
+            new_hashes[key] = self.get_question_hash(question_slug, question_data)
+            if not self.full and manifest.get(key) == new_hashes[key] and existing_slugs.issuperset(slugs):
+                counts['unchanged'] += len(slugs)
+                continue
+            questions_to_load.append((question_slug, question_data, question_types, question_test_cases))
+            counts['added'] += len(set(slugs) - existing_slugs)
+            counts['changed'] += len(existing_slugs.intersection(slugs))
+
+        # Convert the Markdown of all questions to load at once, so it can be done across processes
+        md_file_paths = []
+        for question_slug, *_ in questions_to_load:
             for language in get_available_languages():
-                solution = open(self.get_localised_file(language, solution_filename), encoding='UTF-8').read()
-                question_translations[language]['solution'] = solution
-                if question_type == QuestionTypeParsons.QUESTION_TYPE:
-                    lines = clean_parsons_lines(solution.split('\n'))
-                    extra_lines = question_data.get('parsons-extra-lines', [])
-                    lines += clean_parsons_lines(extra_lines)
-                    lines_as_text = '\n'.join(lines)
-                    question_translations[language]['lines'] = lines_as_text
-
-            # If debugging question, get initial code,
-            if QuestionTypeDebugging.QUESTION_TYPE in question_types:
-                initial_code_filename = join(question_slug, 'initial.py')
-                for language in get_available_languages():
-                    initial_code = open(self.get_localised_file(
-                        language, initial_code_filename), encoding='UTF-8').read()
-                    question_translations[language]['initial_code'] = initial_code
-
-            if "difficulty" in question_data:
-                difficulty_slug = question_data['difficulty']
-                try:
-                    difficulty_level = DifficultyLevel.objects.get(
-                        slug=difficulty_slug
-                    )
-                except ObjectDoesNotExist:
-                    raise KeyNotFoundError(
-                        self.structure_file_path,
-                        difficulty_slug,
-                        "Difficulty Level"
-                    )
+                md_file_path = self.get_localised_file(language, join(question_slug, 'question.md'))
+                if exists(md_file_path):
+                    md_file_paths.append(md_file_path)
+        self.convert_md_files(md_file_paths, self.structure_file_path)
+        self.load_questions(questions_to_load)
+
+        slugs = []
+        for slug, data in questions_structure.items():
+            if "types" in data:
+                slugs.extend(["{}-{}".format(slug, t) for t in data["types"]])
             else:
-                difficulty_level = None
+                slugs.append("{}-{}".format(slug, data["type"]))
+        for question_type in VALID_QUESTION_TYPES.values():
+            question_class = question_type['question_class']
 
-            for question_type in question_types:
-                slug = '{}-{}'.format(question_slug, question_type)
-                question_class = VALID_QUESTION_TYPES[question_type]['question_class']
-                defaults = dict()
-                required_fields = ['title', 'question_text']
+            _, deleted = question_class.objects.exclude(slug__in=slugs).delete()
+            if deleted and question_class._meta.label in deleted:
+                if (number_deleted := deleted[question_class._meta.label]) > 0:
+                    self.log('Deleted {} question(s)'.format(number_deleted))
+                    counts['deleted'] += number_deleted
+
+        if questions_to_load or counts['deleted']:
+            # Questions are written in bulk, which does not send the signals that invalidate the index
+            invalidate_question_index()
+
+        remove_from_manifest([
+            key for key in manifest if key.startswith('question:') and key not in new_hashes
+        ])
+        update_manifest({key: content_hash for key, content_hash in new_hashes.items()
+                         if manifest.get(key) != content_hash})
+        self.counts = counts
+        self.log('{added} added, {changed} changed, {unchanged} unchanged, {deleted} deleted question(s)'.format(
+            **counts
+        ))
+        self.log("All questions loaded!\n")
 
-                if question_class == QuestionTypeParsons:
-                    required_fields += ['lines']
-                elif question_class == QuestionTypeDebugging:
-                    required_fields += ['initial_code']
-                    defaults['read_only_lines_top'] = int(question_data.get('number_of_read_only_lines_top', 0))
-                    defaults['read_only_lines_bottom'] = int(question_data.get('number_of_read_only_lines_bottom', 0))
+    def load_questions(self, questions):
+        """Load the given questions, writing all of them with a query for each table where possible.
 
-                defaults['difficulty_level'] = difficulty_level
+        Questions and test cases use multi-table inheritance, so cannot be created in bulk. New questions and
+        test cases are saved one at a time, while existing ones are updated in bulk.
 
-                defaults['question_type'] = question_type.title()
+        Args:
+            questions (list): List of tuples of the arguments of read_question.
 
-                question, created = question_class.objects.update_or_create(
-                    slug=slug,
-                    defaults=defaults,
-                )
+        Raise:
+            KeyNotFoundError: when a difficulty, concept or context of a question does not exist.
+            InvalidYAMLValueError: when a concept or context of a question is a parent, or test case numbers
+                are not sequential.
+        """
+        if not questions:
+            return
+        self.preload_reference_data()
+        records = []
+        for question in questions:
+            records.extend(self.read_question(*question))
+
+        concept_rows = []
+        context_rows = []
+        test_case_records = defaultdict(list)
+        for question_class, class_records in group_by_class(records, 'question_class').items():
+            slugs = [record['slug'] for record in class_records]
+            existing = question_class.objects.filter(slug__in=slugs).in_bulk(field_name='slug')
+            questions_to_update = []
+            for record in class_records:
+                question = existing.get(record['slug'])
+                created = question is None
+                if created:
+                    question = question_class(slug=record['slug'])
+                for field, value in record['fields'].items():
+                    setattr(question, field, value)
+                self.populate_translations(question, record['translations'])
+                self.mark_translation_availability(question, required_fields=record['required_fields'])
+                if created:
+                    question.save()
+                else:
+                    questions_to_update.append(question)
+                record['question'] = question
+                self.loaded_slugs.append(question.slug)
 
-                self.populate_translations(question, question_translations)
-                self.mark_translation_availability(question, required_fields=required_fields)
-                question.save()
-
-                # Add programming concepts
-                concept_slugs = question_data.get("concepts", [])
-                concept_slugs_to_add = set()
-                for concept_slug in concept_slugs:
-                    try:
-                        concept = ProgrammingConcepts.objects.get(slug=concept_slug)
-                        if concept.children.exists():
-                            raise InvalidYAMLValueError(
-                                self.structure_file_path,
-                                "concepts - value '{}' - added concept is invalid due to being a parent"
-                                    .format(slug),
-                            )
-                        concept_slugs_to_add.add(concept_slug)
-                        if concept.parent is not None and concept.parent not in concept_slugs:
-                            concept_slugs_to_add.add(concept.parent.slug)
-                    except ObjectDoesNotExist:
-                        raise KeyNotFoundError(
-                            self.structure_file_path,
-                            concept_slug,
-                            "Concepts"
-                        )
-                for concept_slug in concept_slugs_to_add:
-                    concept = ProgrammingConcepts.objects.get(slug=concept_slug)
-                    question.concepts.add(concept)
-
-                # Add question contexts
-                context_slugs = question_data.get("contexts", [])
-                context_slugs_to_add = set()
-                for context_slug in context_slugs:
-                    try:
-                        context = QuestionContexts.objects.get(slug=context_slug)
-                        if context.children.exists():
-                            raise InvalidYAMLValueError(
-                                self.structure_file_path,
-                                "contexts - value '{}' - added context is invalid due to being a parent"
-                                    .format(slug),
-                            )
-                        context_slugs_to_add.add(context_slug)
-                        if context.parent is not None and context.parent not in context_slugs:
-                            context_slugs_to_add.add(context.parent.slug)
-                    except ObjectDoesNotExist:
-                        raise KeyNotFoundError(
-                            self.structure_file_path,
-                            context_slug,
-                            "Contexts"
-                        )
-                for context_slug in context_slugs_to_add:
-                    context = QuestionContexts.objects.get(slug=context_slug)
-                    question.contexts.add(context)
-
-                test_case_class = VALID_QUESTION_TYPES[question_type]['test_case_class']
-                current_number = 1
-                for (test_case_id, test_case_type) in question_test_cases.items():
-                    print(current_number, test_case_id)
-                    if test_case_id != current_number:
-                        raise InvalidYAMLValueError(
-                            self.structure_file_path,
-                            "test_case_number {}".format(test_case_id),
-                            "Test case numbers must be sequential"
-                        )
-                    current_number += 1
+                concept_rows.extend(
+                    Question.concepts.through(question_id=question.pk, programmingconcepts_id=concept_id)
+                    for concept_id in record['concept_ids']
+                )
+                context_rows.extend(
+                    Question.contexts.through(question_id=question.pk, questioncontexts_id=context_id)
+                    for context_id in record['context_ids']
+                )
+                for test_case_record in record['test_cases']:
+                    test_case_record['question'] = question
+                    test_case_records[record['test_case_class']].append(test_case_record)
+                self.log('{} {} question: {}'.format(
+                    'Added' if created else 'Updated',
+                    question_class.QUESTION_TYPE,
+                    question.title,
+                ))
+            if questions_to_update:
+                question_class.objects.bulk_update(
+                    questions_to_update,
+                    get_updated_fields(question_class, class_records),
+                )
 
-                    test_case_translations = self.get_blank_translation_dictionary()
+        # Concepts and contexts are only added, as before
+        Question.concepts.through.objects.bulk_create(concept_rows, ignore_conflicts=True)
+        Question.contexts.through.objects.bulk_create(context_rows, ignore_conflicts=True)
 
-                    if question_class == QuestionTypeProgram:
-                        test_case_input_filename = join(
-                            question_slug,
-                            TEST_CASE_FILE_TEMPLATE.format(id=test_case_id, type='input')
-                        )
-                        for language in get_available_languages():
-                            test_case_input = open(self.get_localised_file(
-                                language, test_case_input_filename), encoding='UTF-8').read()
-                            test_case_translations[language]['test_input'] = test_case_input
-                    elif question_class in (QuestionTypeFunction, QuestionTypeParsons, QuestionTypeDebugging):
-                        test_case_code_filename = join(
-                            question_slug,
-                            TEST_CASE_FILE_TEMPLATE.format(id=test_case_id, type='code')
-                        )
-                        for language in get_available_languages():
-                            test_case_code = open(self.get_localised_file(
-                                language, test_case_code_filename), encoding='UTF-8').read()
-                            test_case_translations[language]['test_code'] = test_case_code
-
-                    test_case_output_filename = join(
-                        question_slug,
-                        TEST_CASE_FILE_TEMPLATE.format(id=test_case_id, type='output')
-                    )
-                    for language in get_available_languages():
-                        test_case_output = open(self.get_localised_file(
-                            language, test_case_output_filename), encoding='UTF-8').read()
-                        test_case_translations[language]['expected_output'] = test_case_output
-
-                    # Create test case
-                    test_case, created = test_case_class.objects.update_or_create(
-                        question=question,
-                        number=test_case_id,
-                        type=test_case_type,
-                        defaults={},
+        for test_case_class, class_records in test_case_records.items():
+            existing = {
+                (test_case.question_id, test_case.number, test_case.type): test_case
+                for test_case in test_case_class.objects.filter(
+                    question__in=[record['question'] for record in class_records]
+                )
+            }
+            test_cases_to_update = []
+            for record in class_records:
+                key = (record['question'].pk, record['number'], record['type'])
+                test_case = existing.get(key)
+                created = test_case is None
+                if created:
+                    test_case = test_case_class(
+                        question=record['question'],
+                        number=record['number'],
+                        type=record['type'],
                     )
-
-                    if test_case_class == QuestionTypeProgramTestCase:
-                        required_fields = ['test_input', 'expected_output']
-                    elif test_case_class in (
-                        QuestionTypeFunctionTestCase,
-                        QuestionTypeParsonsTestCase,
-                        QuestionTypeDebuggingTestCase,
-                    ):
-                        required_fields = ['test_code', 'expected_output']
-
-                    self.populate_translations(test_case, test_case_translations)
-                    self.mark_translation_availability(test_case, required_fields=required_fields)
-                    test_case.save()
-
+                self.populate_translations(test_case, record['translations'])
+                self.mark_translation_availability(test_case, required_fields=record['required_fields'])
                 if created:
-                    verb_text = 'Added'
+                    test_case.save()
                 else:
-                    verb_text = 'Updated'
+                    test_cases_to_update.append(test_case)
+            if test_cases_to_update:
+                test_case_class.objects.bulk_update(
+                    test_cases_to_update,
+                    get_updated_fields(test_case_class, class_records),
+                )
 
-                self.log('{} {} question: {}'.format(verb_text, question_type, question.title))
+    def preload_reference_data(self):
+        """Read all difficulty levels, programming concepts and question contexts, keyed by slug."""
+        self.difficulty_levels = {difficulty.slug: difficulty for difficulty in DifficultyLevel.objects.all()}
+        self.concepts = {concept.slug: concept for concept in ProgrammingConcepts.objects.select_related('parent')}
+        self.parent_concept_ids = {concept.parent_id for concept in self.concepts.values()}
+        self.contexts = {context.slug: context for context in QuestionContexts.objects.select_related('parent')}
+        self.parent_context_ids = {context.parent_id for context in self.contexts.values()}
 
-        slugs = []
-        for slug, data in questions_structure.items():
-            if "types" in data:
-                slugs.extend(["{}-{}".format(slug, t) for t in data["types"]])
+    def get_tag_ids(self, slugs, tags, parent_ids, name, field):
+        """Return the primary keys of the given concepts or contexts, and of their parents.
+
+        Args:
+            slugs (list): Slugs of the concepts or contexts of a question.
+            tags (dict): All concepts or contexts, keyed by slug.
+            parent_ids (set): Primary keys of concepts or contexts that have children.
+            name (str): Name of the tags for errors, e.g. "Concepts".
+            field (str): Name of the field in the structure file.
+
+        Returns:
+            Set of primary keys.
+
+        Raise:
+            KeyNotFoundError: when a concept or context does not exist.
+            InvalidYAMLValueError: when a concept or context has children.
+        """
+        tag_ids = set()
+        for slug in slugs:
+            tag = tags.get(slug)
+            if tag is None:
+                raise KeyNotFoundError(self.structure_file_path, slug, name)
+            if tag.pk in parent_ids:
+                raise InvalidYAMLValueError(
+                    self.structure_file_path,
+                    "{} - value '{}'".format(field, slug),
+                    "A value without children, as parents are added automatically",
+                )
+            tag_ids.add(tag.pk)
+            if tag.parent_id is not None:
+                tag_ids.add(tag.parent_id)
+        return tag_ids
+
+    def read_question(self, question_slug, question_data, question_types, question_test_cases):
+        """Read a question from its directory, as one question of each of the given types.
+
+        Args:
+            question_slug (str): Slug of the question, and name of its directory.
+            question_data (dict): Data of the question from the structure file.
+            question_types (list): Types of the question.
+            question_test_cases (dict): Dictionary of test case number to type.
+
+        Returns:
+            List of dictionaries of the values to load for each type of the question, with its test cases.
+        """
+        question_translations = self.get_blank_translation_dictionary()
+
+        # Read title and question text
+        content_filename = join(question_slug, 'question.md')
+        content_translations = self.get_markdown_translations(content_filename)
+        for language, content in content_translations.items():
+            question_translations[language]['title'] = content.title
+            question_translations[language]['question_text'] = content.html_string
+
+        # Read solution
+        solution_filename = join(question_slug, 'solution.py')
+        for language in get_available_languages():
+            solution = open(self.get_localised_file(language, solution_filename), encoding='UTF-8').read()
+            question_translations[language]['solution'] = solution
+            if QuestionTypeParsons.QUESTION_TYPE in question_types:
+                lines = clean_parsons_lines(solution.split('\n'))
+                extra_lines = question_data.get('parsons-extra-lines', [])
+                lines += clean_parsons_lines(extra_lines)
+                lines_as_text = '\n'.join(lines)
+                question_translations[language]['lines'] = lines_as_text
+
+        # If debugging question, get initial code,
+        if QuestionTypeDebugging.QUESTION_TYPE in question_types:
+            initial_code_filename = join(question_slug, 'initial.py')
+            for language in get_available_languages():
+                initial_code = open(self.get_localised_file(
+                    language, initial_code_filename), encoding='UTF-8').read()
+                question_translations[language]['initial_code'] = initial_code
+
+        if "difficulty" in question_data:
+            difficulty_slug = question_data['difficulty']
+            try:
+                difficulty_level = self.difficulty_levels[difficulty_slug]
+            except KeyError:
+                raise KeyNotFoundError(
+                    self.structure_file_path,
+                    difficulty_slug,
+                    "Difficulty Level"
+                )
+        else:
+            difficulty_level = None
+
+        concept_ids = self.get_tag_ids(
+            question_data.get("concepts", []), self.concepts, self.parent_concept_ids, "Concepts", "concepts",
+        )
+        context_ids = self.get_tag_ids(
+            question_data.get("contexts", []), self.contexts, self.parent_context_ids, "Contexts", "contexts",
+        )
+
+        records = []
+        for question_type in question_types:
+            question_class = VALID_QUESTION_TYPES[question_type]['question_class']
+            fields = dict()
+            required_fields = ['title', 'question_text']
+
+            if question_class == QuestionTypeParsons:
+                required_fields += ['lines']
+            elif question_class == QuestionTypeDebugging:
+                required_fields += ['initial_code']
+                fields['read_only_lines_top'] = int(question_data.get('number_of_read_only_lines_top', 0))
+                fields['read_only_lines_bottom'] = int(question_data.get('number_of_read_only_lines_bottom', 0))
+
+            fields['difficulty_level'] = difficulty_level
+            fields['question_type'] = question_type.title()
+
+            test_case_class = VALID_QUESTION_TYPES[question_type]['test_case_class']
+            records.append({
+                'question_class': question_class,
+                'slug': '{}-{}'.format(question_slug, question_type),
+                'fields': fields,
+                'translations': question_translations,
+                'required_fields': required_fields,
+                'concept_ids': concept_ids,
+                'context_ids': context_ids,
+                'test_case_class': test_case_class,
+                'test_cases': self.read_test_cases(question_slug, question_class, question_test_cases),
+            })
+        return records
+
+    def read_test_cases(self, question_slug, question_class, question_test_cases):
+        """Read the test cases of a question of the given class.
+
+        Args:
+            question_slug (str): Slug of the question, and name of its directory.
+            question_class (class): Class of the question.
+            question_test_cases (dict): Dictionary of test case number to type.
+
+        Returns:
+            List of dictionaries of the values to load for each test case.
+
+        Raise:
+            InvalidYAMLValueError: when test case numbers are not sequential.
+        """
+        test_cases = []
+        current_number = 1
+        for (test_case_id, test_case_type) in question_test_cases.items():
+            if test_case_id != current_number:
+                raise InvalidYAMLValueError(
+                    self.structure_file_path,
+                    "test_case_number {}".format(test_case_id),
+                    "Test case numbers must be sequential"
+                )
+            current_number += 1
+
+            test_case_translations = self.get_blank_translation_dictionary()
+
+            if question_class == QuestionTypeProgram:
+                test_case_input_filename = join(
+                    question_slug,
+                    TEST_CASE_FILE_TEMPLATE.format(id=test_case_id, type='input')
+                )
+                for language in get_available_languages():
+                    test_case_input = open(self.get_localised_file(
+                        language, test_case_input_filename), encoding='UTF-8').read()
+                    test_case_translations[language]['test_input'] = test_case_input
+                required_fields = ['test_input', 'expected_output']
             else:
-                slugs.append("{}-{}".format(slug, data["type"]))
-        for question_type in VALID_QUESTION_TYPES.values():
-            question_class = question_type['question_class']
+                test_case_code_filename = join(
+                    question_slug,
+                    TEST_CASE_FILE_TEMPLATE.format(id=test_case_id, type='code')
+                )
+                for language in get_available_languages():
+                    test_case_code = open(self.get_localised_file(
+                        language, test_case_code_filename), encoding='UTF-8').read()
+                    test_case_translations[language]['test_code'] = test_case_code
+                required_fields = ['test_code', 'expected_output']
+
+            test_case_output_filename = join(
+                question_slug,
+                TEST_CASE_FILE_TEMPLATE.format(id=test_case_id, type='output')
+            )
+            for language in get_available_languages():
+                test_case_output = open(self.get_localised_file(
+                    language, test_case_output_filename), encoding='UTF-8').read()
+                test_case_translations[language]['expected_output'] = test_case_output
+
+            test_cases.append({
+                'number': test_case_id,
+                'type': test_case_type,
+                'translations': test_case_translations,
+                'required_fields': required_fields,
+            })
+        return test_cases
+
+    def get_question_hash(self, question_slug, question_data):
+        """Return a hash of everything a question is loaded from.
+
+        The hash covers the question's data in the structure file, the files in its directory for each language,
+        and the templates its Markdown is converted with.
+        """
+        paths = []
+        for language in get_available_languages():
+            paths.extend(get_directory_files(self.get_localised_file(language, question_slug)))
+        paths.extend(get_directory_files(settings.CUSTOM_VERTO_TEMPLATES))
+        content_hash = hashlib.sha256(yaml.dump(question_data, sort_keys=True).encode('utf-8'))
+        content_hash.update(hash_files(paths, self.base_path).encode('utf-8'))
+        return content_hash.hexdigest()
 
-            _, deleted = question_class.objects.exclude(slug__in=slugs).delete()
-            if deleted and question_class._meta.label in deleted:
-                if (number_deleted := deleted[question_class._meta.label]) > 0:
-                    self.log('Deleted {} question(s)'.format(number_deleted))
 
-        self.log("All questions loaded!\n")
+def group_by_class(records, key):
+    """Return a dictionary of the class in each record under the given key, to the list of its records."""
+    groups = defaultdict(list)
+    for record in records:
+        groups[record[key]].append(record)
+    return groups
+
+
+def get_updated_fields(model_class, records):
+    """Return the names of the fields of the model class that are set by the given records, and its languages.
+
+    Translations of questions of several types are shared, so may include fields the model class does not have.
+    """
+    field_names = {field.name for field in model_class._meta.concrete_fields}
+    updated_fields = {'languages'}
+    for record in records:
+        updated_fields.update(record.get('fields', dict()))
+        for values in record['translations'].values():
+            updated_fields.update(values)
+    return sorted(updated_fields & field_names)
 
 
 def clean_parsons_lines(code_lines):
@@ -1,7 +1,11 @@
 """Module for the custom Django backdate_points_and_achievements command."""
 
 from django.core.management.base import BaseCommand
-from programming.codewof_utils import backdate_points_and_achievements
+from programming.codewof_utils import (
+    backdate_points_and_achievements,
+    backdate_points_and_achievements_in_bulk,
+    BACKDATE_CHUNK_SIZE,
+)
 
 
 class Command(BaseCommand):
@@ -21,6 +25,16 @@ class Command(BaseCommand):
             default=250,
             help='number of profiles to backdate',
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='backdate profiles in chunks using bulk queries',
+        )
+        parser.add_argument(
+            '--chunk_size',
+            default=BACKDATE_CHUNK_SIZE,
+            help='number of profiles to backdate per chunk in bulk mode',
+        )
 
     def handle(self, *args, **options):
         """Automatically called when the backdate command is given."""
@@ -29,4 +43,7 @@ class Command(BaseCommand):
         number = int(options['profiles'])
         if ignore_flags and number > 0:
             raise ValueError("If ignoring backdate flags you must backdate all profiles.")
-        backdate_points_and_achievements(number, ignore_flags)
+        if options['bulk']:
+            backdate_points_and_achievements_in_bulk(number, ignore_flags, int(options['chunk_size']))
+        else:
+            backdate_points_and_achievements(number, ignore_flags)
@@ -0,0 +1,79 @@
+"""Module for the custom Django benchmark_markdown_conversion command."""
+
+import glob
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.translation import to_locale
+from utils.BaseLoader import convert_md_file, get_converter, get_template_files
+from utils.LoaderFactory import LoaderFactory
+from utils.language_utils import get_available_languages
+
+
+class Command(BaseCommand):
+    """Required command class for the custom Django benchmark_markdown_conversion command."""
+
+    help = 'Measure the time to convert the Markdown of every question, with and without reusing converters'
+
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            '--processes',
+            default=os.cpu_count(),
+            help='number of processes to convert files across',
+        )
+
+    def handle(self, *args, **options):
+        """Automatically called when the benchmark_markdown_conversion command is given."""
+        processes = int(options['processes'])
+        base_path = settings.QUESTIONS_BASE_PATH
+        md_file_paths = []
+        for language in get_available_languages():
+            md_file_paths.extend(sorted(glob.glob(os.path.join(base_path, to_locale(language), '*', 'question.md'))))
+        structure_file_path = os.path.join(base_path, 'structure', 'questions.yaml')
+        self.stdout.write('Converting {} Markdown files'.format(len(md_file_paths)))
+
+        def convert_with_new_converters():
+            # Converters and templates were created for every file before they were cached
+            results = []
+            for md_file_path in md_file_paths:
+                get_template_files.cache_clear()
+                get_converter.cache_clear()
+                results.append(convert_md_file(md_file_path, structure_file_path))
+            return results
+
+        def convert_with_cached_converters():
+            get_template_files.cache_clear()
+            get_converter.cache_clear()
+            return [convert_md_file(md_file_path, structure_file_path) for md_file_path in md_file_paths]
+
+        def convert_across_processes():
+            get_template_files.cache_clear()
+            get_converter.cache_clear()
+            loader = LoaderFactory().create_questions_loader(
+                structure_filename='questions.yaml',
+                base_path=base_path,
+                processes=processes,
+            )
+            return loader.convert_md_files(md_file_paths, structure_file_path)
+
+        expected_html = None
+        for name, convert in [
+            ('New converter for each file', convert_with_new_converters),
+            ('Cached converters', convert_with_cached_converters),
+            ('Cached converters across {} processes'.format(processes), convert_across_processes),
+        ]:
+            start_time = time.perf_counter()
+            results = convert()
+            duration = time.perf_counter() - start_time
+            html = [result.html_string for result in results]
+            if expected_html is None:
+                expected_html = html
+            elif html != expected_html:
+                self.stderr.write('{} gave different HTML'.format(name))
+            self.stdout.write('{}: {:.2f} seconds ({:.1f} ms per file)'.format(
+                name,
+                duration,
+                duration / max(len(md_file_paths), 1) * 1000,
+            ))
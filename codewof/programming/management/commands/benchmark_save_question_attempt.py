@@ -0,0 +1,133 @@
+"""Module for the custom Django benchmark_save_question_attempt command."""
+
+import json
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from programming.models import QuestionTypeFunction, QuestionTypeFunctionTestCase
+from programming.views import save_question_attempt
+from users.models import UserType
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Required command class for the custom Django benchmark_save_question_attempt command."""
+
+    help = 'Measure the latency and number of queries of saving synthetic question attempts'
+
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            '--attempts',
+            default=200,
+            help='number of attempts to save',
+        )
+        parser.add_argument(
+            '--test_cases',
+            default=20,
+            help='number of test cases of the question',
+        )
+        parser.add_argument(
+            '--users',
+            default=10,
+            help='number of users to spread the attempts across',
+        )
+
+    def handle(self, *args, **options):
+        """Automatically called when the benchmark_save_question_attempt command is given.
+
+        All data created is rolled back once the benchmark is finished.
+        """
+        num_attempts = int(options['attempts'])
+        num_test_cases = int(options['test_cases'])
+        num_users = int(options['users'])
+        with transaction.atomic():
+            latencies, query_counts = self.run_benchmark(num_attempts, num_test_cases, num_users)
+            transaction.set_rollback(True)
+
+        latencies.sort()
+        query_counts.sort()
+        self.stdout.write('{} attempts with {} test cases each, across {} users'.format(
+            num_attempts,
+            num_test_cases,
+            num_users,
+        ))
+        self.stdout.write('Latency: p50 {:.1f} ms, p99 {:.1f} ms'.format(
+            percentile(latencies, 0.5) * 1000,
+            percentile(latencies, 0.99) * 1000,
+        ))
+        self.stdout.write('Queries: p50 {}, p99 {}, max {}'.format(
+            percentile(query_counts, 0.5),
+            percentile(query_counts, 0.99),
+            query_counts[-1],
+        ))
+
+    def run_benchmark(self, num_attempts, num_test_cases, num_users):
+        """Create a question and users, and save attempts for them.
+
+        Returns:
+            Tuple of lists of latency in seconds, and number of queries, of each attempt.
+        """
+        user_type, _ = UserType.objects.get_or_create(slug='benchmark', defaults={'name': 'Benchmark'})
+        users = [
+            User.objects.create_user(
+                username='benchmark-{}'.format(i),
+                email='benchmark-{}@example.com'.format(i),
+                first_name='Benchmark',
+                last_name=str(i),
+                password='benchmark',
+                user_type=user_type,
+            ) for i in range(num_users)
+        ]
+        question = QuestionTypeFunction.objects.create(
+            slug='benchmark-question',
+            title='Benchmark',
+            question_text='Double a number',
+            solution='def double(number):\n    return number * 2',
+        )
+        test_cases = [
+            QuestionTypeFunctionTestCase.objects.create(
+                number=i,
+                test_code='print(double({}))'.format(i),
+                expected_output=str(i * 2),
+                question=question,
+            ) for i in range(1, num_test_cases + 1)
+        ]
+
+        factory = RequestFactory()
+        latencies = []
+        query_counts = []
+        for i in range(num_attempts):
+            # Every third attempt passes all test cases
+            passed = i % 3 == 2
+            data = {
+                'question': question.pk,
+                'user_input': '# Attempt {}\ndef double(number):\n    return number * 2'.format(i),
+                'test_cases': {
+                    test_case.pk: {'passed': passed or test_case.number % 2 == 0}
+                    for test_case in test_cases
+                },
+            }
+            request = factory.post(
+                '/ajax/save_question_attempt/',
+                json.dumps(data),
+                content_type='application/json',
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+            # Fetch user each time, as a request would
+            request.user = User.objects.get(pk=users[i % num_users].pk)
+            with CaptureQueriesContext(connection) as context:
+                start_time = time.perf_counter()
+                save_question_attempt(request)
+                latencies.append(time.perf_counter() - start_time)
+            query_counts.append(len(context.captured_queries))
+        return latencies, query_counts
+
+
+def percentile(values, fraction):
+    """Return the value at the given fraction of the sorted values."""
+    return values[min(int(len(values) * fraction), len(values) - 1)]
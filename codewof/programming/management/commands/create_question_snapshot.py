@@ -0,0 +1,28 @@
+"""Module for the custom Django create_question_snapshot command."""
+
+import time
+from django.core.management.base import BaseCommand
+from programming.question_snapshot import create_snapshot
+
+
+class Command(BaseCommand):
+    """Required command class for the custom Django create_question_snapshot command."""
+
+    help = 'Write a snapshot of the loaded question bank, for restoring with the restore_question_snapshot command'
+
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            'path',
+            help='file to write the snapshot to',
+        )
+
+    def handle(self, *args, **options):
+        """Automatically called when the create_question_snapshot command is given."""
+        start_time = time.perf_counter()
+        rows = create_snapshot(options['path'])
+        self.stdout.write('Snapshot of {} rows from {} tables written in {:.2f} seconds.'.format(
+            sum(rows.values()),
+            len(rows),
+            time.perf_counter() - start_time,
+        ))
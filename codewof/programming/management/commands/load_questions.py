@@ -1,36 +1,86 @@
 """Module for the custom Django load_questions command."""
 
+import os
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import transaction
 from utils.LoaderFactory import LoaderFactory
+from utils.language_utils import get_available_languages
+from programming.content_manifest import get_manifest, hash_files, update_manifest
+from programming.question_index import invalidate_question_index
 
 
 class Command(BaseCommand):
     """Required command class for the custom Django load_questions command."""
 
-    help = 'Loads questions into the database'
+    help = 'Loads questions into the database, skipping content that has not changed since it was last loaded'
 
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='load all content, even if it has not changed (for example, after the loaders have changed)',
+        )
+        parser.add_argument(
+            '--processes',
+            default=1,
+            help='number of processes to convert the Markdown of questions across',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='check the solutions of loaded questions pass their test cases, loading nothing if one fails',
+        )
+        parser.add_argument(
+            '--workers',
+            default=os.cpu_count(),
+            help='number of worker processes to verify solutions with',
+        )
+
+    @transaction.atomic
     def handle(self, *args, **options):
         """Automatically called when the load_questions command is given."""
         factory = LoaderFactory()
         base_path = settings.QUESTIONS_BASE_PATH
+        full = options['full']
 
-        factory.difficulty_levels_loader(
-            structure_filename='difficulty-levels.yaml',
-            base_path=base_path
-        ).load()
+        # Questions are linked to difficulty levels, concepts and contexts, so are all loaded again if they change
+        structure_loaders = [
+            (factory.difficulty_levels_loader, 'difficulty-levels.yaml'),
+            (factory.programming_concepts_loader, 'programming-concepts.yaml'),
+            (factory.question_contexts_loader, 'question-contexts.yaml'),
+        ]
+        structure_keys = ['structure:{}'.format(filename) for _, filename in structure_loaders]
+        manifest = get_manifest(structure_keys)
+        changed_hashes = dict()
+        for (create_loader, structure_filename), key in zip(structure_loaders, structure_keys):
+            loader = create_loader(structure_filename=structure_filename, base_path=base_path)
+            content_hash = hash_files(
+                [loader.structure_file_path] + [
+                    loader.get_localised_file(language, structure_filename) for language in get_available_languages()
+                ],
+                base_path,
+            )
+            if full or manifest.get(key) != content_hash:
+                loader.load()
+                changed_hashes[key] = content_hash
+            else:
+                loader.log('{} has not changed, skipping.\n'.format(structure_filename))
+        update_manifest(changed_hashes)
 
-        factory.programming_concepts_loader(
-            structure_filename='programming-concepts.yaml',
-            base_path=base_path
-        ).load()
+        loader = factory.create_questions_loader(
+            structure_filename='questions.yaml',
+            base_path=base_path,
+            full=full or bool(changed_hashes),
+            processes=int(options['processes']),
+        )
+        loader.load()
 
-        factory.question_contexts_loader(
-            structure_filename='question-contexts.yaml',
-            base_path=base_path
-        ).load()
+        if options['verify'] and loader.loaded_slugs:
+            # Raises an error if a solution fails, rolling back the loaded content
+            call_command('verify_questions', *loader.loaded_slugs, workers=options['workers'], stdout=self.stdout)
 
-        factory.create_questions_loader(
-            structure_filename='questions.yaml',
-            base_path=base_path
-        ).load()
+        if full or changed_hashes or loader.counts['added'] or loader.counts['changed'] or loader.counts['deleted']:
+            invalidate_question_index()
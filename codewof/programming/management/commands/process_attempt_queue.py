@@ -0,0 +1,37 @@
+"""Module for the custom Django process_attempt_queue command."""
+
+from django.core.management.base import BaseCommand
+from programming.attempt_queue import ATTEMPT_QUEUE_BATCH_SIZE, process_attempt_queue
+
+
+class Command(BaseCommand):
+    """Required command class for the custom Django process_attempt_queue command."""
+
+    help = 'Save queued attempts in batches, waiting for more attempts until stopped'
+
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            '--batch_size',
+            default=ATTEMPT_QUEUE_BATCH_SIZE,
+            help='maximum number of queued attempts to save in each transaction',
+        )
+        parser.add_argument(
+            '--interval',
+            default=1,
+            help='seconds to wait for more attempts when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='stop once the queue is empty',
+        )
+
+    def handle(self, *args, **options):
+        """Automatically called when the process_attempt_queue command is given."""
+        num_saved = process_attempt_queue(
+            batch_size=int(options['batch_size']),
+            interval=float(options['interval']),
+            once=options['once'],
+        )
+        self.stdout.write('{} queued attempts saved.'.format(num_saved))
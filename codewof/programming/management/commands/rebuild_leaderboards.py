@@ -0,0 +1,20 @@
+"""Module for the custom Django rebuild_leaderboards command."""
+
+from django.core.management.base import BaseCommand
+from programming.leaderboard import rebuild_leaderboard
+from users.models import Group
+
+
+class Command(BaseCommand):
+    """Required command class for the custom Django rebuild_leaderboards command."""
+
+    help = 'Rebuild the global leaderboard and the leaderboard of each group from the points of profiles'
+
+    def handle(self, *args, **options):
+        """Automatically called when the rebuild_leaderboards command is given."""
+        rebuild_leaderboard()
+        num_groups = 0
+        for group in Group.objects.iterator():
+            rebuild_leaderboard(group)
+            num_groups += 1
+        self.stdout.write('Rebuilt global leaderboard and {} group leaderboards.'.format(num_groups))
@@ -0,0 +1,157 @@
+"""Module for the custom Django regrade_attempts command."""
+
+import json
+import os
+import time
+from collections import Counter
+from itertools import islice
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from programming.models import Attempt, Question
+from programming.grader import (
+    SANDBOX_POOL,
+    get_questions_with_test_cases,
+    regrade_attempts,
+)
+from programming.codewof_utils import calculate_profile_stats_in_bulk, save_profile_stats_in_bulk
+from programming.sandbox import SandboxError, SandboxPool
+
+REGRADE_CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    """Required command class for the custom Django regrade_attempts command."""
+
+    help = 'Grade stored attempts again against the current test cases of their questions'
+
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            'questions',
+            nargs='*',
+            help='slugs of questions to regrade attempts of (all questions if none are given)',
+        )
+        parser.add_argument(
+            '--chunk_size',
+            default=REGRADE_CHUNK_SIZE,
+            help='number of attempts to grade and save at a time',
+        )
+        parser.add_argument(
+            '--workers',
+            default=os.cpu_count(),
+            help='number of worker processes to grade attempts with (0 grades from this process, if not isolated)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='file to save progress to after each chunk (unless a dry run), and to resume from if it exists',
+        )
+        parser.add_argument(
+            '--dry_run',
+            action='store_true',
+            help='report changes without saving them',
+        )
+
+    def handle(self, *args, **options):
+        """Automatically called when the regrade_attempts command is given."""
+        slugs = sorted(options['questions'])
+        chunk_size = int(options['chunk_size'])
+        checkpoint_path = options['checkpoint']
+        save = not options['dry_run']
+
+        questions = Question.objects.all()
+        if slugs:
+            questions = questions.filter(slug__in=slugs)
+            missing_slugs = set(slugs) - set(questions.values_list('slug', flat=True))
+            if missing_slugs:
+                raise CommandError('Questions not found: {}'.format(', '.join(sorted(missing_slugs))))
+        questions = get_questions_with_test_cases(questions.values_list('pk', flat=True))
+
+        progress = {
+            'questions': slugs,
+            'last_attempt_pk': 0,
+            'regraded': 0,
+            'now_passed': {},
+            'now_failed': {},
+            'profiles': [],
+        }
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as checkpoint_file:
+                progress = json.load(checkpoint_file)
+            if progress['questions'] != slugs:
+                raise CommandError('Checkpoint {} is for different questions.'.format(checkpoint_path))
+            self.stdout.write('Resuming after attempt {}.'.format(progress['last_attempt_pk']))
+        now_passed = Counter(progress['now_passed'])
+        now_failed = Counter(progress['now_failed'])
+        changed_profile_ids = set(progress['profiles'])
+
+        attempts = (
+            Attempt.objects.filter(question__in=questions.keys(), pk__gt=progress['last_attempt_pk'])
+            .only('pk', 'profile_id', 'question_id', 'datetime', 'user_code', 'passed_tests')
+            .order_by('pk')
+            .iterator(chunk_size=chunk_size)
+        )
+        try:
+            pool = SandboxPool(
+                int(options['workers']),
+                SANDBOX_POOL.limits,
+                settings.PROGRAMMING_GRADER_MAX_JOBS_PER_WORKER,
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        start_time = time.perf_counter()
+        num_regraded = 0
+        try:
+            pool.start()
+            while True:
+                chunk = list(islice(attempts, chunk_size))
+                if not chunk:
+                    break
+                for attempt in regrade_attempts(chunk, questions, pool, save):
+                    slug = questions[attempt.question_id][0].slug
+                    if attempt.passed_tests:
+                        now_passed[slug] += 1
+                    else:
+                        now_failed[slug] += 1
+                    changed_profile_ids.add(attempt.profile_id)
+                num_regraded += len(chunk)
+                progress['last_attempt_pk'] = chunk[-1].pk
+                progress['regraded'] += len(chunk)
+                progress['now_passed'] = now_passed
+                progress['now_failed'] = now_failed
+                progress['profiles'] = sorted(changed_profile_ids)
+                if checkpoint_path and save:
+                    save_checkpoint(checkpoint_path, progress)
+                elapsed_time = time.perf_counter() - start_time
+                self.stdout.write('Regraded {} attempts ({:.1f} attempts/sec).'.format(
+                    progress['regraded'],
+                    num_regraded / elapsed_time,
+                ))
+        except SandboxError as error:
+            raise CommandError(str(error))
+        finally:
+            pool.close()
+
+        # Questions solved by each profile depend on which attempts passed
+        if save and changed_profile_ids:
+            save_profile_stats_in_bulk(calculate_profile_stats_in_bulk(changed_profile_ids))
+
+        for slug in sorted(set(now_passed) | set(now_failed)):
+            self.stdout.write('{}: {} now passed, {} now failed'.format(slug, now_passed[slug], now_failed[slug]))
+        self.stdout.write(
+            '{} attempts regraded ({} now passed, {} now failed){}.'.format(
+                progress['regraded'],
+                sum(now_passed.values()),
+                sum(now_failed.values()),
+                '' if save else ', changes not saved',
+            )
+        )
+        if checkpoint_path and save and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+
+def save_checkpoint(path, progress):
+    """Write progress to the checkpoint file, replacing the previous file only once it is written."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as checkpoint_file:
+        json.dump(progress, checkpoint_file)
+    os.replace(temp_path, path)
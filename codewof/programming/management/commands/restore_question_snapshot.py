@@ -0,0 +1,35 @@
+"""Module for the custom Django restore_question_snapshot command."""
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from programming.question_snapshot import SnapshotError, restore_snapshot
+
+
+class Command(BaseCommand):
+    """Required command class for the custom Django restore_question_snapshot command."""
+
+    help = 'Restore the question bank from a snapshot written by the create_question_snapshot command'
+
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            'path',
+            help='snapshot file to restore',
+        )
+
+    def handle(self, *args, **options):
+        """Automatically called when the restore_question_snapshot command is given.
+
+        Raises:
+            CommandError: If the snapshot cannot be restored.
+        """
+        start_time = time.perf_counter()
+        try:
+            rows = restore_snapshot(options['path'])
+        except SnapshotError as error:
+            raise CommandError(str(error))
+        self.stdout.write('Restored {} rows into {} tables in {:.2f} seconds.'.format(
+            sum(rows.values()),
+            len(rows),
+            time.perf_counter() - start_time,
+        ))
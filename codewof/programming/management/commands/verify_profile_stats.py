@@ -0,0 +1,36 @@
+"""Module for the custom Django verify_profile_stats command."""
+
+from django.core.management.base import BaseCommand
+from programming.models import Profile
+from programming.codewof_utils import verify_profile_stats, rebuild_profile_stats
+
+
+class Command(BaseCommand):
+    """Required command class for the custom Django verify_profile_stats command."""
+
+    help = "Verify stored profile statistics against a full scan of each profile's attempts"
+
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='rebuild statistics that do not match',
+        )
+
+    def handle(self, *args, **options):
+        """Automatically called when the verify_profile_stats command is given."""
+        rebuild = options['rebuild']
+        num_mismatched = 0
+        for profile in Profile.objects.select_related('user').iterator():
+            mismatches = verify_profile_stats(profile)
+            if mismatches:
+                num_mismatched += 1
+                details = ', '.join(
+                    '{} is {} (expected {})'.format(field, stored, expected)
+                    for field, (stored, expected) in mismatches.items()
+                )
+                self.stdout.write('Profile {}: {}'.format(profile.pk, details))
+                if rebuild:
+                    rebuild_profile_stats(profile)
+        self.stdout.write('{} profile(s) with mismatched statistics.'.format(num_mismatched))
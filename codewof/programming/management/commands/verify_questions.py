@@ -0,0 +1,80 @@
+"""Module for the custom Django verify_questions command."""
+
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from programming.models import Question
+from programming.grader import (
+    SANDBOX_POOL,
+    get_output_diff,
+    get_questions_with_test_cases,
+    verify_solutions,
+)
+from programming.sandbox import SandboxError, SandboxPool
+
+
+class Command(BaseCommand):
+    """Required command class for the custom Django verify_questions command."""
+
+    help = 'Check the solution of each question passes its test cases'
+
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            'questions',
+            nargs='*',
+            help='slugs of questions to verify (all questions if none are given)',
+        )
+        parser.add_argument(
+            '--workers',
+            default=os.cpu_count(),
+            help='number of worker processes to run solutions with (0 runs them from this process, if not isolated)',
+        )
+
+    def handle(self, *args, **options):
+        """Automatically called when the verify_questions command is given.
+
+        Raises:
+            CommandError: If a solution does not pass one of its test cases, or could not be run.
+        """
+        slugs = options['questions']
+        questions = Question.objects.all()
+        if slugs:
+            questions = questions.filter(slug__in=slugs)
+            missing_slugs = set(slugs) - set(questions.values_list('slug', flat=True))
+            if missing_slugs:
+                raise CommandError('Questions not found: {}'.format(', '.join(sorted(missing_slugs))))
+        questions = get_questions_with_test_cases(questions.values_list('pk', flat=True))
+
+        try:
+            pool = SandboxPool(
+                int(options['workers']),
+                SANDBOX_POOL.limits,
+                settings.PROGRAMMING_GRADER_MAX_JOBS_PER_WORKER,
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        start_time = time.perf_counter()
+        try:
+            pool.start()
+            failures = verify_solutions(questions, pool)
+        except SandboxError as error:
+            raise CommandError(str(error))
+        finally:
+            pool.close()
+
+        for question, test_case, grade in failures:
+            self.stdout.write('{} failed test case {} ({}):'.format(question.slug, test_case.number, test_case.type))
+            if grade['runtime_error']:
+                self.stdout.write('  Runtime error:')
+            output = get_output_diff(test_case.expected_output, grade['received_output'])
+            for line in output.splitlines():
+                self.stdout.write('  ' + line)
+        self.stdout.write('Verified {} questions with {} test cases in {:.1f} seconds.'.format(
+            len(questions),
+            sum(len(test_cases) for _, test_cases in questions.values()),
+            time.perf_counter() - start_time,
+        ))
+        if failures:
+            raise CommandError('{} test cases failed.'.format(len(failures)))
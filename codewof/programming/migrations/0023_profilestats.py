@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programming', '0022_testcase_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileStats',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='programming.profile')),
+                ('attempts_made', models.PositiveIntegerField(default=0)),
+                ('questions_solved', models.PositiveIntegerField(default=0)),
+                ('current_streak', models.PositiveIntegerField(default=0)),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('last_attempt_date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Profile statistics',
+                'verbose_name_plural': 'Profile statistics',
+            },
+        ),
+    ]
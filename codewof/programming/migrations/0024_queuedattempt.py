@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programming', '0023_profilestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datetime', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user_code', models.TextField()),
+                ('passed_tests', models.BooleanField(default=False)),
+                ('test_cases', models.JSONField(default=dict)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='programming.profile')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='programming.question')),
+            ],
+        ),
+    ]
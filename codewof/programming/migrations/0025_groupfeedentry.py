@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_alter_user_timezone'),
+        ('programming', '0024_queuedattempt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datetime', models.DateTimeField()),
+                ('like_users', models.JSONField(default=list)),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='programming.attempt')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='users.group')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='groupfeedentry',
+            index=models.Index(fields=['group', '-datetime', '-attempt'], name='group_feed_entry_order'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupfeedentry',
+            constraint=models.UniqueConstraint(fields=('group', 'attempt'), name='unique_group_feed_entry'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:56
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programming', '0025_groupfeedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoadedContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('date_loaded', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
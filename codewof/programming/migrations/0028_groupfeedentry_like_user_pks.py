@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:36
+
+from django.db import migrations
+
+
+def delete_feed_entries(apps, schema_editor):
+    """Delete feed entries storing the names of like users, which are created again when each feed is read."""
+    apps.get_model('programming', 'GroupFeedEntry').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programming', '0027_questionbankversion'),
+        ('users', '0012_group_feed_entries_after'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_feed_entries, migrations.RunPython.noop),
+    ]
@@ -10,7 +10,7 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from model_utils.managers import InheritanceManager
 from utils.TranslatableModel import TranslatableModel
-from users.models import Group, Membership
+from users.models import Group
 
 SMALL = 100
 LARGE = 500
@@ -40,14 +40,49 @@ def create_user_profile(sender, instance, created, **kwargs):
     """Create a profile when a user is created."""
     # TODO: This can be replaced by manual creation of profile on demand
     if created:
-        Profile.objects.create(user=instance, points=0)
+        profile = Profile.objects.create(user=instance, points=0)
+        ProfileStats.objects.create(profile=profile)
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Update a profile when a user is updated."""
-    instance.profile.full_clean()
-    instance.profile.save()
+def save_user_profile(sender, instance, created, **kwargs):
+    """Update a profile when a user is updated, if the profile has been loaded with the user.
+
+    Profiles that have not been loaded can't have been changed, so saving users on each login doesn't save them.
+    """
+    if not created and sender.profile.is_cached(instance):
+        instance.profile.full_clean()
+        instance.profile.save()
+
+
+class ProfileStats(models.Model):
+    """Counters summarising the attempt history of a profile.
+
+    These are updated as each attempt is saved, so achievement checks
+    do not need to scan every attempt made by the user.
+    """
+
+    profile = models.OneToOneField(
+        'Profile',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    attempts_made = models.PositiveIntegerField(default=0)
+    questions_solved = models.PositiveIntegerField(default=0)
+    current_streak = models.PositiveIntegerField(default=0)
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_attempt_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        """How the name is displayed in the Admin view."""
+
+        verbose_name = "Profile statistics"
+        verbose_name_plural = "Profile statistics"
+
+    def __str__(self):
+        """Text representation of profile statistics."""
+        return str(self.profile)
 
 
 class Achievement(models.Model):
@@ -127,15 +162,33 @@ class Attempt(models.Model):
         """
         Get the users that have liked the attempt that are also members of a particular group.
 
-        TODO: Look into a way of combining the database queries for efficiency.
-
         :param group_pk: The pk of the group
         :return: A queryset of User objects
         """
-        group = Group.objects.get(pk=group_pk)
-        memberships = Membership.objects.filter(group=group)
-        like_users = User.objects.filter(pk__in=self.like_set.values_list('user', flat=True))
-        return like_users.filter(pk__in=memberships.values('user')).order_by('first_name', 'last_name')
+        return User.objects.filter(
+            like__attempt=self,
+            membership__group_id=group_pk,
+        ).order_by('first_name', 'last_name', 'pk')
+
+    @staticmethod
+    def get_like_users_for_groups(attempts, group_pks):
+        """
+        Get the users that have liked each of the attempts that are also members of each of the groups, in one query.
+
+        :param attempts: The attempts, or their pks
+        :param group_pks: The pks of the groups
+        :return: A dictionary of (group pk, attempt pk) to a list of User objects, ordered by name
+        """
+        like_users = dict()
+        likes = Like.objects.filter(
+            attempt__in=attempts,
+            user__membership__group_id__in=group_pks,
+        ).select_related('user').annotate(
+            group_pk=models.F('user__membership__group_id'),
+        ).order_by('user__first_name', 'user__last_name', 'user_id')
+        for like in likes:
+            like_users.setdefault((like.group_pk, like.attempt_id), []).append(like.user)
+        return like_users
 
 
 class TestCaseAttempt(models.Model):
@@ -146,6 +199,32 @@ class TestCaseAttempt(models.Model):
     passed = models.BooleanField()
 
 
+class QueuedAttempt(models.Model):
+    """An attempt waiting to be saved by the attempt queue consumer.
+
+    Queued attempts are deleted in the same transaction that saves them as
+    attempts, so each is saved exactly once.
+    """
+
+    profile = models.ForeignKey(
+        'Profile',
+        on_delete=models.CASCADE
+    )
+    question = models.ForeignKey(
+        'Question',
+        on_delete=models.CASCADE
+    )
+    datetime = models.DateTimeField(default=timezone.now)
+    user_code = models.TextField()
+    passed_tests = models.BooleanField(default=False)
+    # Dictionary of test case primary key to whether the test case passed
+    test_cases = models.JSONField(default=dict)
+
+    def __str__(self):
+        """Text representation of a queued attempt."""
+        return "Queued attempt of '" + str(self.question) + "' on " + str(self.datetime)
+
+
 class Like(models.Model):
     """A class representing the relationship between a User and an Attempt that they like."""
 
@@ -154,6 +233,36 @@ class Like(models.Model):
     datetime = models.DateTimeField(default=timezone.now)
 
 
+class GroupFeedEntry(models.Model):
+    """An attempt shown in the feed of a group, with the group members that have liked it.
+
+    Entries are written when attempts are passed, liked or unliked, so the feed can be shown
+    without querying the attempts of every member of the group. Groups only have entries for attempts
+    made after their feed_entries_after datetime.
+    """
+
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='feed_entries')
+    attempt = models.ForeignKey(Attempt, on_delete=models.CASCADE, related_name='feed_entries')
+    # Copy of the attempt datetime, for ordering entries
+    datetime = models.DateTimeField()
+    # List of the primary keys of the group members that have liked the attempt
+    like_users = models.JSONField(default=list)
+
+    def __str__(self):
+        """Text representation of a group feed entry."""
+        return "Feed entry of attempt {} in group {}".format(self.attempt_id, self.group_id)
+
+    class Meta:
+        """Meta options for class."""
+
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'attempt'], name='unique_group_feed_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['group', '-datetime', '-attempt'], name='group_feed_entry_order'),
+        ]
+
+
 # ----- Question classification -----------------------------------------------------
 
 class DifficultyLevel(models.Model):
@@ -441,3 +550,32 @@ class QuestionTypeDebuggingTestCase(TestCase):
         """Meta information for class."""
 
         verbose_name = 'Debugging Problem Question Test Case'
+
+
+class LoadedContent(models.Model):
+    """Hash of a content file or directory when it was last loaded by the load_questions command.
+
+    Content with the same hash as when it was last loaded is not loaded again.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    content_hash = models.CharField(max_length=64)
+    date_loaded = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        """Text representation of loaded content."""
+        return self.key
+
+
+class QuestionBankVersion(models.Model):
+    """Version of the question bank, increased each time questions change.
+
+    The version is stored in the database, so every process sees changes made by other processes, such as the
+    load_questions command.
+    """
+
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        """Text representation of the question bank version."""
+        return str(self.version)
@@ -0,0 +1,154 @@
+"""
+In-process index of question features for question recommendations.
+
+The index maps each question's primary key to its difficulty level, and to bitsets of the numbers of its programming
+concepts and question contexts, where bit N is set when the question has a concept (or context) numbered N. Finding
+questions that match any of a set of concepts or contexts is then an intersection of two integers, rather than a walk
+over each question's related objects.
+
+The index is built once per process and rebuilt when the question bank changes. Changes made in this process clear it
+directly, and changes made in other processes (such as the load_questions command) are seen through a version number
+stored in the database. The version is read at most once every VERSION_TIMEOUT seconds, so changes made by other
+processes are seen within that time.
+"""
+
+import threading
+import time
+
+from django.db.models import F
+
+from programming.models import Question, QuestionBankVersion
+
+VERSION_TIMEOUT = 10
+
+_index = None
+_index_lock = threading.Lock()
+# Tuple of the version of the question bank, and the time it was read from the database
+_version = None
+
+
+def numbers_to_bitset(numbers):
+    """Return an integer with a bit set for each of the given (non-negative) numbers."""
+    bitset = 0
+    for number in numbers:
+        bitset |= 1 << number
+    return bitset
+
+
+class QuestionIndex:
+    """Features of every question, stored for fast filtering."""
+
+    def __init__(self, questions, version):
+        """Create the index from the given questions.
+
+        Args:
+            questions (iterable): Question objects with concepts and contexts prefetched.
+            version (int): Version of the question bank the questions were read from.
+        """
+        self.version = version
+        self.questions = dict()
+        self.difficulty_levels = dict()
+        self.concept_numbers = dict()
+        self.context_numbers = dict()
+        self.concept_bitsets = dict()
+        self.context_bitsets = dict()
+        self.pks_by_difficulty = dict()
+        for question in sorted(questions, key=lambda question: question.pk):
+            self.questions[question.pk] = question
+            difficulty_level = question.difficulty_level.level if question.difficulty_level else None
+            self.difficulty_levels[question.pk] = difficulty_level
+            self.concept_numbers[question.pk] = frozenset(concept.number for concept in question.concepts.all())
+            self.context_numbers[question.pk] = frozenset(context.number for context in question.contexts.all())
+            self.concept_bitsets[question.pk] = numbers_to_bitset(self.concept_numbers[question.pk])
+            self.context_bitsets[question.pk] = numbers_to_bitset(self.context_numbers[question.pk])
+            self.pks_by_difficulty.setdefault(difficulty_level, []).append(question.pk)
+
+    def filter(self, pks, difficulty_level, concepts=None, contexts=None):
+        """Return questions from the given primary keys matching the given criteria.
+
+        Args:
+            pks (set): Primary keys of questions to choose from.
+            difficulty_level (int): Level of difficulty the questions must have.
+            concepts (list): Concept numbers, one of which the questions must have. Not filtered if None.
+            contexts (list): Context numbers, one of which the questions must have. Not filtered if None.
+
+        Returns:
+            List of questions, ordered by primary key.
+        """
+        concepts_bitset = None if concepts is None else numbers_to_bitset(concepts)
+        contexts_bitset = None if contexts is None else numbers_to_bitset(contexts)
+        questions = []
+        for pk in self.pks_by_difficulty.get(difficulty_level, []):
+            if pk not in pks:
+                continue
+            if concepts_bitset is not None and not self.concept_bitsets[pk] & concepts_bitset:
+                continue
+            if contexts_bitset is not None and not self.context_bitsets[pk] & contexts_bitset:
+                continue
+            questions.append(self.questions[pk])
+        return questions
+
+    def is_stale(self, version):
+        """Return True if the index was built from a different version of the question bank."""
+        return version != self.version
+
+
+def get_question_bank_version():
+    """Get the current version of the question bank, read from the database at most every VERSION_TIMEOUT seconds."""
+    global _version
+    version = _version
+    if version is None or time.monotonic() - version[1] > VERSION_TIMEOUT:
+        number = QuestionBankVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+        version = _version = (number, time.monotonic())
+    return version[0]
+
+
+def build_question_index():
+    """Build a new index from all questions in the database."""
+    version = get_question_bank_version()
+    questions = (
+        Question.objects.all()
+        .select_subclasses()
+        .select_related('difficulty_level')
+        .prefetch_related(
+            'concepts',
+            'concepts__parent',
+            'contexts',
+            'contexts__parent',
+        )
+    )
+    return QuestionIndex(questions, version)
+
+
+def get_question_index(required_pks=None):
+    """Get the index of questions, building it if it doesn't exist or is stale.
+
+    Args:
+        required_pks (iterable): Primary keys of questions that must be in the index.
+            The index is rebuilt if any are missing, such as questions created in another process.
+    """
+    global _index
+    version = get_question_bank_version()
+    required_pks = set() if required_pks is None else set(required_pks)
+
+    def is_current(index):
+        return index is not None and not index.is_stale(version) and index.questions.keys() >= required_pks
+
+    index = _index
+    if not is_current(index):
+        # Checked again under the lock, so the index is only built once by concurrent threads
+        with _index_lock:
+            if not is_current(_index):
+                _index = build_question_index()
+            index = _index
+    return index
+
+
+def invalidate_question_index():
+    """Clear the index in this process, and mark the indexes of other processes as stale."""
+    global _index, _version
+    if not QuestionBankVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        QuestionBankVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+    with _index_lock:
+        _index = None
+        _version = None
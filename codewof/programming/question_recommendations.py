@@ -14,9 +14,14 @@ different manners.
 import random
 import statistics
 
+from django.conf import settings
+from django.core.cache import caches
 from django.db.models import Q
+from django.utils import timezone
 
+from programming.codewof_utils import get_profile_stats
 from programming.models import DifficultyLevel, ProgrammingConcepts, QuestionContexts, Question
+from programming.question_index import get_question_index, get_question_bank_version
 from programming.skill_and_level_tracking import get_level_and_skill_info
 
 
@@ -37,14 +42,63 @@ def get_recommendation_descriptions():
 
 
 def get_recommended_questions(profile):
-    """Get the recommended questions based on the user's previously answered questions."""
-    level_and_skill_info = get_level_and_skill_info(profile)
-    scores = get_scores(level_and_skill_info)
-    unsolved_questions = get_unsolved_questions(profile)
-    recommended_questions = calculate_recommended_questions(scores, unsolved_questions)
+    """
+    Get the recommended questions based on the user's previously answered questions.
+
+    The candidate questions for each recommendation are cached, while the recommended questions are randomly chosen
+    from the candidates on each call.
+    """
+    recommendations = get_cached_recommendations(profile)
+    index = get_question_index()
+    comfortable_difficulty_questions, comfortable_concepts_contexts_questions = (
+        [index.questions[pk] for pk in candidate_pks if pk in index.questions]
+        for candidate_pks in recommendations['candidates']
+    )
+    recommended_questions = get_random_recommendations(
+        comfortable_difficulty_questions, comfortable_concepts_contexts_questions
+    )
     return recommended_questions
 
 
+def get_recommendations_cache_key(profile):
+    """
+    Get the cache key for the recommendations of the given profile.
+
+    The key is versioned by the number of attempts the user has made and the version of the question bank, so new
+    attempts and changed questions use a new key. The question bank version is stored in the database, so changes
+    made by other processes are seen within programming.question_index.VERSION_TIMEOUT seconds. The date is included
+    as scores depend on the past month.
+    """
+    return 'programming:recommendations:{}:{}:{}:{}'.format(
+        profile.pk,
+        get_profile_stats(profile).attempts_made,
+        get_question_bank_version(),
+        timezone.localdate().isoformat(),
+    )
+
+
+def get_cached_recommendations(profile):
+    """
+    Get the scores and candidate questions for recommendations for the given profile, using the cache if possible.
+
+    Returns a dictionary containing the scores, and the primary keys of candidate questions for each recommendation.
+    """
+    cache = caches[settings.RECOMMENDATIONS_CACHE]
+    key = get_recommendations_cache_key(profile)
+    recommendations = cache.get(key)
+    if recommendations is None:
+        level_and_skill_info = get_level_and_skill_info(profile)
+        scores = get_scores(level_and_skill_info)
+        unsolved_question_pks = get_unsolved_question_pks(profile)
+        candidates = get_recommendation_categories(scores, unsolved_question_pks)
+        recommendations = {
+            'scores': scores,
+            'candidates': tuple([question.pk for question in questions] for questions in candidates),
+        }
+        cache.set(key, recommendations, settings.RECOMMENDATIONS_CACHE_TIMEOUT)
+    return recommendations
+
+
 def get_scores(level_and_skill_info):
     """
     Return a dictionary of scores and numbers from the given tracked information.
@@ -94,26 +148,18 @@ def generate_scores(numbers, info_category):
     return scores
 
 
-def get_unsolved_questions(profile):
-    """Get all questions unsolved by the user."""
-    return (
-        Question.objects.all()
-        .filter(
+def get_unsolved_question_pks(profile):
+    """Get the primary keys of all questions unsolved by the user, as a set."""
+    return set(
+        Question.objects.filter(
             Q(attempt__isnull=True) | (Q(attempt__passed_tests=False, attempt__profile=profile))
         )
-        .distinct('pk')
-        .select_subclasses()
-        .select_related('difficulty_level')
-        .prefetch_related(
-            'concepts',
-            'concepts__parent',
-            'contexts',
-            'contexts__parent',
-        )
+        .values_list('pk', flat=True)
+        .distinct()
     )
 
 
-def calculate_recommended_questions(scores, unsolved_questions):
+def calculate_recommended_questions(scores, unsolved_question_pks):
     """
     Get the recommended questions from calculations based on the provided scores and user.
 
@@ -121,7 +167,7 @@ def calculate_recommended_questions(scores, unsolved_questions):
     recommended questions.
     """
     comfortable_difficulty_questions, comfortable_concepts_contexts_questions = get_recommendation_categories(
-        scores, unsolved_questions
+        scores, unsolved_question_pks
     )
     recommended_questions = get_random_recommendations(
         comfortable_difficulty_questions, comfortable_concepts_contexts_questions
@@ -129,13 +175,13 @@ def calculate_recommended_questions(scores, unsolved_questions):
     return recommended_questions
 
 
-def get_recommendation_categories(scores, unsolved_questions):
+def get_recommendation_categories(scores, unsolved_question_pks):
     """Get the recommendations for all categories (comfortable difficulty, and comfortable concepts/contexts)."""
     comfortable_difficulties = get_comfortable_difficulties(scores['difficulty'])
     uncomfortable_concepts = get_uncomfortable_concepts_or_contexts(scores['concept'])
     uncomfortable_contexts = get_uncomfortable_concepts_or_contexts(scores['context'])
     comfortable_difficulty_recommendations = get_recommendations(
-        unsolved_questions, comfortable_difficulties, uncomfortable_concepts, uncomfortable_contexts
+        unsolved_question_pks, comfortable_difficulties, uncomfortable_concepts, uncomfortable_contexts
     )
     uncomfortable_difficulties = get_uncomfortable_difficulties(
         comfortable_difficulties, scores['difficulty']['numbers']
@@ -143,58 +189,35 @@ def get_recommendation_categories(scores, unsolved_questions):
     comfortable_concepts = list(reversed(uncomfortable_concepts))
     comfortable_contexts = list(reversed(uncomfortable_contexts))
     comfortable_concepts_contexts_recommendations = get_recommendations(
-        unsolved_questions, uncomfortable_difficulties, comfortable_concepts, comfortable_contexts
+        unsolved_question_pks, uncomfortable_difficulties, comfortable_concepts, comfortable_contexts
     )
     return comfortable_difficulty_recommendations, comfortable_concepts_contexts_recommendations
 
 
-def get_recommendations(questions, ordered_difficulties, ordered_concepts, ordered_contexts):
+def get_recommendations(question_pks, ordered_difficulties, ordered_concepts, ordered_contexts):
     """
     Get the question recommendations for the given ordered difficulty, concepts, and contexts.
 
-    Iterates through possible combinations to find valid questions that matches the criteria.
+    Iterates through possible combinations to find valid questions (from the given question primary keys) that
+    matches the criteria, using the question index to match concepts and contexts.
     """
+    index = get_question_index()
     initial_concepts = ordered_concepts[0]
     for difficulty in ordered_difficulties:
-        comfortable_difficulty_questions = questions.filter(difficulty_level__level=difficulty)
         for contexts in ordered_contexts:
-            recommendations = calculate_comfortable_difficulty_questions(
-                comfortable_difficulty_questions, initial_concepts, contexts
-            )
+            recommendations = index.filter(question_pks, difficulty, initial_concepts, contexts)
             if len(recommendations) > 0:
                 return recommendations
         for concepts in ordered_concepts:
-            recommendations = calculate_comfortable_difficulty_questions(
-                comfortable_difficulty_questions, concepts
-            )
+            recommendations = index.filter(question_pks, difficulty, concepts)
             if len(recommendations) > 0:
                 return recommendations
-        recommendations = calculate_comfortable_difficulty_questions(
-            comfortable_difficulty_questions
-        )
+        recommendations = index.filter(question_pks, difficulty)
         if len(recommendations) > 0:
             return recommendations
     return []
 
 
-def calculate_comfortable_difficulty_questions(questions, concepts=None, contexts=None):
-    """Calculate and return the comfortable difficulty, uncomfortable concepts/contexts, question recommendations."""
-    comfortable_difficulty_questions = []
-    for question in questions:
-        filters = []
-        if concepts is not None:
-            question_concepts = [concept.number for concept in question.concepts.all()]
-            filters.append(
-                any(concept in question_concepts for concept in concepts))
-        if contexts is not None:
-            question_contexts = [context.number for context in question.contexts.all()]
-            filters.append(
-                any(context in question_contexts for context in contexts))
-        if all(filters):
-            comfortable_difficulty_questions.append(question)
-    return comfortable_difficulty_questions
-
-
 def get_random_recommendations(comfortable_difficulty_questions, comfortable_concepts_contexts_questions):
     """Get a random (and unique) recommendation with questions from each recommendation category."""
     random_recommendations = []
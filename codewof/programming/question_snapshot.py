@@ -0,0 +1,193 @@
+"""
+Snapshot of the loaded question bank, for restoring it without loading content.
+
+Loading the question bank reads YAML files, converts Markdown and saves each question through the ORM. A snapshot
+instead stores the rows of every question bank table as CSV, written and read with PostgreSQL's COPY command, in one
+compressed file. Restoring a snapshot copies the rows straight back into the tables, so a fresh database can be
+filled in well under a second.
+
+The manifest of loaded content is included, so the load_questions command only loads content that has changed since
+the snapshot was created. Snapshots record the migrations applied when they were created, and can only be restored
+into a database with the same migrations applied.
+"""
+
+import gzip
+import io
+import json
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+from programming.models import (
+    Achievement,
+    DifficultyLevel,
+    LoadedContent,
+    ProgrammingConcepts,
+    Question,
+    QuestionContexts,
+    QuestionTypeDebugging,
+    QuestionTypeDebuggingTestCase,
+    QuestionTypeFunction,
+    QuestionTypeFunctionTestCase,
+    QuestionTypeParsons,
+    QuestionTypeParsonsTestCase,
+    QuestionTypeProgram,
+    QuestionTypeProgramTestCase,
+    TestCase,
+)
+from programming.question_index import invalidate_question_index
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_APPS = ['programming']
+# Models are restored in this order, so rows are restored before the rows referencing them
+SNAPSHOT_MODELS = [
+    DifficultyLevel,
+    ProgrammingConcepts,
+    QuestionContexts,
+    Question,
+    QuestionTypeProgram,
+    QuestionTypeFunction,
+    QuestionTypeParsons,
+    QuestionTypeDebugging,
+    Question.concepts.through,
+    Question.contexts.through,
+    TestCase,
+    QuestionTypeProgramTestCase,
+    QuestionTypeFunctionTestCase,
+    QuestionTypeParsonsTestCase,
+    QuestionTypeDebuggingTestCase,
+    Achievement,
+    LoadedContent,
+]
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot cannot be restored."""
+
+    pass
+
+
+def get_columns(model):
+    """Return the names of the columns of the table of the given model, excluding columns of parent models."""
+    return [field.column for field in model._meta.local_concrete_fields]
+
+
+def get_applied_migrations():
+    """Return the sorted names of the applied migrations of the apps in snapshots."""
+    return sorted(
+        '{}.{}'.format(app, name)
+        for app, name in MigrationRecorder(connection).applied_migrations()
+        if app in SNAPSHOT_APPS
+    )
+
+
+def create_snapshot(path):
+    """Write a snapshot of the question bank to the given file.
+
+    Args:
+        path (str): Path of the file to write.
+
+    Returns:
+        Dictionary of table name to number of rows in the snapshot.
+    """
+    quote_name = connection.ops.quote_name
+    tables = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in SNAPSHOT_MODELS:
+            columns = get_columns(model)
+            data = io.StringIO()
+            cursor.copy_expert(
+                'COPY (SELECT {} FROM {} ORDER BY {}) TO STDOUT WITH (FORMAT csv)'.format(
+                    ', '.join(quote_name(column) for column in columns),
+                    quote_name(model._meta.db_table),
+                    quote_name(model._meta.pk.column),
+                ),
+                data,
+            )
+            tables.append({
+                'table': model._meta.db_table,
+                'columns': columns,
+                'rows': cursor.rowcount,
+                'data': data.getvalue(),
+            })
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'migrations': get_applied_migrations(),
+            'tables': tables,
+        }
+    with gzip.open(path, 'wt', encoding='utf-8') as snapshot_file:
+        json.dump(snapshot, snapshot_file)
+    return {table['table']: table['rows'] for table in tables}
+
+
+def read_snapshot(path):
+    """Read a snapshot from the given file, checking it can be restored into this database.
+
+    Args:
+        path (str): Path of the snapshot file.
+
+    Returns:
+        List of tuples of model and snapshot table, in the order they are restored.
+
+    Raises:
+        SnapshotError: If the snapshot was created by a different version of this module, with different
+            migrations applied, or does not match the current models.
+    """
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as snapshot_file:
+            snapshot = json.load(snapshot_file)
+    except (OSError, ValueError) as error:
+        raise SnapshotError('Snapshot {} could not be read: {}'.format(path, error))
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise SnapshotError('Snapshot version {} is not supported, expected version {}.'.format(
+            snapshot.get('version'),
+            SNAPSHOT_VERSION,
+        ))
+    if snapshot['migrations'] != get_applied_migrations():
+        raise SnapshotError('Snapshot was created with different migrations applied, it must be created again.')
+    tables = {table['table']: table for table in snapshot['tables']}
+    models_and_tables = []
+    for model in SNAPSHOT_MODELS:
+        table = tables.get(model._meta.db_table)
+        if table is None or table['columns'] != get_columns(model):
+            raise SnapshotError('Snapshot table {} does not match its model.'.format(model._meta.db_table))
+        models_and_tables.append((model, table))
+    return models_and_tables
+
+
+@transaction.atomic
+def restore_snapshot(path):
+    """Restore the question bank from a snapshot into empty tables.
+
+    Args:
+        path (str): Path of the snapshot file.
+
+    Returns:
+        Dictionary of table name to number of rows restored.
+
+    Raises:
+        SnapshotError: If the snapshot cannot be restored, or the question bank has already been loaded.
+    """
+    models_and_tables = read_snapshot(path)
+    for model, _ in models_and_tables:
+        # Existing rows could be referenced by attempts, so are never replaced
+        if model._base_manager.exists():
+            raise SnapshotError('Snapshots can only be restored into an empty question bank, {} has rows.'.format(
+                model._meta.db_table
+            ))
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for model, table in models_and_tables:
+            cursor.copy_expert(
+                'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+                    quote_name(table['table']),
+                    ', '.join(quote_name(column) for column in table['columns']),
+                ),
+                io.StringIO(table['data']),
+            )
+        # Rows are copied with their primary keys, so new rows must be numbered after them
+        for sql in connection.ops.sequence_reset_sql(no_style(), SNAPSHOT_MODELS):
+            cursor.execute(sql)
+    invalidate_question_index()
+    return {table['table']: table['rows'] for _, table in models_and_tables}
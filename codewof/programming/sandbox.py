@@ -0,0 +1,539 @@
+"""
+Pool of long-lived worker processes for running user code against test cases.
+
+Workers are started before they are needed and kept running between jobs, so the cost of starting an interpreter is
+only paid once per worker. Workers remove their environment variables when they start, overwriting them in memory, so
+secrets given to the website through its environment cannot be read by user code.
+
+Each test case is run in a child process forked from a worker, so one run cannot affect the next. When isolation is
+enabled, the child first moves into new mount and network namespaces (and a new user namespace, if the website does
+not run as root), so it has no network access. It then changes its root directory to an empty read-only file system
+containing only the Python standard library and system libraries, so the project, /proc and the rest of the file
+system cannot be read or changed, and drops its privileges to the nobody user (or drops its capabilities in a user
+namespace). The child then limits its CPU time, memory, written file size and number of processes with the resource
+module, and closes inherited file descriptors. The worker kills the child if it runs longer than the wall-clock limit.
+
+Isolation requires Linux, and permission to create namespaces (for example, Docker's default seccomp profile blocks
+this). If the child cannot be isolated, the job raises SandboxError rather than running the code. Without isolation,
+code only has resource limits, so must be trusted.
+
+This module does not import Django, so worker processes start without loading the project.
+"""
+
+import builtins
+import collections
+import ctypes
+import io
+import json
+import multiprocessing
+import os
+import pwd
+import resource
+import select
+import signal
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+
+CODE_FILENAME = '<exec>'
+MAX_OUTPUT_LENGTH = 100000
+READ_SIZE = 65536
+LATENCY_SAMPLE_SIZE = 1000
+TIMEOUT_MESSAGE = 'Timeout: Code execution exceeded {} seconds'
+MEMORY_MESSAGE = 'MemoryError: Code execution exceeded the memory limit'
+NO_OUTPUT_MESSAGE = 'Unknown error: No output received from code execution.'
+ISOLATION_MESSAGE = 'Code could not be isolated: {}'
+
+# Isolated code runs as this user, when the worker runs as root
+ISOLATED_USER = 'nobody'
+# Mounted over with the isolated file system in the child's own mount namespace, so the directory is not changed
+ISOLATED_ROOT = '/tmp'
+SYSTEM_LIBRARY_PATHS = ['/lib', '/lib64', '/usr/lib', '/usr/lib64']
+
+# Constants from the Linux headers, for functions not provided by the os module
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_REMOUNT = 0x20
+MS_NOATIME = 0x400
+MS_NODIRATIME = 0x800
+MS_BIND = 0x1000
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+MS_RELATIME = 0x200000
+PR_SET_NO_NEW_PRIVS = 38
+LINUX_CAPABILITY_VERSION_3 = 0x20080522
+
+# Functions of the C library, for system calls not provided by the os module
+LIBC = ctypes.CDLL(None, use_errno=True)
+LIBC.strlen.argtypes = [ctypes.c_void_p]
+
+
+class SandboxError(Exception):
+    """Raised when code cannot be run in the sandbox."""
+
+    pass
+
+
+class SandboxTimeoutError(SandboxError):
+    """Raised when a job is not finished by a worker within the pool's timeout."""
+
+    pass
+
+
+class Limits:
+    """Resource limits for running code."""
+
+    def __init__(self, time_limit, memory_limit, processes_limit=0, files_limit=64, isolate=True):
+        """Create the limits.
+
+        Args:
+            time_limit (int): Seconds of CPU time and wall-clock time for each run.
+            memory_limit (int): Bytes of memory each run can use. Not limited if None.
+            processes_limit (int): Number of extra processes each run can create.
+                Not enforced for processes running as root, which isolated code never does.
+            files_limit (int): Number of file descriptors each run can open.
+            isolate (bool): Whether to isolate each run from the network, file system and other users
+                (see the module documentation). Only disable this for trusted code.
+        """
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.processes_limit = processes_limit
+        self.files_limit = files_limit
+        self.isolate = isolate
+
+
+def set_limit(limit, value):
+    """Set both the soft and hard resource limit, if supported by this platform."""
+    try:
+        resource.setrlimit(limit, (value, value))
+    except (ValueError, OSError):
+        pass
+
+
+def get_memory_size():
+    """Return the size in bytes of the virtual memory of this process, or 0 if it cannot be read."""
+    try:
+        with open('/proc/self/statm') as statm_file:
+            return int(statm_file.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def read_input(prompt=''):
+    """Return the next line of standard input, like input but without writing the prompt.
+
+    Like the browser, an empty string is returned once there is no more input.
+    """
+    return sys.stdin.readline().rstrip('\n')
+
+
+def check_call(result):
+    """Raise an OSError for the current errno if the result of a C library call shows it failed."""
+    if result == -1:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def clear_environment():
+    """Remove the environment variables of this process, overwriting their values in memory."""
+    environ = ctypes.POINTER(ctypes.c_void_p).in_dll(LIBC, 'environ')
+    index = 0
+    while environ[index]:
+        ctypes.memset(environ[index], 0, LIBC.strlen(environ[index]))
+        index += 1
+    # Python keeps its own copy of the environment as bytes objects, which are only referenced by os.environb.
+    # Objects of one byte or less are shared, but are too short to hold secrets.
+    bytes_offset = sys.getsizeof(b'') - 1
+    for value in os.environb.values():
+        if len(value) > 1:
+            ctypes.memset(id(value) + bytes_offset, 0, len(value))
+    os.environ.clear()
+
+
+def get_library_paths():
+    """Return the paths of the Python standard library and system libraries, as available to isolated code."""
+    paths = {sysconfig.get_paths()['stdlib'], sysconfig.get_paths()['platstdlib']}
+    paths.update(path for path in SYSTEM_LIBRARY_PATHS if os.path.exists(path))
+    return sorted(paths)
+
+
+def mount(source, target, filesystem_type, flags, data=None):
+    """Mount a file system, raising an OSError if it fails."""
+    check_call(LIBC.mount(
+        source.encode() if source else None,
+        target.encode(),
+        filesystem_type.encode() if filesystem_type else None,
+        ctypes.c_ulong(flags),
+        data.encode() if data else None,
+    ))
+
+
+def mount_read_only(source, target):
+    """Mount a directory at another path, without allowing it to be changed.
+
+    Flags of the existing mount are kept, as a user namespace cannot remove them.
+    """
+    os.makedirs(target, exist_ok=True)
+    mount(source, target, None, MS_BIND | MS_REC)
+    existing_flags = os.statvfs(source).f_flag
+    flags = MS_RDONLY | MS_NOSUID | MS_NODEV
+    for statvfs_flag, mount_flag in [
+        (os.ST_NOEXEC, MS_NOEXEC),
+        (os.ST_NOATIME, MS_NOATIME),
+        (os.ST_NODIRATIME, MS_NODIRATIME),
+        (os.ST_RELATIME, MS_RELATIME),
+    ]:
+        if existing_flags & statvfs_flag:
+            flags |= mount_flag
+    mount(None, target, None, MS_REMOUNT | MS_BIND | flags)
+
+
+def drop_capabilities():
+    """Drop all capabilities of this process, and stop it from gaining privileges."""
+    class CapabilityHeader(ctypes.Structure):
+        _fields_ = [('version', ctypes.c_uint32), ('pid', ctypes.c_int)]
+
+    class CapabilityData(ctypes.Structure):
+        _fields_ = [('effective', ctypes.c_uint32), ('permitted', ctypes.c_uint32), ('inheritable', ctypes.c_uint32)]
+
+    header = CapabilityHeader(LINUX_CAPABILITY_VERSION_3, 0)
+    check_call(LIBC.capset(ctypes.byref(header), (CapabilityData * 2)()))
+    check_call(LIBC.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0))
+
+
+def isolate():
+    """Isolate this process from the network, file system and other users. Only called in a child process.
+
+    Raises:
+        OSError: If the process could not be isolated.
+    """
+    uid = os.getuid()
+    gid = os.getgid()
+    if uid == 0:
+        user = pwd.getpwnam(ISOLATED_USER)
+        check_call(LIBC.unshare(CLONE_NEWNS | CLONE_NEWNET))
+    else:
+        # Gives this process the capabilities to mount file systems, only within its own namespaces
+        check_call(LIBC.unshare(CLONE_NEWUSER | CLONE_NEWNS | CLONE_NEWNET))
+        for filename, content in [('setgroups', 'deny'), ('uid_map', '{0} {0} 1'), ('gid_map', '{1} {1} 1')]:
+            with open('/proc/self/{}'.format(filename), 'w') as map_file:
+                map_file.write(content.format(uid, gid))
+    # Stop mounts from being seen outside of this process
+    mount(None, '/', None, MS_REC | MS_PRIVATE)
+    library_paths = get_library_paths()
+    site_packages_paths = {sysconfig.get_paths()['purelib'], sysconfig.get_paths()['platlib']}
+    mount('tmpfs', ISOLATED_ROOT, 'tmpfs', MS_NOSUID | MS_NODEV, 'size=64k,mode=0755')
+    for path in library_paths:
+        isolated_path = ISOLATED_ROOT + path
+        if os.path.islink(path):
+            os.makedirs(os.path.dirname(isolated_path), exist_ok=True)
+            os.symlink(os.readlink(path), isolated_path)
+        else:
+            mount_read_only(path, isolated_path)
+    for path in site_packages_paths:
+        # Installed packages (such as Django) are not available, as when running code in the browser
+        if os.path.isdir(ISOLATED_ROOT + path):
+            mount('tmpfs', ISOLATED_ROOT + path, 'tmpfs', MS_RDONLY | MS_NOSUID | MS_NODEV, 'size=4k')
+    mount(None, ISOLATED_ROOT, None, MS_REMOUNT | MS_RDONLY | MS_NOSUID | MS_NODEV)
+    os.chroot(ISOLATED_ROOT)
+    os.chdir('/')
+    if uid == 0:
+        os.setgroups([])
+        os.setgid(user.pw_gid)
+        os.setuid(user.pw_uid)
+    drop_capabilities()
+    sys.path = [path for path in sys.path if path.startswith(tuple(library_paths))]
+
+
+def run_code(code, stdin, limits):
+    """Run code in this process and return its output. Only called in a child process.
+
+    Args:
+        code (str): Python 3 code to run.
+        stdin (str): Text given to the code as standard input.
+        limits (Limits): Resource limits for running the code.
+
+    Returns:
+        Dictionary of output text, and whether a runtime error occured,
+        or of the 'sandbox_error' if the code could not be isolated.
+    """
+    os.environ.clear()
+    # Read before isolating, as /proc is not available afterwards
+    memory_size = get_memory_size()
+    if limits.isolate:
+        try:
+            isolate()
+        except OSError as error:
+            return {'sandbox_error': ISOLATION_MESSAGE.format(error)}
+    set_limit(resource.RLIMIT_CPU, limits.time_limit)
+    if limits.memory_limit:
+        # Memory already used by the forked process is not counted
+        set_limit(resource.RLIMIT_AS, memory_size + limits.memory_limit)
+    set_limit(resource.RLIMIT_FSIZE, 0)
+    set_limit(resource.RLIMIT_NPROC, limits.processes_limit)
+    set_limit(resource.RLIMIT_NOFILE, limits.files_limit)
+
+    output = io.StringIO()
+    sys.stdin = io.StringIO(stdin)
+    sys.stdout = sys.stderr = output
+    # Prompts given to input are not part of the output test cases expect
+    code_builtins = dict(vars(builtins), input=read_input)
+    runtime_error = False
+    try:
+        exec(compile(code, CODE_FILENAME, 'exec'), {'__name__': '__main__', '__builtins__': code_builtins})
+    except MemoryError:
+        output = io.StringIO(MEMORY_MESSAGE)
+        runtime_error = True
+    except BaseException:
+        # Includes SystemExit, to match running the code in the browser
+        error_type, error, error_traceback = sys.exc_info()
+        # Skip this function's frame, so the traceback starts at the user's code
+        output = io.StringIO(''.join(traceback.format_exception(error_type, error, error_traceback.tb_next)))
+        runtime_error = True
+    sys.stdout = sys.__stdout__
+    sys.stderr = sys.__stderr__
+    return {
+        'output': output.getvalue()[:MAX_OUTPUT_LENGTH],
+        'runtime_error': runtime_error,
+    }
+
+
+def run_test(code, stdin, limits):
+    """Run code in a new child process and return its output.
+
+    Args:
+        code (str): Python 3 code to run.
+        stdin (str): Text given to the code as standard input.
+        limits (Limits): Resource limits for running the code.
+
+    Returns:
+        Dictionary of output text, and whether a runtime error occured.
+
+    Raises:
+        SandboxError: If the code could not be isolated.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Child process, which must never return from this function
+        exit_code = 1
+        try:
+            os.close(read_fd)
+            os.closerange(3, write_fd)
+            os.closerange(write_fd + 1, os.sysconf('SC_OPEN_MAX'))
+            result = run_code(code, stdin, limits)
+            with os.fdopen(write_fd, 'w') as result_file:
+                json.dump(result, result_file)
+            exit_code = 0
+        finally:
+            os._exit(exit_code)
+
+    os.close(write_fd)
+    chunks = []
+    timed_out = False
+    deadline = time.monotonic() + limits.time_limit
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            ready, _, _ = select.select([read_fd], [], [], remaining)
+            if ready:
+                data = os.read(read_fd, READ_SIZE)
+                if not data:
+                    break
+                chunks.append(data)
+    finally:
+        os.close(read_fd)
+        if timed_out:
+            os.kill(pid, signal.SIGKILL)
+        _, status = os.waitpid(pid, 0)
+
+    if timed_out or os.WIFSIGNALED(status) and os.WTERMSIG(status) in (signal.SIGXCPU, signal.SIGKILL):
+        return {
+            'output': TIMEOUT_MESSAGE.format(limits.time_limit),
+            'runtime_error': True,
+        }
+    try:
+        result = json.loads(b''.join(chunks).decode('utf-8'))
+    except ValueError:
+        return {
+            'output': NO_OUTPUT_MESSAGE,
+            'runtime_error': True,
+        }
+    if 'sandbox_error' in result:
+        raise SandboxError(result['sandbox_error'])
+    return result
+
+
+def run_tests(tests, limits):
+    """Run each of the given tests in a new child process.
+
+    Args:
+        tests (list): List of dictionaries containing the 'code' to run and the 'stdin' text to give it.
+        limits (Limits): Resource limits for running each test.
+
+    Returns:
+        List of dictionaries of output text and whether a runtime error occured, in the same order as the tests.
+
+    Raises:
+        SandboxError: If the code could not be isolated.
+    """
+    return [run_test(test['code'], test['stdin'], limits) for test in tests]
+
+
+def initialize_worker():
+    """Prepare a worker process for running tests."""
+    clear_environment()
+
+
+class SandboxPool:
+    """Pool of worker processes running tests, with metrics about jobs."""
+
+    def __init__(self, processes, limits, max_jobs_per_worker):
+        """Create the pool, without starting any workers.
+
+        Args:
+            processes (int): Number of worker processes. If 0, tests are run from the calling process,
+                which is only allowed without isolation, as the calling process may hold secrets in memory.
+            limits (Limits): Resource limits for running each test.
+            max_jobs_per_worker (int): Number of jobs a worker runs before it is replaced.
+                If None, workers are never replaced.
+
+        Raises:
+            ValueError: If isolated tests would be run from the calling process.
+        """
+        if limits.isolate and not processes:
+            raise ValueError('Isolated tests must be run in worker processes.')
+        self.processes = processes
+        self.limits = limits
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.queued_jobs = 0
+        self.completed_jobs = 0
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLE_SIZE)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def run(self, tests):
+        """Run the given tests as one job, waiting for the result.
+
+        Args:
+            tests (list): List of dictionaries containing the 'code' to run and the 'stdin' text to give it.
+
+        Returns:
+            List of dictionaries of output text and whether a runtime error occured, in the same order as the tests.
+
+        Raises:
+            SandboxError: If the tests could not be isolated.
+            SandboxTimeoutError: If a worker did not finish the job in time.
+        """
+        return self.run_many([tests])[0]
+
+    def run_many(self, jobs):
+        """Run each of the given lists of tests as a job, waiting for all results.
+
+        Args:
+            jobs (list): List of lists of tests, each as given to run().
+
+        Returns:
+            List of results of each job, in the same order as the jobs.
+
+        Raises:
+            SandboxError: If the tests could not be isolated.
+            SandboxTimeoutError: If a worker did not finish a job in time.
+        """
+        start = time.monotonic()
+        with self._lock:
+            self.queued_jobs += len(jobs)
+        try:
+            if not self.processes:
+                results = []
+                for tests in jobs:
+                    results.append(run_tests(tests, self.limits))
+                    self.record_completed(start)
+                return results
+            pool = self.get_pool()
+            pending = [pool.apply_async(run_tests, (tests, self.limits)) for tests in jobs]
+            # Allow time for every test in the batch, plus one extra run per job
+            timeout = self.limits.time_limit * (sum(len(tests) for tests in jobs) + len(jobs))
+            deadline = start + timeout
+            results = []
+            for job in pending:
+                try:
+                    results.append(job.get(max(deadline - time.monotonic(), 0)))
+                except multiprocessing.TimeoutError:
+                    # The worker may be stuck, so replace all workers
+                    self.close(pool)
+                    raise SandboxTimeoutError('Jobs did not finish within {} seconds.'.format(timeout))
+                self.record_completed(start)
+            return results
+        finally:
+            with self._lock:
+                self.queued_jobs -= len(jobs)
+
+    def record_completed(self, start):
+        """Record a job as completed, with latency from the given start time."""
+        with self._lock:
+            self.completed_jobs += 1
+            self.latencies.append(time.monotonic() - start)
+
+    def statistics(self):
+        """Return a dictionary of the number of queued and completed jobs, and recent job latency in seconds."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+        statistics = {
+            'queued_jobs': self.queued_jobs,
+            'completed_jobs': self.completed_jobs,
+            'latency_p50': None,
+            'latency_p99': None,
+        }
+        if latencies:
+            statistics['latency_p50'] = latencies[int(len(latencies) * 0.5)]
+            statistics['latency_p99'] = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+        return statistics
+
+    def get_pool(self):
+        """Get the pool of workers, starting it if required.
+
+        A pool inherited from a parent process (such as a forked web server worker) is not used,
+        as its workers belong to the parent.
+        """
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                # Workers are spawned, as forking a process with running threads is unsafe
+                context = multiprocessing.get_context('spawn')
+                self._pool = context.Pool(
+                    processes=self.processes,
+                    initializer=initialize_worker,
+                    maxtasksperchild=self.max_jobs_per_worker,
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def start(self):
+        """Start the workers of the pool, so they are ready before the first job."""
+        if self.processes:
+            self.get_pool()
+
+    def close(self, pool=None):
+        """Stop the workers of the pool.
+
+        Args:
+            pool (Pool): Only stop the workers if this is still the current pool. If None, the current pool is stopped.
+        """
+        with self._lock:
+            if self._pool is None or (pool is not None and pool is not self._pool):
+                return
+            if self._pool_pid == os.getpid():
+                self._pool.terminate()
+            self._pool = None
+            self._pool_pid = None
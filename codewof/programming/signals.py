@@ -0,0 +1,117 @@
+"""Signals for the programming application."""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from programming.models import (
+    Attempt,
+    GroupFeedEntry,
+    Like,
+    Profile,
+    ProfileStats,
+    Question,
+    DifficultyLevel,
+    ProgrammingConcepts,
+    QuestionContexts,
+)
+from programming.codewof_utils import update_profile_stats
+from programming.question_index import invalidate_question_index
+from programming.group_feed import (
+    add_member,
+    refresh_like_users,
+    remove_member,
+    update_feeds_for_attempts,
+)
+from programming.leaderboard import (
+    add_group_member,
+    delete_group_leaderboard,
+    remove_group_member,
+    remove_profile,
+    update_leaderboards,
+)
+from users.models import Group, Membership
+
+QUESTION_INDEX_MODELS = [Question, *Question.__subclasses__(), DifficultyLevel, ProgrammingConcepts, QuestionContexts]
+
+
+@receiver(post_save, sender=Attempt)
+def update_stats_for_new_attempt(sender, instance, created, **kwargs):
+    """Update the statistics of the user profile when an attempt is created."""
+    if created:
+        update_profile_stats(instance)
+
+
+@receiver(post_save, sender=Attempt)
+def add_passed_attempt_to_group_feeds(sender, instance, created, **kwargs):
+    """Add a passed attempt to the feeds of the groups of its user."""
+    if created and instance.passed_tests:
+        update_feeds_for_attempts([instance])
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def update_group_feeds_for_like(sender, instance, **kwargs):
+    """Update the like users shown in group feeds when an attempt is liked or unliked."""
+    refresh_like_users(GroupFeedEntry.objects.filter(attempt_id=instance.attempt_id))
+
+
+@receiver(post_delete, sender=Attempt)
+def remove_stats_for_deleted_attempt(sender, instance, **kwargs):
+    """Remove the statistics of the user profile when an attempt is deleted, so they are rebuilt when next used."""
+    ProfileStats.objects.filter(profile_id=instance.profile_id).delete()
+
+
+@receiver(post_save, sender=Profile)
+def update_leaderboards_for_profile(sender, instance, update_fields=None, **kwargs):
+    """Update the leaderboards of the user profile when its points may have changed."""
+    if update_fields is None or 'points' in update_fields:
+        update_leaderboards({instance.pk: instance.points})
+
+
+@receiver(post_delete, sender=Profile)
+def remove_deleted_profile_from_leaderboard(sender, instance, **kwargs):
+    """Remove the user profile from the global leaderboard when it is deleted."""
+    remove_profile(instance.pk)
+
+
+@receiver(post_save, sender=Membership)
+def add_member_to_group(sender, instance, created, **kwargs):
+    """Add the user to the leaderboard and feed of the group when they join it."""
+    if created:
+        add_member(instance)
+        points = Profile.objects.filter(pk=instance.user_id).values_list('points', flat=True).first()
+        if points is not None:
+            add_group_member(instance.group_id, instance.user_id, points)
+
+
+@receiver(post_delete, sender=Membership)
+def remove_member_from_group(sender, instance, **kwargs):
+    """Remove the user from the leaderboard and feed of the group when they leave it."""
+    remove_member(instance)
+    remove_group_member(instance.group_id, instance.user_id)
+
+
+@receiver(post_save, sender=Group)
+def clear_disabled_group_feed(sender, instance, **kwargs):
+    """Delete the feed entries of a group when its feed is disabled, so they are created again if enabled."""
+    if not instance.feed_enabled:
+        GroupFeedEntry.objects.filter(group=instance).delete()
+        instance.feed_entries_after = None
+        Group.objects.filter(pk=instance.pk, feed_entries_after__isnull=False).update(feed_entries_after=None)
+
+
+@receiver(post_delete, sender=Group)
+def delete_leaderboard_of_group(sender, instance, **kwargs):
+    """Delete the leaderboard of the group when it is deleted."""
+    delete_group_leaderboard(instance.pk)
+
+
+def invalidate_question_index_for_change(sender, **kwargs):
+    """Invalidate the question index when a question or its classification changes."""
+    invalidate_question_index()
+
+
+for model in QUESTION_INDEX_MODELS:
+    post_save.connect(invalidate_question_index_for_change, sender=model)
+    post_delete.connect(invalidate_question_index_for_change, sender=model)
+m2m_changed.connect(invalidate_question_index_for_change, sender=Question.concepts.through)
+m2m_changed.connect(invalidate_question_index_for_change, sender=Question.contexts.through)
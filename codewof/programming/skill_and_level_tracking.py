@@ -1,48 +1,82 @@
 """Skill and level tracking for codeWOF."""
 
-from programming.codewof_utils import filter_attempts_in_past_month
+from django.db.models import Count, Q
+
+from programming.codewof_utils import get_start_of_past_month
 from programming.models import Attempt
+from programming.question_index import get_question_index
 
 
 def get_level_and_skill_info(profile):
     """
     Return a dictionary of level and skill information from a given profile.
 
-    This uses the solved plus all attempts and those within the past month.
+    This uses the solved plus all attempts and those within the past month. The number of attempts on each
+    question, both in total and within the past month, is counted with a single grouped query.
     """
-    all_attempts = Attempt.objects.filter(profile=profile)
-    solved = all_attempts.filter(passed_tests=True)
+    in_past_month = Q(datetime__gte=get_start_of_past_month())
+    question_counts = (
+        Attempt.objects.filter(profile=profile)
+        .values('question')
+        .annotate(
+            num_attempts=Count('pk'),
+            num_solved=Count('pk', filter=Q(passed_tests=True)),
+            num_attempts_month=Count('pk', filter=in_past_month),
+            num_solved_month=Count('pk', filter=Q(passed_tests=True) & in_past_month),
+        )
+        .order_by()
+    )
+    attempts_per_solved_question = dict()
+    attempts_per_solved_question_month = dict()
+    for counts in question_counts:
+        if counts['num_solved'] > 0:
+            attempts_per_solved_question[counts['question']] = counts['num_attempts']
+        if counts['num_solved_month'] > 0:
+            attempts_per_solved_question_month[counts['question']] = counts['num_attempts_month']
     return {
-        'all': get_level_and_skill_dict(solved, all_attempts),
-        'month': get_level_and_skill_dict(
-            filter_attempts_in_past_month(solved),
-            filter_attempts_in_past_month(all_attempts),
-        ),
+        'all': build_level_and_skill_dict(attempts_per_solved_question),
+        'month': build_level_and_skill_dict(attempts_per_solved_question_month),
     }
 
 
 def get_level_and_skill_dict(solved, all_attempts):
     """Return a dictionary of level and skill information from a given set of solved and all attempts."""
-    solved_without_duplicates = solved.distinct('question__slug')
+    solved_question_pks = set(solved.values_list('question', flat=True).distinct())
+    question_counts = (
+        all_attempts.filter(question__in=solved_question_pks)
+        .values('question')
+        .annotate(num_attempts=Count('pk'))
+        .order_by()
+    )
+    attempts_per_solved_question = {pk: 0 for pk in solved_question_pks}
+    for counts in question_counts:
+        attempts_per_solved_question[counts['question']] = counts['num_attempts']
+    return build_level_and_skill_dict(attempts_per_solved_question)
+
+
+def build_level_and_skill_dict(attempts_per_solved_question):
+    """
+    Return a dictionary of level and skill information from the number of attempts made on each solved question.
+
+    Question details are read from the question index, so no queries are made once the index is built.
+
+    Args:
+        attempts_per_solved_question (dict): Maps the primary key of each solved question to its number of attempts.
+    """
+    index = get_question_index(required_pks=attempts_per_solved_question.keys())
     levels_and_skills = {'difficulty_level': dict(), 'concept_num': dict(), 'context_num': dict()}
-    for solved_attempt in solved_without_duplicates:
-        question = solved_attempt.question
-        num_attempts = len(all_attempts.filter(question__slug=question.slug))
-
-        if question.difficulty_level.level not in levels_and_skills['difficulty_level']:
-            levels_and_skills['difficulty_level'][question.difficulty_level.level] = {'num_solved': 0, 'attempts': []}
-        levels_and_skills['difficulty_level'][question.difficulty_level.level]['num_solved'] += 1
-        levels_and_skills['difficulty_level'][question.difficulty_level.level]['attempts'].append(num_attempts)
-
-        for concept_num in set(concept.number for concept in question.concepts.all()):
-            if concept_num not in levels_and_skills['concept_num']:
-                levels_and_skills['concept_num'][concept_num] = {'num_solved': 0, 'attempts': []}
-            levels_and_skills['concept_num'][concept_num]['num_solved'] += 1
-            levels_and_skills['concept_num'][concept_num]['attempts'].append(num_attempts)
-
-        for context_num in set(context.number for context in question.contexts.all()):
-            if context_num not in levels_and_skills['context_num']:
-                levels_and_skills['context_num'][context_num] = {'num_solved': 0, 'attempts': []}
-            levels_and_skills['context_num'][context_num]['num_solved'] += 1
-            levels_and_skills['context_num'][context_num]['attempts'].append(num_attempts)
+    solved_question_pks = sorted(attempts_per_solved_question, key=lambda pk: index.questions[pk].slug)
+    for question_pk in solved_question_pks:
+        num_attempts = attempts_per_solved_question[question_pk]
+        categories = [
+            ('difficulty_level', [index.difficulty_levels[question_pk]]),
+            ('concept_num', index.concept_numbers[question_pk]),
+            ('context_num', index.context_numbers[question_pk]),
+        ]
+        for category, numbers in categories:
+            for number in numbers:
+                if number not in levels_and_skills[category]:
+                    levels_and_skills[category][number] = {'num_solved': 0, 'attempts': []}
+                levels_and_skills[category][number]['num_solved'] += 1
+                levels_and_skills[category][number]['attempts'].append(num_attempts)
     return levels_and_skills
@@ -1,6 +1,7 @@
 """Views for programming application."""
 
 import json
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.views import generic
 from django.db.models import Count, Max, Exists, OuterRef
@@ -8,6 +9,7 @@ from django.db.models.functions import Coalesce
 from django.http import JsonResponse, Http404, HttpResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.views.decorators.http import require_http_methods
 from django_filters.views import FilterView
 from rest_framework import viewsets
@@ -23,12 +25,14 @@ from programming.serializers import (
 from programming.models import (
     Profile,
     Question,
-    TestCase,
     Attempt,
     TestCaseAttempt,
     Like
 )
 from programming.codewof_utils import add_points, check_achievement_conditions
+from programming.attempt_queue import get_previous_user_code, queue_attempt
+from programming.grader import grade_attempts, get_test_cases
+from programming.sandbox import SandboxError
 from programming.filters import QuestionFilter
 from programming.utils import create_filter_helper
 
@@ -128,12 +132,23 @@ class QuestionView(LoginRequiredMixin, generic.DetailView):
         return context
 
 
+@transaction.non_atomic_requests
 def save_question_attempt(request):
     """Save user's attempt for a question.
 
     If the attempt is successful: add points if these haven't already
     been added.
 
+    If PROGRAMMING_SERVER_GRADING is enabled, test cases are run on the
+    server instead of using the results sent by the browser. The request
+    is not run in a transaction, so a database connection is not held
+    in a transaction while test cases run.
+
+    If PROGRAMMING_ATTEMPT_QUEUE is enabled, the attempt is queued to be
+    saved by the process_attempt_queue command, and the response contains
+    the points the attempt is expected to award. Achievements are awarded
+    once the attempt is saved.
+
     Args:
         request (Request): AJAX request from user.
 
@@ -147,41 +162,58 @@ def save_question_attempt(request):
         if request.user.is_authenticated:
             request_json = json.loads(request.body.decode('utf-8'))
             profile = request.user.profile
-            question = Question.objects.get(pk=request_json['question'])
+            question = Question.objects.get_subclass(pk=request_json['question'])
             user_code = request_json['user_input']
 
             # If same as previous attempt, don't save to database
-            previous_attempt = Attempt.objects.filter(
-                profile=profile,
-                question=question,
-            ).order_by('-datetime').first()
-            if not previous_attempt or user_code != previous_attempt.user_code:
-                test_cases = request_json['test_cases']
-                total_tests = len(test_cases)
-                total_passed = 0
-                for test_case in test_cases.values():
-                    if test_case['passed']:
-                        total_passed += 1
-
-                attempt = Attempt.objects.create(
+            if settings.PROGRAMMING_ATTEMPT_QUEUE:
+                previous_user_code = get_previous_user_code(profile, question)
+            else:
+                previous_user_code = Attempt.objects.filter(
                     profile=profile,
                     question=question,
-                    user_code=user_code,
-                    passed_tests=total_passed == total_tests,
-                )
-
-                # Create test case attempt objects
-                for test_case_id, test_case_data in test_cases.items():
-                    test_case = TestCase.objects.get(pk=test_case_id)
-                    TestCaseAttempt.objects.create(
-                        attempt=attempt,
-                        test_case=test_case,
-                        passed=test_case_data['passed'],
+                ).order_by('-datetime').values_list('user_code', flat=True).first()
+            if previous_user_code is None or user_code != previous_user_code:
+                question_test_cases = get_test_cases(question)
+                if settings.PROGRAMMING_SERVER_GRADING:
+                    try:
+                        test_cases = grade_attempts([(question, question_test_cases, user_code)])[0]
+                    except SandboxError:
+                        result['message'] = 'Attempt could not be tested, please try again.'
+                        return JsonResponse(result)
+                else:
+                    test_cases = {int(pk): data for pk, data in request_json['test_cases'].items()}
+                    if not test_cases.keys() <= {test_case.pk for test_case in question_test_cases}:
+                        result['message'] = 'Attempt not saved, test cases do not belong to question.'
+                        return JsonResponse(result)
+
+                if settings.PROGRAMMING_ATTEMPT_QUEUE:
+                    point_diff = queue_attempt(profile, question, user_code, test_cases)
+                    result['success'] = True
+                    result['queued'] = True
+                    result['curr_points'] = profile.points + point_diff
+                    result['point_diff'] = point_diff
+                    result['achievements'] = ''
+                    return JsonResponse(result)
+
+                with transaction.atomic():
+                    attempt = Attempt.objects.create(
+                        profile=profile,
+                        question=question,
+                        user_code=user_code,
+                        passed_tests=all(test_case['passed'] for test_case in test_cases.values()),
                     )
+                    TestCaseAttempt.objects.bulk_create([
+                        TestCaseAttempt(
+                            attempt=attempt,
+                            test_case_id=test_case_id,
+                            passed=bool(test_case_data['passed']),
+                        ) for test_case_id, test_case_data in test_cases.items()
+                    ])
+                    points_before = profile.points
+                    points = add_points(question, profile, attempt)
+                    achievements = check_achievement_conditions(profile)
                 result['success'] = True
-                points_before = profile.points
-                points = add_points(question, profile, attempt)
-                achievements = check_achievement_conditions(profile)
                 points_after = profile.points
                 result['curr_points'] = points
                 result['point_diff'] = points_after - points_before
@@ -1,6 +1,5 @@
 """Views for research application."""
 
-from django.core.mail import send_mail
 from django.template.loader import get_template
 from django.views import generic
 from django.contrib import messages
@@ -11,6 +10,7 @@ from django.views.generic.edit import FormView
 from django.shortcuts import redirect
 from rest_framework import viewsets, permissions
 from rest_framework.permissions import IsAdminUser
+from general.outbox import queue_email
 from research.forms import ResearchConsentForm
 from research.models import StudyRegistration
 from research.utils import get_study_for_context
@@ -70,13 +70,12 @@ class StudyConsentFormView(LoginRequiredMixin, FormView):
             user=self.request.user,
             send_study_results=form.cleaned_data.get('send_study_results', False)
         )
-        send_mail(
+        queue_email(
             'CodeWOF Research Consent Confirmation',
             self.build_email_plain(study, form, registration),
-            settings.DEFAULT_FROM_EMAIL,
             [self.request.user.email],
-            fail_silently=False,
-            html_message=self.build_email_html(study, form, registration)
+            html_message=self.build_email_html(study, form, registration),
+            dedup_key='study-registration-{}-{}'.format(study['slug'], self.request.user.pk),
         )
         messages.success(
             self.request,
@@ -0,0 +1,163 @@
+"""
+Lookup and counting of style errors for the style checker application.
+
+Style errors are read from the database once per process and stored in memory, so checking code does not query
+each reported error. They are read again when the load_style_errors command changes them, which is seen through a
+version number stored in the database. The version is read at most once every VERSION_TIMEOUT seconds, so changes
+are seen by other processes within that time.
+
+Occurence counts are added to a buffer in memory, and written to the database by a background thread every
+STYLE_CHECKER_ERROR_COUNT_FLUSH_INTERVAL seconds with one UPDATE per error code, so counts shown on the statistics
+page are at most one interval behind. If the interval is 0, counts are written immediately.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from style.models import Error, ErrorsVersion
+
+logger = logging.getLogger(__name__)
+
+VERSION_TIMEOUT = 10
+
+# Tuple of the version of the style errors, and a dictionary of the errors keyed by language and code
+_errors = None
+_errors_lock = threading.Lock()
+# Tuple of the version of the style errors, and the time it was read from the database
+_version = None
+
+
+def get_errors_version():
+    """Get the current version of the style errors, read from the database at most every VERSION_TIMEOUT seconds."""
+    global _version
+    version = _version
+    if version is None or time.monotonic() - version[1] > VERSION_TIMEOUT:
+        number = ErrorsVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+        version = _version = (number, time.monotonic())
+    return version[0]
+
+
+def get_error(language, code):
+    """Return the style error for the given language and code, or None if it is not defined.
+
+    Args:
+        language (str): Slug of language of error.
+        code (str): Code of error, for example 'E101'.
+
+    Returns:
+        Error object, not including recent occurence counts.
+    """
+    global _errors
+    version = get_errors_version()
+    errors = _errors
+    if errors is None or errors[0] != version:
+        with _errors_lock:
+            if _errors is None or _errors[0] != version:
+                _errors = (version, {(error.language, error.code): error for error in Error.objects.all()})
+            errors = _errors
+    return errors[1].get((language, code))
+
+
+def clear_errors():
+    """Clear the stored style errors in this process, and mark those of other processes as stale."""
+    global _errors, _version
+    if not ErrorsVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        ErrorsVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+    with _errors_lock:
+        _errors = None
+        _version = None
+
+
+class ErrorCountBuffer:
+    """Occurence counts of style errors waiting to be saved to the database."""
+
+    def __init__(self, flush_interval):
+        """Create an empty buffer.
+
+        Args:
+            flush_interval (int): Seconds between saving counts to the database. If 0, counts are saved immediately.
+        """
+        self.flush_interval = flush_interval
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    def add(self, language, issues):
+        """Add one occurence of the error of each of the given issues.
+
+        Args:
+            language (str): Slug of language of checked code.
+            issues (list): List of style issues.
+        """
+        with self._lock:
+            self._counts.update((language, issue['code']) for issue in issues)
+        if not self.flush_interval:
+            self.flush()
+        else:
+            self.start_flusher()
+
+    def pending(self):
+        """Return a dictionary of the counts not yet saved, keyed by language and error code."""
+        with self._lock:
+            return dict(self._counts)
+
+    def flush(self):
+        """Save the buffered counts to the database.
+
+        Counts are kept in the buffer to be saved again if the database could not be updated.
+
+        Returns:
+            Number of error codes updated.
+        """
+        with self._lock:
+            counts = self._counts
+            self._counts = Counter()
+        if not counts:
+            return 0
+        try:
+            with transaction.atomic():
+                for (language, code), count in sorted(counts.items()):
+                    Error.objects.filter(language=language, code=code).update(count=F('count') + count)
+        except Exception:
+            with self._lock:
+                self._counts.update(counts)
+            raise
+        return len(counts)
+
+    def start_flusher(self):
+        """Start the background thread saving counts, if it is not running in this process."""
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        thread = threading.Thread(target=self.run_flusher, name='style-error-count-flusher', daemon=True)
+        thread.start()
+
+    def run_flusher(self):
+        """Save counts to the database every flush interval, using a database connection for this thread."""
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not save style error counts.')
+            finally:
+                connection.close()
+
+
+ERROR_COUNTS = ErrorCountBuffer(settings.STYLE_CHECKER_ERROR_COUNT_FLUSH_INTERVAL)
+
+
+@atexit.register
+def flush_on_exit():
+    """Save remaining counts when the process exits."""
+    try:
+        ERROR_COUNTS.flush()
+    except Exception:
+        logger.exception('Could not save style error counts.')
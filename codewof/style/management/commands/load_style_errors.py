@@ -6,6 +6,7 @@ from verto import Verto
 from verto.errors.Error import Error as VertoError
 from style.utils import get_language_slugs
 from style.models import Error
+from style.error_statistics import clear_errors
 from utils.errors.VertoConversionError import VertoConversionError
 
 BASE_DATA_MODULE_PATH = 'style.style_checkers.{}_data'
@@ -92,6 +93,7 @@ class Command(management.base.BaseCommand):
             deleted_count += result.get('style.Error', 0)
             print('Deleted {} unused style errors.'.format(deleted_count))
 
+        clear_errors()
         print(
             'Style errors loaded ({} created, {} updated, {} deleted).'
             .format(created_count, updated_count, deleted_count))
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('style', '0004_error_unique_language_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErrorsVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -29,3 +29,16 @@ class Error(models.Model):
                 name='unique_language_code',
             ),
         ]
+
+
+class ErrorsVersion(models.Model):
+    """Version of the style errors, increased each time they are loaded.
+
+    The version is stored in the database, so every process sees changes made by the load_style_errors command.
+    """
+
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        """Text representation of the style errors version."""
+        return str(self.version)
@@ -0,0 +1,106 @@
+"""
+Cache of style check results for the style checker application.
+
+Results are stored against a hash of the language, the contents of the language's checker configuration, the
+version of the style errors rendered in results, and the checked code, so identical submissions are only checked and
+rendered once. The cache is held in memory for each
+process, and the least recently used result is removed when the cache is full.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from style.utils import get_language_info
+
+_config_hashes = dict()
+
+
+class ResultCache:
+    """Bounded cache of results, removing the least recently used result when full."""
+
+    def __init__(self, max_size):
+        """Create an empty cache.
+
+        Args:
+            max_size (int): Maximum number of results to store. If 0, no results are stored.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the result for the given key, or None if it is not stored."""
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._results.move_to_end(key)
+            return result
+
+    def set(self, key, result):
+        """Store the result for the given key."""
+        if not self.max_size:
+            return
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """Remove all stored results and reset hit and miss counts."""
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def statistics(self):
+        """Return a dictionary of the cache size, hit and miss counts, and hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._results),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0,
+            }
+
+
+def get_config_hash(language):
+    """Return a hash of the contents of the checker configuration file for the given language."""
+    config_hash = _config_hashes.get(language)
+    if config_hash is None:
+        config_hash = hashlib.sha256()
+        config_path = get_language_info(language).get('checker-config')
+        if config_path:
+            with open(config_path, 'rb') as config_file:
+                config_hash.update(config_file.read())
+        config_hash = _config_hashes[language] = config_hash.hexdigest()
+    return config_hash
+
+
+def get_result_key(language, code, errors_version):
+    """Return the key for the result of checking the given code.
+
+    Args:
+        language (str): Slug of language of code.
+        code (str): String of user code.
+        errors_version (int): Version of the style errors, from get_errors_version.
+
+    Returns:
+        Hexadecimal string of hash of language, checker configuration, style errors version and code.
+    """
+    key = hashlib.sha256()
+    for value in (language, get_config_hash(language), str(errors_version), code):
+        key.update(value.encode('utf-8'))
+        key.update(b'\0')
+    return key.hexdigest()
+
+
+RESULT_CACHE = ResultCache(settings.STYLE_CHECKER_RESULT_CACHE_SIZE)
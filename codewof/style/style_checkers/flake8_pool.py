@@ -0,0 +1,204 @@
+"""
+Pool of long-lived worker processes for checking Python 3 code with flake8.
+
+Each worker loads flake8's plugins and options once when it starts, and then checks the source text sent to it in
+memory, rather than a new flake8 process being started for a temporary file on each check. Workers are replaced
+after a set number of jobs, and the pool is restarted if a job does not finish within the timeout.
+
+This module does not import Django, so worker processes start without loading the project.
+"""
+
+import multiprocessing
+import operator
+import os
+import threading
+
+from flake8.checker import FileChecker
+from flake8.formatting.base import BaseFormatter
+from flake8.options.parse_args import parse_args
+from flake8.processor import FileProcessor
+from flake8.style_guide import StyleGuideManager
+
+SOURCE_FILENAME = 'code.py'
+
+# Checker used by the worker process this module is loaded in
+_worker_checker = None
+
+
+class StyleCheckTimeoutError(Exception):
+    """Raised when checking code takes longer than the pool's timeout."""
+
+    pass
+
+
+class ResultCollector(BaseFormatter):
+    """Flake8 formatter that stores each reported error line, rather than printing it."""
+
+    def after_init(self):
+        """Create the list of reported lines."""
+        self.lines = []
+
+    def format(self, error):
+        """Format an error the same as flake8's default formatter."""
+        return '{}:{}:{}: {} {}'.format(
+            error.filename,
+            error.line_number,
+            error.column_number,
+            error.code,
+            error.text,
+        )
+
+    def write(self, line, source):
+        """Store the formatted error line."""
+        self.lines.append(line)
+
+
+class SourceFileChecker(FileChecker):
+    """Flake8 file checker that reads lines from the given source text instead of a file."""
+
+    def __init__(self, source, **kwargs):
+        """Create the checker for the given source text."""
+        self.source = source
+        super().__init__(**kwargs)
+
+    def _make_processor(self):
+        """Create the processor with the lines of the source text."""
+        return FileProcessor(self.filename, self.options, lines=self.source.splitlines(True))
+
+
+class Flake8Checker:
+    """Checks source text with flake8, loading plugins and options once."""
+
+    def __init__(self, config):
+        """Load flake8's plugins and options.
+
+        Args:
+            config (str): Path to flake8 configuration file.
+        """
+        argv = ['--config', config] if config else []
+        self.plugins, self.options = parse_args(argv)
+        self.formatter = ResultCollector(self.options)
+        self.style_guide = StyleGuideManager(self.options, self.formatter)
+
+    def check(self, source):
+        """Check the given source text.
+
+        Args:
+            source (str): Python 3 code to check.
+
+        Returns:
+            String of flake8 output, with one line per error.
+        """
+        self.formatter.lines = []
+        checker = SourceFileChecker(
+            source,
+            filename=SOURCE_FILENAME,
+            plugins=self.plugins.checkers,
+            options=self.options,
+        )
+        _, results, _ = checker.run_checks()
+        results.sort(key=operator.itemgetter(1, 2))
+        with self.style_guide.processing_file(SOURCE_FILENAME):
+            for (error_code, line_number, column, text, physical_line) in results:
+                self.style_guide.handle_error(
+                    code=error_code,
+                    filename=SOURCE_FILENAME,
+                    line_number=line_number,
+                    column_number=column,
+                    text=text,
+                    physical_line=physical_line,
+                )
+        return '\n'.join(self.formatter.lines)
+
+
+def initialise_worker(config):
+    """Load the checker for a worker process."""
+    global _worker_checker
+    _worker_checker = Flake8Checker(config)
+
+
+def check_in_worker(source):
+    """Check source text with the checker of this worker process."""
+    return _worker_checker.check(source)
+
+
+class Flake8Pool:
+    """Pool of worker processes checking source text with flake8."""
+
+    def __init__(self, config, processes, timeout, max_jobs_per_worker):
+        """Create the pool, without starting any workers.
+
+        Args:
+            config (str): Path to flake8 configuration file.
+            processes (int): Number of worker processes. If 0, code is checked in the calling process.
+            timeout (int): Seconds to wait for a check before the pool is restarted.
+            max_jobs_per_worker (int): Number of checks a worker runs before it is replaced.
+                If None, workers are never replaced.
+        """
+        self.config = config
+        self.processes = processes
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._pool = None
+        self._pool_pid = None
+        self._checker = None
+        self._lock = threading.Lock()
+
+    def check(self, source):
+        """Check the given source text.
+
+        Args:
+            source (str): Python 3 code to check.
+
+        Returns:
+            String of flake8 output, with one line per error.
+
+        Raises:
+            StyleCheckTimeoutError: If the check did not finish within the timeout.
+        """
+        if not self.processes:
+            with self._lock:
+                if self._checker is None:
+                    self._checker = Flake8Checker(self.config)
+                return self._checker.check(source)
+        pool = self.get_pool()
+        job = pool.apply_async(check_in_worker, (source,))
+        try:
+            return job.get(self.timeout)
+        except multiprocessing.TimeoutError:
+            # The worker may be stuck, so replace all workers
+            self.close(pool)
+            raise StyleCheckTimeoutError('Style check did not finish within {} seconds.'.format(self.timeout))
+
+    def get_pool(self):
+        """Get the pool of workers, starting it if required.
+
+        A pool inherited from a parent process (such as a forked web server worker) is not used,
+        as its workers belong to the parent.
+        """
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                # Workers are spawned, as forking a process with running threads is unsafe
+                context = multiprocessing.get_context('spawn')
+                self._pool = context.Pool(
+                    processes=self.processes,
+                    initializer=initialise_worker,
+                    initargs=(self.config, ),
+                    maxtasksperchild=self.max_jobs_per_worker,
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def close(self, pool=None):
+        """Stop the workers of the pool.
+
+        Args:
+            pool (Pool): Only stop the workers if this is still the current pool. If None, the current pool is stopped.
+        """
+        with self._lock:
+            if self._pool is None or (pool is not None and pool is not self._pool):
+                return
+            if self._pool_pid == os.getpid():
+                self._pool.terminate()
+            self._pool = None
+            self._pool_pid = None
@@ -1,27 +1,25 @@
 """Style checking code for Python 3 code."""
 
 import re
-import os.path
-import uuid
-import subprocess
-from pathlib import Path
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import F
 from style.utils import (
     CHARACTER_DESCRIPTIONS,
     get_language_info,
     get_article,
 )
-from style.models import Error
+from style.error_statistics import get_error
+from style.style_checkers.flake8_pool import Flake8Pool
 
 LINE_RE = re.compile(r':(?P<line>\d+):(?P<character>\d+): (?P<error_code>\w\d+) (?P<error_message>.*)$')
 CHARACTER_RE = re.compile(r'\'(?P<character>.*)\'')
-TEMP_FILE_ROOT = settings.STYLE_CHECKER_TEMP_FILES_ROOT
-TEMP_FILE_EXT = '.py'
-# Create folder if it does not exist
-Path(TEMP_FILE_ROOT).mkdir(parents=True, exist_ok=True)
 PYTHON3_DETAILS = get_language_info('python3')
+# Workers are started on the first check
+FLAKE8_POOL = Flake8Pool(
+    config=PYTHON3_DETAILS['checker-config'],
+    processes=settings.STYLE_CHECKER_WORKERS,
+    timeout=settings.STYLE_CHECKER_JOB_TIMEOUT,
+    max_jobs_per_worker=settings.STYLE_CHECKER_MAX_JOBS_PER_WORKER,
+)
 
 
 def python3_style_check(code):
@@ -32,65 +30,46 @@ def python3_style_check(code):
 
     Returns:
         List of dictionaries of style checker result data.
+
+    Raises:
+        StyleCheckTimeoutError: If flake8 did not finish checking the code in time.
     """
-    # Write file to HDD
-    filename = str(uuid.uuid4()) + TEMP_FILE_EXT
-    filepath = Path(os.path.join(TEMP_FILE_ROOT, filename))
-    f = open(filepath, 'w')
-    f.write(code)
-    f.close()
-
-    # Read file with flake8
-    checker_result = subprocess.run(
-        [
-            'flake8',
-            filepath,
-            '--config=' + PYTHON3_DETAILS['checker-config'],
-        ],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    )
+    # Check code with flake8
+    result_text = FLAKE8_POOL.check(code)
 
     # Process results
-    result_text = checker_result.stdout.decode('utf-8')
-    is_example_code = code == PYTHON3_DETAILS['example_code']
-    result_data = process_results(result_text, is_example_code)
-
-    # Delete file from HDD
-    filepath.unlink()
+    result_data = process_results(result_text)
 
     # Send results
     return result_data
 
 
-def process_results(result_text, is_example_code):
+def process_results(result_text):
     """Process results into data for response.
 
     Args:
         result_text (str): Text output from style checker.
-        is_example_code (bool): True if provided code matches the example code.
 
     Returns:
         List of dictionaries of result data.
     """
     issues = []
     for line in result_text.split('\n'):
-        issue_data = process_line(line, is_example_code)
+        issue_data = process_line(line)
         if issue_data:
             issues.append(issue_data)
     return issues
 
 
-def process_line(line_text, is_example_code):
+def process_line(line_text):
     """
-    Process style error by matching database entry and incrementing count.
+    Process style error by matching stored database entry.
 
     Note: Could at extracting parts of this function to a generic
           utility function.
 
     Args:
         line_text (str): Text of style checker result.
-        is_example_code (bool): True if program was provided example code.
 
     Returns:
         Dictionary of information about style error.
@@ -102,16 +81,15 @@ def process_line(line_text, is_example_code):
         error_code = re_result.group('error_code')
         error_message = re_result.group('error_message')
 
-        try:
-            error = Error.objects.get(
-                language='python3',
-                code=error_code,
-            )
-            # Increment error occurence count, if not example code
-            if not is_example_code:
-                error.count = F('count') + 1
-                error.save()
-
+        error = get_error('python3', error_code)
+        if error is None:
+            # If error is not defined in database.
+            issue_data = {
+                'code': error_code,
+                'title': error_message,
+                'line_number': line_number,
+            }
+        else:
             if error.title_templated:
                 error_title = render_text(error.title, error_message)
                 error_solution = render_text(error.solution, error_message)
@@ -126,13 +104,6 @@ def process_line(line_text, is_example_code):
                 'solution': error_solution,
                 'explanation': error.explanation,
             }
-        except ObjectDoesNotExist:
-            # If error is not defined in database.
-            issue_data = {
-                'code': error_code,
-                'title': error_message,
-                'line_number': line_number,
-            }
     return issue_data
 
 
@@ -8,7 +8,10 @@ from django.views.generic import (
     ListView,
 )
 from style.style_checkers.python3 import python3_style_check
+from style.style_checkers.flake8_pool import StyleCheckTimeoutError
 from style.models import Error
+from style.error_statistics import ERROR_COUNTS, get_errors_version
+from style.result_cache import RESULT_CACHE, get_result_key
 from style.utils import (
     render_results_as_html,
     render_results_as_text,
@@ -53,7 +56,10 @@ class LanguageStyleCheckerView(TemplateView):
 
 
 class LanguageStatisticsView(TemplateView):
-    """View for a language statistics."""
+    """View for a language statistics.
+
+    Counts of recently checked code may not be saved yet, see style.error_statistics.
+    """
 
     template_name = 'style/language-statistics.html'
 
@@ -94,12 +100,27 @@ def check_code(request):
         is_valid_length = 0 < len(user_code) <= settings.STYLE_CHECKER_MAX_CHARACTER_COUNT
         is_valid_language = language in get_language_slugs()
         if is_valid_length and is_valid_language:
-            if language == 'python3':
-                result_data = python3_style_check(user_code)
-                result['success'] = True
-            else:
-                # TODO: else raise error language isn't supported
-                pass
-            result['result_html'] = render_results_as_html(result_data)
-            result['result_text'] = render_results_as_text(user_code, result_data)
+            result_key = get_result_key(language, user_code, get_errors_version())
+            cached_result = RESULT_CACHE.get(result_key)
+            if cached_result is None:
+                if language == 'python3':
+                    try:
+                        result_data = python3_style_check(user_code)
+                    except StyleCheckTimeoutError:
+                        return JsonResponse(result)
+                else:
+                    # TODO: else raise error language isn't supported
+                    return JsonResponse(result)
+                cached_result = {
+                    'issues': result_data,
+                    'result_html': render_results_as_html(result_data),
+                    'result_text': render_results_as_text(user_code, result_data),
+                }
+                RESULT_CACHE.set(result_key, cached_result)
+            # Increment error occurence counts, if not example code
+            if user_code != get_language_info(language)['example_code']:
+                ERROR_COUNTS.add(language, cached_result['issues'])
+            result['success'] = True
+            result['result_html'] = cached_result['result_html']
+            result['result_text'] = cached_result['result_text']
     return JsonResponse(result)
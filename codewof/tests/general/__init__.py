@@ -0,0 +1 @@
+"""Module for testing general application."""
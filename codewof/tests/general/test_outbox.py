@@ -0,0 +1,175 @@
+import datetime
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from general.models import OutboxEmail
+from general.outbox import (
+    OUTBOX_LEASE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_MAX_RETRY_DELAY,
+    OUTBOX_RETENTION,
+    OUTBOX_RETRY_DELAY,
+    claim_emails,
+    create_outbox_email,
+    deliver_emails,
+    deliver_outbox,
+    get_delivery_metrics,
+    get_retry_delay,
+    purge_outbox,
+    queue_email,
+    queue_emails,
+)
+
+
+class OutboxTest(TestCase):
+
+    def test_queue_email_is_not_sent(self):
+        queue_email('Subject', 'Body', ['user@mail.com'])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.PENDING)
+
+    def test_email_with_same_dedup_key_is_added_once(self):
+        self.assertTrue(queue_email('Subject', 'Body', ['user@mail.com'], dedup_key='key'))
+        self.assertFalse(queue_email('Subject', 'Body', ['user@mail.com'], dedup_key='key'))
+        self.assertEqual(queue_emails([
+            create_outbox_email('Subject', 'Body', ['user@mail.com'], dedup_key='key'),
+            create_outbox_email('Subject', 'Body', ['user@mail.com'], dedup_key='other'),
+            create_outbox_email('Subject', 'Body', ['user@mail.com']),
+        ]), 2)
+        self.assertEqual(OutboxEmail.objects.count(), 3)
+
+    def test_deliver_emails(self):
+        queue_email('Subject', 'Body', ['user@mail.com'], html_message='<p>Body</p>')
+        self.assertEqual(deliver_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@mail.com'])
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>Body</p>', 'text/html')])
+        outbox_email = OutboxEmail.objects.get()
+        self.assertEqual(outbox_email.status, OutboxEmail.SENT)
+        self.assertIsNotNone(outbox_email.date_sent)
+        # Sent emails are not sent again
+        self.assertEqual(deliver_emails(), (0, 0))
+
+    def test_one_connection_for_each_batch(self):
+        queue_emails([create_outbox_email('Subject', 'Body', ['user{}@mail.com'.format(i)]) for i in range(5)])
+        with mock.patch('general.outbox.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(deliver_emails(batch_size=3), (3, 0))
+            self.assertEqual(deliver_emails(batch_size=3), (2, 0))
+        self.assertEqual(get_connection.call_count, 2)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_connection_kept_open_across_batches(self):
+        queue_emails([create_outbox_email('Subject', 'Body', ['user{}@mail.com'.format(i)]) for i in range(5)])
+        with mock.patch('general.outbox.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(deliver_outbox(batch_size=2, once=True), (5, 0))
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_emails_sent_outside_transaction(self):
+        queue_email('Subject', 'Body', ['user@mail.com'])
+        # Transactions within the test are savepoints
+        num_savepoints = len(connection.savepoint_ids)
+        savepoints_when_sent = []
+
+        def send_messages(messages):
+            savepoints_when_sent.append(len(connection.savepoint_ids))
+            return len(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=send_messages):
+            self.assertEqual(deliver_emails(), (1, 0))
+        self.assertEqual(savepoints_when_sent, [num_savepoints])
+
+    def test_claimed_email_sent_again_after_lease(self):
+        queue_email('Subject', 'Body', ['user@mail.com'])
+        # As if the worker that claimed the email stopped before sending it
+        self.assertEqual(len(claim_emails()), 1)
+        self.assertEqual(OutboxEmail.objects.get().attempts, 1)
+        self.assertEqual(deliver_emails(), (0, 0))
+        later = timezone.now() + OUTBOX_LEASE + datetime.timedelta(seconds=1)
+        with mock.patch('general.outbox.timezone.now', return_value=later):
+            self.assertEqual(deliver_emails(), (1, 0))
+        self.assertEqual(OutboxEmail.objects.get().attempts, 2)
+
+    def test_email_not_due_is_not_sent(self):
+        queue_email('Subject', 'Body', ['user@mail.com'])
+        outbox_email = OutboxEmail.objects.get()
+        outbox_email.date_next_attempt = timezone.now() + datetime.timedelta(minutes=1)
+        outbox_email.save()
+        self.assertEqual(deliver_emails(), (0, 0))
+
+    @mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=SMTPException('Down'))
+    def test_failed_email_is_retried(self, send_messages):
+        queue_email('Subject', 'Body', ['user@mail.com'])
+        self.assertEqual(deliver_emails(), (0, 1))
+        outbox_email = OutboxEmail.objects.get()
+        self.assertEqual(outbox_email.status, OutboxEmail.PENDING)
+        self.assertEqual(outbox_email.attempts, 1)
+        self.assertEqual(outbox_email.last_error, 'Down')
+        self.assertGreater(outbox_email.date_next_attempt, timezone.now())
+        # Not retried until it is due
+        self.assertEqual(deliver_emails(), (0, 0))
+
+    @mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=SMTPException('Down'))
+    def test_email_fails_after_max_attempts(self, send_messages):
+        queue_email('Subject', 'Body', ['user@mail.com'])
+        OutboxEmail.objects.update(attempts=OUTBOX_MAX_ATTEMPTS - 1)
+        deliver_emails()
+        outbox_email = OutboxEmail.objects.get()
+        self.assertEqual(outbox_email.status, OutboxEmail.FAILED)
+
+    def test_retry_delay_backs_off_exponentially(self):
+        self.assertEqual(get_retry_delay(1), OUTBOX_RETRY_DELAY)
+        self.assertEqual(get_retry_delay(3), OUTBOX_RETRY_DELAY * 4)
+        self.assertEqual(get_retry_delay(20), OUTBOX_MAX_RETRY_DELAY)
+
+    def test_purge_keeps_pending_and_recent_emails(self):
+        now = timezone.now()
+        old = now - OUTBOX_RETENTION - datetime.timedelta(minutes=1)
+        queue_emails([
+            OutboxEmail(subject='Old', body='', recipients=[], status=OutboxEmail.SENT, date_created=old),
+            OutboxEmail(subject='Old', body='', recipients=[], status=OutboxEmail.PENDING, date_created=old),
+            OutboxEmail(subject='New', body='', recipients=[], status=OutboxEmail.SENT, date_created=now),
+        ])
+        self.assertEqual(purge_outbox(now), 1)
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+
+    def test_delivery_metrics(self):
+        now = timezone.now()
+        queue_emails([
+            OutboxEmail(subject='Sent', body='', recipients=[], status=OutboxEmail.SENT,
+                        date_created=now - datetime.timedelta(seconds=30), date_sent=now),
+            OutboxEmail(subject='Due', body='', recipients=[], attempts=1,
+                        date_created=now - datetime.timedelta(seconds=60), date_next_attempt=now),
+            OutboxEmail(subject='Waiting', body='', recipients=[],
+                        date_next_attempt=now + datetime.timedelta(minutes=1)),
+        ])
+        self.assertEqual(get_delivery_metrics(now=now), {
+            'pending': 2,
+            'due': 1,
+            'retrying': 1,
+            'sent': 1,
+            'failed': 0,
+            'average_latency': 30.0,
+            'oldest_due_age': 60.0,
+        })
+
+    def test_command(self):
+        queue_email('Subject', 'Body', ['user@mail.com'])
+        stdout = StringIO()
+        call_command('deliver_emails', once=True, stdout=stdout)
+        self.assertEqual(stdout.getvalue(), '1 emails sent, 0 failed attempts.\n')
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_command_metrics(self):
+        queue_email('Subject', 'Body', ['user@mail.com'])
+        stdout = StringIO()
+        call_command('deliver_emails', metrics=True, stdout=stdout)
+        self.assertIn('pending: 1\n', stdout.getvalue())
+        self.assertEqual(len(mail.outbox), 0)
@@ -1,7 +1,13 @@
+import os
+import shutil
+import tempfile
+
+from django.db import connection
 from django.test import TestCase as DjangoTestCase
+from django.test.utils import CaptureQueriesContext
 
 from programming.management.commands._QuestionsLoader import QuestionsLoader
-from programming.models import Question, DifficultyLevel, ProgrammingConcepts, TestCase
+from programming.models import Question, DifficultyLevel, ProgrammingConcepts, QuestionTypeProgramTestCase, TestCase
 
 from utils.errors.InvalidYAMLValueError import InvalidYAMLValueError
 
@@ -57,6 +63,8 @@ class QuestionsLoaderTest(DjangoTestCase):
                 "<Question: Say Hello!>",
                 "<Question: Say Hello 2!>",
             ],
+            # Questions have no ordering, and unchanged questions are not saved again
+            ordered=False,
         )
 
     def test_delete_end(self):
@@ -160,3 +168,68 @@ class QuestionsLoaderTest(DjangoTestCase):
 
         with self.assertRaises(InvalidYAMLValueError):
             loader.load()
+
+    def test_unchanged_questions_skipped(self):
+        config_file = "multiple-questions.yaml"
+        QuestionsLoader(structure_filename=config_file, base_path=self.BASE_PATH).load()
+        loader = QuestionsLoader(structure_filename=config_file, base_path=self.BASE_PATH)
+        loader.load()
+        self.assertEqual(loader.counts, {'added': 0, 'changed': 0, 'unchanged': 2, 'deleted': 0})
+
+    def test_full_load_loads_unchanged_questions(self):
+        config_file = "multiple-questions.yaml"
+        QuestionsLoader(structure_filename=config_file, base_path=self.BASE_PATH).load()
+        loader = QuestionsLoader(structure_filename=config_file, base_path=self.BASE_PATH, full=True)
+        loader.load()
+        self.assertEqual(loader.counts, {'added': 0, 'changed': 2, 'unchanged': 0, 'deleted': 0})
+
+    def test_changed_question_loaded(self):
+        config_file = "multiple-questions.yaml"
+        with tempfile.TemporaryDirectory() as base_path:
+            shutil.copytree(self.BASE_PATH, base_path, dirs_exist_ok=True)
+            QuestionsLoader(structure_filename=config_file, base_path=base_path).load()
+            with open(os.path.join(base_path, 'en', 'say-hello', 'question.md'), 'w') as question_file:
+                question_file.write('# Say Hi!\n\nWrite a program that **prints** `Hi!`.\n')
+            loader = QuestionsLoader(structure_filename=config_file, base_path=base_path)
+            loader.load()
+        self.assertEqual(loader.counts, {'added': 0, 'changed': 1, 'unchanged': 1, 'deleted': 0})
+        self.assertEqual(Question.objects.get(slug='say-hello-program').title, 'Say Hi!')
+
+    def test_missing_question_loaded_again(self):
+        config_file = "multiple-questions.yaml"
+        QuestionsLoader(structure_filename=config_file, base_path=self.BASE_PATH).load()
+        Question.objects.filter(slug='say-hello-program').delete()
+        loader = QuestionsLoader(structure_filename=config_file, base_path=self.BASE_PATH)
+        loader.load()
+        self.assertEqual(loader.counts, {'added': 1, 'changed': 0, 'unchanged': 1, 'deleted': 0})
+
+    def test_deleted_questions_counted(self):
+        QuestionsLoader(structure_filename="multiple-questions.yaml", base_path=self.BASE_PATH).load()
+        loader = QuestionsLoader(structure_filename="delete-end.yaml", base_path=self.BASE_PATH)
+        loader.load()
+        self.assertEqual(loader.counts, {'added': 0, 'changed': 0, 'unchanged': 1, 'deleted': 1})
+
+    def test_full_load_queries_independent_of_number_of_questions(self):
+        num_queries = []
+        for config_file in ["multiple-questions.yaml", "insert-start.yaml"]:
+            QuestionsLoader(structure_filename=config_file, base_path=self.BASE_PATH).load()
+            loader = QuestionsLoader(structure_filename=config_file, base_path=self.BASE_PATH, full=True)
+            with CaptureQueriesContext(connection) as context:
+                loader.load()
+            num_queries.append(len(context.captured_queries))
+        self.assertEqual(Question.objects.count(), 3)
+        self.assertEqual(num_queries[0], num_queries[1])
+
+    def test_changed_test_case_updated(self):
+        config_file = "multiple-questions.yaml"
+        with tempfile.TemporaryDirectory() as base_path:
+            shutil.copytree(self.BASE_PATH, base_path, dirs_exist_ok=True)
+            QuestionsLoader(structure_filename=config_file, base_path=base_path).load()
+            test_case = QuestionTypeProgramTestCase.objects.get(question__slug='say-hello-program')
+            with open(os.path.join(base_path, 'en', 'say-hello', 'test-case-1-output.txt'), 'w') as output_file:
+                output_file.write('Hi!\n')
+            QuestionsLoader(structure_filename=config_file, base_path=base_path).load()
+        updated_test_case = QuestionTypeProgramTestCase.objects.get(question__slug='say-hello-program')
+        self.assertEqual(updated_test_case.pk, test_case.pk)
+        self.assertEqual(updated_test_case.expected_output, 'Hi!\n')
+        self.assertEqual(updated_test_case.test_input, test_case.test_input)
@@ -0,0 +1,169 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from programming.attempt_queue import (
+    get_previous_user_code,
+    process_queued_attempts,
+    queue_attempt,
+)
+from programming.codewof_utils import POINTS_SOLUTION, calculate_achievement_points, verify_profile_stats
+from programming.models import (
+    Attempt,
+    Earned,
+    Profile,
+    ProfileStats,
+    QuestionTypeProgram,
+    QueuedAttempt,
+    TestCaseAttempt,
+)
+from tests.codewof_test_data_generator import (
+    generate_users,
+    generate_questions,
+    generate_test_cases,
+    generate_achievements,
+)
+from tests.conftest import user
+
+
+class AttemptQueueTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_users(user)
+        generate_questions()
+        generate_test_cases()
+        generate_achievements()
+        cls.question = QuestionTypeProgram.objects.get(slug='program-question-1')
+
+    def setUp(self):
+        self.profile = Profile.objects.get(user__pk=1)
+        self.earned_ids = set(Earned.objects.filter(profile=self.profile).values_list('pk', flat=True))
+
+    def get_new_achievement_points(self):
+        new_earned = Earned.objects.filter(profile=self.profile).exclude(pk__in=self.earned_ids)
+        return calculate_achievement_points([earned.achievement for earned in new_earned])
+
+    def test_queue_attempt_does_not_save_attempt(self):
+        queue_attempt(self.profile, self.question, 'print(1)', {1: {'passed': True}})
+        self.assertEqual(Attempt.objects.count(), 0)
+        queued_attempt = QueuedAttempt.objects.get()
+        self.assertTrue(queued_attempt.passed_tests)
+        self.assertEqual(queued_attempt.test_cases, {'1': True})
+
+    def test_queue_attempt_expected_points(self):
+        self.assertEqual(queue_attempt(self.profile, self.question, 'print(1)', {1: {'passed': False}}), 0)
+        point_diff = queue_attempt(self.profile, self.question, 'print(2)', {1: {'passed': True}})
+        self.assertEqual(point_diff, POINTS_SOLUTION)
+        # Already solved by a queued attempt
+        self.assertEqual(queue_attempt(self.profile, self.question, 'print(3)', {1: {'passed': True}}), 0)
+
+    def test_get_previous_user_code(self):
+        self.assertIsNone(get_previous_user_code(self.profile, self.question))
+        Attempt.objects.create(profile=self.profile, question=self.question, user_code='saved', passed_tests=False)
+        self.assertEqual(get_previous_user_code(self.profile, self.question), 'saved')
+        queue_attempt(self.profile, self.question, 'queued', {1: {'passed': False}})
+        self.assertEqual(get_previous_user_code(self.profile, self.question), 'queued')
+
+    def test_process_queued_attempts(self):
+        queue_attempt(self.profile, self.question, 'print(1)', {1: {'passed': False}})
+        queue_attempt(self.profile, self.question, 'print(2)', {1: {'passed': True}})
+        self.assertEqual(process_queued_attempts(), 2)
+        self.assertFalse(QueuedAttempt.objects.exists())
+        attempts = Attempt.objects.order_by('pk')
+        self.assertEqual([attempt.user_code for attempt in attempts], ['print(1)', 'print(2)'])
+        self.assertEqual([attempt.passed_tests for attempt in attempts], [False, True])
+        self.assertEqual(
+            list(TestCaseAttempt.objects.order_by('attempt').values_list('test_case_id', 'passed')),
+            [(1, False), (1, True)],
+        )
+
+    def test_process_queued_attempts_exactly_once(self):
+        queue_attempt(self.profile, self.question, 'print(1)', {1: {'passed': True}})
+        self.assertEqual(process_queued_attempts(), 1)
+        self.assertEqual(process_queued_attempts(), 0)
+        self.assertEqual(Attempt.objects.count(), 1)
+        self.assertEqual(TestCaseAttempt.objects.count(), 1)
+
+    def test_process_queued_attempts_batch_size(self):
+        for i in range(3):
+            queue_attempt(self.profile, self.question, 'print({})'.format(i), {1: {'passed': False}})
+        self.assertEqual(process_queued_attempts(batch_size=2), 2)
+        self.assertEqual(QueuedAttempt.objects.get().user_code, 'print(2)')
+
+    def test_process_queued_attempts_updates_profile(self):
+        queue_attempt(self.profile, self.question, 'print(1)', {1: {'passed': True}})
+        process_queued_attempts()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.stats.questions_solved, 1)
+        self.assertEqual(self.profile.stats.attempts_made, 1)
+        earned = set(self.profile.earned_achievements.values_list('id_name', flat=True))
+        self.assertIn('questions-solved-1', earned)
+        self.assertIn('attempts-made-1', earned)
+        self.assertGreater(self.profile.points, POINTS_SOLUTION)
+
+    def test_process_queued_attempts_adds_points(self):
+        # Points from other sources are kept, as points are not recalculated from all attempts
+        self.profile.points = 1000
+        self.profile.save()
+        self.profile.refresh_from_db()
+        points = self.profile.points
+        queue_attempt(self.profile, self.question, 'print(1)', {1: {'passed': True}})
+        queue_attempt(self.profile, self.question, 'print(2)', {1: {'passed': True}})
+        process_queued_attempts()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.points, points + POINTS_SOLUTION + self.get_new_achievement_points())
+        self.assertFalse(self.profile.has_backdated)
+
+    def test_process_queued_attempts_updates_existing_stats(self):
+        Attempt.objects.create(profile=self.profile, question=self.question, user_code='saved', passed_tests=True)
+        self.assertEqual(self.profile.stats.attempts_made, 1)
+        points = Profile.objects.get(pk=self.profile.pk).points
+        queue_attempt(self.profile, self.question, 'print(1)', {1: {'passed': True}})
+        process_queued_attempts()
+        self.assertEqual(verify_profile_stats(self.profile), {})
+        stats = ProfileStats.objects.get(profile=self.profile)
+        self.assertEqual(stats.attempts_made, 2)
+        self.assertEqual(stats.questions_solved, 1)
+        # Already solved, so only new achievements award points
+        self.assertEqual(Profile.objects.get(pk=self.profile.pk).points, points + self.get_new_achievement_points())
+
+    def test_process_queued_attempts_skips_deleted_test_cases(self):
+        queue_attempt(self.profile, self.question, 'print(1)', {1: {'passed': True}, 999: {'passed': True}})
+        self.assertEqual(process_queued_attempts(), 1)
+        self.assertEqual(list(TestCaseAttempt.objects.values_list('test_case_id', flat=True)), [1])
+
+    def test_process_attempt_queue_command(self):
+        queue_attempt(self.profile, self.question, 'print(1)', {1: {'passed': True}})
+        out = StringIO()
+        call_command('process_attempt_queue', '--once', stdout=out)
+        self.assertIn('1 queued attempts saved.', out.getvalue())
+        self.assertEqual(Attempt.objects.count(), 1)
+
+    @override_settings(PROGRAMMING_ATTEMPT_QUEUE=True)
+    def test_save_question_attempt_queued(self):
+        client = Client()
+        client.login(email='john@uclive.ac.nz', password='onion')
+        data = {'question': self.question.pk, 'user_input': 'print(1)', 'test_cases': {1: {'passed': True}}}
+        resp = client.post(
+            '/ajax/save_question_attempt/',
+            data=data,
+            content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        result = json.loads(resp.content)
+        self.assertTrue(result['success'])
+        self.assertTrue(result['queued'])
+        self.assertEqual(result['point_diff'], POINTS_SOLUTION)
+        self.assertEqual(Attempt.objects.count(), 0)
+        self.assertEqual(QueuedAttempt.objects.count(), 1)
+        # Same code as the queued attempt is not queued again
+        resp = client.post(
+            '/ajax/save_question_attempt/',
+            data=data,
+            content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertFalse(json.loads(resp.content)['success'])
+        self.assertEqual(QueuedAttempt.objects.count(), 1)
@@ -1,13 +1,24 @@
+import datetime
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
 from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 
 from programming.models import (
+    Profile,
+    ProfileStats,
     Question,
     Attempt,
     Achievement,
     Earned,
     DifficultyLevel,
     ProgrammingConcepts,
+    QuestionBankVersion,
     QuestionContexts,
 )
 from tests.codewof_test_data_generator import (
@@ -21,16 +32,27 @@ from programming.codewof_utils import (
     add_points,
     backdate_points,
     backdate_points_and_achievements,
+    backdate_points_and_achievements_in_bulk,
     calculate_achievement_points,
     check_achievement_conditions,
     filter_attempts_in_past_month,
     get_days_consecutively_answered,
     get_questions_answered_in_past_month,
+    get_profile_stats,
+    rebuild_profile_stats,
+    verify_profile_stats,
     POINTS_ACHIEVEMENT,
     POINTS_SOLUTION,
 )
 from programming.skill_and_level_tracking import get_level_and_skill_dict, get_level_and_skill_info
-from programming.question_recommendations import get_scores, get_recommended_questions, get_unsolved_questions
+from programming.question_recommendations import (
+    get_scores,
+    get_recommended_questions,
+    get_unsolved_question_pks,
+    get_cached_recommendations,
+    get_recommendations_cache_key,
+)
+from programming.question_index import VERSION_TIMEOUT, get_question_index, invalidate_question_index
 from tests.conftest import user
 
 User = get_user_model()
@@ -44,6 +66,10 @@ class TestCodewofUtils(TestCase):
         generate_questions()
         generate_achievements()
 
+    def setUp(self):
+        # The question bank version is rolled back with each test, so cached recommendations could be reused
+        caches[settings.RECOMMENDATIONS_CACHE].clear()
+
     def test_add_points_first_attempt_correct(self):
         user = User.objects.get(id=1)
         question = Question.objects.get(slug='question-1')
@@ -293,8 +319,15 @@ class TestCodewofUtils(TestCase):
     def test_get_num_unsolved_questions(self):
         generate_attempts_multiple_questions()
         user = User.objects.get(id=1)
-        num_unsolved_questions = len(get_unsolved_questions(user.profile))
-        self.assertEqual(num_unsolved_questions, 4)
+        unsolved_question_pks = get_unsolved_question_pks(user.profile)
+        self.assertEqual(len(unsolved_question_pks), 4)
+        index = get_question_index(unsolved_question_pks)
+        questions = [
+            question
+            for level in DifficultyLevel.objects.values_list('level', flat=True)
+            for question in index.filter(unsolved_question_pks, level)
+        ]
+        self.assertEqual({question.pk for question in questions}, unsolved_question_pks)
 
     def test_get_num_recommended_questions(self):
         generate_attempts_multiple_questions()
@@ -347,3 +380,203 @@ class TestCodewofUtils(TestCase):
         self.assertTrue(
             User.objects.get(id=2).profile.earned_achievements.filter(id_name='attempts-made-5').exists()
         )
+
+    def test_profile_stats_updated_on_new_attempts(self):
+        generate_attempts()
+        user = User.objects.get(id=1)
+        stats = get_profile_stats(user.profile)
+        self.assertEqual(stats.attempts_made, 5)
+        self.assertEqual(stats.questions_solved, 1)
+        self.assertEqual(stats.longest_streak, 2)
+        self.assertEqual(verify_profile_stats(user.profile), {})
+
+    def test_profile_stats_streak_continued(self):
+        user = User.objects.get(id=2)
+        question = Question.objects.get(slug='question-1')
+        Attempt.objects.create(profile=user.profile, question=question, datetime=datetime.date(2019, 9, 9))
+        Attempt.objects.create(profile=user.profile, question=question, datetime=datetime.date(2019, 9, 10))
+        Attempt.objects.create(profile=user.profile, question=question, datetime=datetime.date(2019, 9, 11))
+        Attempt.objects.create(profile=user.profile, question=question, datetime=datetime.date(2019, 9, 20))
+        stats = get_profile_stats(user.profile)
+        self.assertEqual(stats.current_streak, 1)
+        self.assertEqual(stats.longest_streak, 3)
+        self.assertEqual(stats.last_attempt_date, datetime.date(2019, 9, 20))
+        self.assertEqual(verify_profile_stats(user.profile), {})
+
+    def test_profile_stats_attempt_before_last_attempt(self):
+        user = User.objects.get(id=2)
+        question = Question.objects.get(slug='question-1')
+        Attempt.objects.create(profile=user.profile, question=question, datetime=datetime.date(2019, 9, 9))
+        Attempt.objects.create(profile=user.profile, question=question, datetime=datetime.date(2019, 9, 11))
+        Attempt.objects.create(profile=user.profile, question=question, datetime=datetime.date(2019, 9, 10))
+        stats = get_profile_stats(user.profile)
+        self.assertEqual(stats.current_streak, 3)
+        self.assertEqual(stats.longest_streak, 3)
+        self.assertEqual(stats.last_attempt_date, datetime.date(2019, 9, 11))
+
+    def test_profile_stats_same_question_solved_twice(self):
+        user = User.objects.get(id=2)
+        question = Question.objects.get(slug='question-1')
+        Attempt.objects.create(profile=user.profile, question=question, passed_tests=True)
+        Attempt.objects.create(profile=user.profile, question=question, passed_tests=True)
+        stats = get_profile_stats(user.profile)
+        self.assertEqual(stats.attempts_made, 2)
+        self.assertEqual(stats.questions_solved, 1)
+
+    def test_profile_stats_rebuilt_when_missing(self):
+        generate_attempts()
+        user = User.objects.get(id=1)
+        ProfileStats.objects.filter(profile=user.profile).delete()
+        stats = get_profile_stats(user.profile)
+        self.assertEqual(stats.attempts_made, 5)
+        self.assertEqual(stats.questions_solved, 1)
+
+    def test_profile_stats_rebuilt_when_attempt_deleted(self):
+        generate_attempts()
+        user = User.objects.get(id=1)
+        Attempt.objects.filter(profile=user.profile, passed_tests=False).delete()
+        self.assertEqual(get_profile_stats(user.profile).attempts_made, 3)
+        self.assertEqual(verify_profile_stats(user.profile), {})
+
+    def test_verify_profile_stats_mismatch(self):
+        generate_attempts()
+        user = User.objects.get(id=1)
+        ProfileStats.objects.filter(profile=user.profile).update(attempts_made=1)
+        self.assertEqual(verify_profile_stats(user.profile), {'attempts_made': (1, 5)})
+        rebuild_profile_stats(user.profile)
+        self.assertEqual(verify_profile_stats(user.profile), {})
+
+    def test_check_achievement_conditions_constant_queries(self):
+        user = User.objects.get(id=2)
+        question = Question.objects.get(slug='question-1')
+        Attempt.objects.create(profile=user.profile, question=question, passed_tests=True)
+        check_achievement_conditions(user.profile)
+        with CaptureQueriesContext(connection) as context:
+            check_achievement_conditions(user.profile)
+        num_queries = len(context.captured_queries)
+
+        for day in range(1, 29):
+            for i in range(5):
+                Attempt.objects.create(profile=user.profile, question=question, datetime=datetime.date(2019, 2, day))
+        check_achievement_conditions(user.profile)
+        with CaptureQueriesContext(connection) as context:
+            check_achievement_conditions(user.profile)
+        self.assertEqual(len(context.captured_queries), num_queries)
+
+    def test_backdate_points_and_achievements_in_bulk_too_many_points(self):
+        generate_attempts()
+        user = User.objects.get(id=1)
+        user.profile.points = 1000
+        user.profile.save()
+        backdate_points_and_achievements_in_bulk()
+        self.assertEqual(User.objects.get(id=1).profile.points, 60)
+        self.assertTrue(User.objects.get(id=1).profile.has_backdated)
+
+    def test_backdate_points_and_achievements_in_bulk_run_twice(self):
+        generate_attempts()
+        backdate_points_and_achievements_in_bulk(chunk_size=1)
+        backdate_points_and_achievements_in_bulk(chunk_size=1)
+        self.assertEqual(User.objects.get(id=1).profile.points, 60)
+        earned_achievements = User.objects.get(id=1).profile.earned_achievements
+        self.assertEqual(len(earned_achievements.filter(id_name='create-account')), 1)
+        self.assertEqual(len(earned_achievements.filter(id_name='attempts-made-1')), 1)
+        self.assertEqual(len(earned_achievements.filter(id_name='attempts-made-5')), 1)
+        self.assertEqual(len(earned_achievements.filter(id_name='questions-solved-1')), 1)
+        self.assertEqual(len(earned_achievements.filter(id_name='consecutive-days-2')), 1)
+
+    def test_backdate_points_and_achievements_in_bulk_achievement_earnt_no_longer_meets_requirements(self):
+        user = User.objects.get(id=2)
+        achievement = Achievement.objects.get(id_name='attempts-made-5')
+        Earned.objects.create(profile=user.profile, achievement=achievement)
+        backdate_points_and_achievements_in_bulk()
+        profile = User.objects.get(id=2).profile
+        self.assertTrue(profile.earned_achievements.filter(id_name='attempts-made-5').exists())
+        self.assertEqual(profile.points, POINTS_ACHIEVEMENT * achievement.achievement_tier)
+
+    def test_backdate_points_and_achievements_in_bulk_matches_individual_backdate(self):
+        generate_attempts_multiple_questions()
+        backdate_points_and_achievements()
+        expected = {
+            profile.pk: (profile.points, sorted(profile.earned_achievements.values_list('id_name', flat=True)))
+            for profile in Profile.objects.all()
+        }
+        Earned.objects.all().delete()
+        ProfileStats.objects.all().delete()
+        backdate_points_and_achievements_in_bulk(chunk_size=2)
+        actual = {
+            profile.pk: (profile.points, sorted(profile.earned_achievements.values_list('id_name', flat=True)))
+            for profile in Profile.objects.all()
+        }
+        self.assertEqual(actual, expected)
+        for profile in Profile.objects.all():
+            self.assertEqual(verify_profile_stats(profile), {})
+
+    def test_backdate_points_and_achievements_in_bulk_constant_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            backdate_points_and_achievements_in_bulk()
+        num_queries = len(context.captured_queries)
+        generate_attempts()
+        generate_attempts_multiple_questions()
+        with CaptureQueriesContext(connection) as context:
+            backdate_points_and_achievements_in_bulk()
+        self.assertEqual(len(context.captured_queries), num_queries)
+
+    def test_get_level_and_skill_info_constant_queries(self):
+        user = User.objects.get(id=1)
+        Attempt.objects.create(profile=user.profile, question=Question.objects.get(slug='question-1'),
+                               passed_tests=True)
+        get_level_and_skill_info(user.profile)
+        with CaptureQueriesContext(connection) as context:
+            get_level_and_skill_info(user.profile)
+        num_queries = len(context.captured_queries)
+
+        generate_attempts_multiple_questions()
+        for question in Question.objects.all():
+            Attempt.objects.create(profile=user.profile, question=question, passed_tests=False)
+            Attempt.objects.create(profile=user.profile, question=question, passed_tests=True)
+        with CaptureQueriesContext(connection) as context:
+            level_and_skill_info = get_level_and_skill_info(user.profile)
+        self.assertEqual(len(context.captured_queries), num_queries)
+        self.assertEqual(
+            sum(info['num_solved'] for info in level_and_skill_info['all']['difficulty_level'].values()),
+            Question.objects.count(),
+        )
+
+    def test_get_recommended_questions_cached(self):
+        generate_attempts_multiple_questions()
+        user = User.objects.get(id=1)
+        get_recommended_questions(user.profile)
+        with CaptureQueriesContext(connection) as context:
+            num_recommended_questions = len(get_recommended_questions(user.profile))
+        self.assertEqual(num_recommended_questions, 2)
+        # Only the profile statistics used to version the cache key are queried
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_recommendations_cache_key_changes_on_new_attempt(self):
+        user = User.objects.get(id=1)
+        key = get_recommendations_cache_key(user.profile)
+        Attempt.objects.create(profile=user.profile, question=Question.objects.get(slug='question-1'))
+        self.assertNotEqual(get_recommendations_cache_key(user.profile), key)
+
+    def test_recommendations_cache_key_changes_on_question_reload(self):
+        user = User.objects.get(id=1)
+        key = get_recommendations_cache_key(user.profile)
+        invalidate_question_index()
+        self.assertNotEqual(get_recommendations_cache_key(user.profile), key)
+
+    def test_recommendations_cache_key_changes_on_question_reload_by_another_process(self):
+        user = User.objects.get(id=1)
+        key = get_recommendations_cache_key(user.profile)
+        QuestionBankVersion.objects.update_or_create(pk=1, defaults={'version': 100})
+        later = time.monotonic() + VERSION_TIMEOUT + 1
+        with mock.patch('programming.question_index.time.monotonic', return_value=later):
+            self.assertNotEqual(get_recommendations_cache_key(user.profile), key)
+
+    def test_cached_recommendations_exclude_solved_question(self):
+        user = User.objects.get(id=1)
+        recommendations = get_cached_recommendations(user.profile)
+        candidates = set(recommendations['candidates'][0]) | set(recommendations['candidates'][1])
+        for question in Question.objects.filter(pk__in=candidates):
+            Attempt.objects.create(profile=user.profile, question=question, passed_tests=True)
+        recommendations = get_cached_recommendations(user.profile)
+        self.assertTrue(candidates.isdisjoint(recommendations['candidates'][0]))
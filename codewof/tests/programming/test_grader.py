@@ -0,0 +1,270 @@
+import json
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase, SimpleTestCase, override_settings
+
+from programming.models import (
+    Attempt,
+    Question,
+    QuestionTypeFunction,
+    QuestionTypeFunctionTestCase,
+    QuestionTypeProgram,
+    QuestionTypeProgramTestCase,
+    TestCaseAttempt,
+)
+from programming.grader import grade_attempt, grade_attempts, get_test_cases
+from programming.sandbox import Limits, SandboxError, SandboxPool, run_test
+from tests.codewof_test_data_generator import (
+    generate_users,
+    generate_questions,
+    generate_achievements,
+)
+from tests.conftest import user
+
+LIMITS = Limits(time_limit=2, memory_limit=64 * 1024 * 1024, isolate=False)
+ISOLATED_LIMITS = Limits(time_limit=2, memory_limit=64 * 1024 * 1024)
+
+
+def can_isolate():
+    """Return whether this process has permission to isolate code."""
+    try:
+        run_test('', '', ISOLATED_LIMITS)
+    except SandboxError:
+        return False
+    return True
+
+
+class SandboxTest(SimpleTestCase):
+
+    def test_run_test_output(self):
+        result = run_test('print(input() * 2)', 'ab\n', LIMITS)
+        self.assertEqual(result, {'output': 'abab\n', 'runtime_error': False})
+
+    def test_run_test_input_prompt_not_output(self):
+        result = run_test('name = input("Name? ")\nprint(name)\nprint(input() == "")', 'Ann\n', LIMITS)
+        self.assertEqual(result, {'output': 'Ann\nTrue\n', 'runtime_error': False})
+
+    def test_run_test_runtime_error(self):
+        result = run_test('x = 1\nprint(1 / 0)', '', LIMITS)
+        self.assertTrue(result['runtime_error'])
+        self.assertIn('File "<exec>", line 2', result['output'])
+        self.assertTrue(result['output'].endswith('ZeroDivisionError: division by zero\n'))
+
+    def test_run_test_syntax_error(self):
+        result = run_test('def f(:\n    pass', '', LIMITS)
+        self.assertTrue(result['runtime_error'])
+        self.assertIn('SyntaxError', result['output'])
+
+    def test_run_test_time_limit(self):
+        result = run_test('while True:\n    pass', '', Limits(time_limit=1, memory_limit=None, isolate=False))
+        self.assertEqual(result, {'output': 'Timeout: Code execution exceeded 1 seconds', 'runtime_error': True})
+
+    def test_run_test_memory_limit(self):
+        result = run_test('x = "a" * (256 * 1024 * 1024)', '', LIMITS)
+        self.assertTrue(result['runtime_error'])
+        self.assertIn('MemoryError', result['output'])
+
+    def test_run_test_environment_cleared(self):
+        result = run_test('import os\nprint(len(os.environ))', '', LIMITS)
+        self.assertEqual(result['output'], '0\n')
+
+    def test_run_test_isolated(self):
+        run_test('import builtins\nbuiltins.print = None', '', LIMITS)
+        result = run_test('print(1)', '', LIMITS)
+        self.assertEqual(result['output'], '1\n')
+
+    def test_pool_in_process(self):
+        pool = SandboxPool(0, LIMITS, None)
+        results = pool.run_many([
+            [{'code': 'print(1)', 'stdin': ''}],
+            [{'code': 'print(2)', 'stdin': ''}, {'code': 'print(input())', 'stdin': '3'}],
+        ])
+        self.assertEqual(
+            [[result['output'] for result in job_results] for job_results in results],
+            [['1\n'], ['2\n', '3\n']],
+        )
+        statistics = pool.statistics()
+        self.assertEqual(statistics['queued_jobs'], 0)
+        self.assertEqual(statistics['completed_jobs'], 2)
+        self.assertIsNotNone(statistics['latency_p99'])
+
+    def test_pool_workers(self):
+        pool = SandboxPool(2, LIMITS, 2)
+        try:
+            pool.start()
+            jobs = [[{'code': 'print({})'.format(i), 'stdin': ''}] for i in range(5)]
+            results = pool.run_many(jobs)
+        finally:
+            pool.close()
+        self.assertEqual([job_results[0]['output'] for job_results in results], ['0\n', '1\n', '2\n', '3\n', '4\n'])
+        self.assertEqual(pool.statistics()['completed_jobs'], 5)
+
+
+@skipUnless(can_isolate(), 'Namespaces cannot be created')
+class IsolatedSandboxTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pool = SandboxPool(1, ISOLATED_LIMITS, None)
+        cls.pool.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+        super().tearDownClass()
+
+    def run_isolated(self, code):
+        return self.pool.run([{'code': code, 'stdin': ''}])[0]
+
+    def test_standard_library_available(self):
+        result = self.run_isolated('import math, random, re, json\nprint(math.sqrt(16))')
+        self.assertEqual(result, {'output': '4.0\n', 'runtime_error': False})
+
+    def test_project_not_available(self):
+        result = self.run_isolated('open({!r})'.format(__file__))
+        self.assertIn('FileNotFoundError', result['output'])
+        result = self.run_isolated('import django')
+        self.assertIn('ModuleNotFoundError', result['output'])
+
+    def test_environment_cleared(self):
+        result = self.run_isolated('import os\nprint(len(os.environ), len(os.environb))')
+        self.assertEqual(result['output'], '0 0\n')
+
+    def test_proc_not_available(self):
+        result = self.run_isolated('import os\nopen("/proc/{}/environ".format(os.getppid()))')
+        self.assertIn('FileNotFoundError', result['output'])
+
+    def test_file_system_read_only(self):
+        result = self.run_isolated('import os\nos.unlink(os.__file__)')
+        self.assertIn('Read-only file system', result['output'])
+
+    def test_network_not_available(self):
+        result = self.run_isolated('import socket\nsocket.create_connection(("1.1.1.1", 80), timeout=1)')
+        self.assertIn('Network is unreachable', result['output'])
+
+    def test_unprivileged(self):
+        result = self.run_isolated('import os\nos.fork()')
+        self.assertIn('Resource temporarily unavailable', result['output'])
+        result = self.run_isolated('import os\nos.chroot("/")')
+        self.assertIn('Operation not permitted', result['output'])
+
+    def test_pool_in_process_not_allowed(self):
+        with self.assertRaises(ValueError):
+            SandboxPool(0, ISOLATED_LIMITS, None)
+
+
+class GraderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_users(user)
+        generate_questions()
+        generate_achievements()
+        program_question = QuestionTypeProgram.objects.get(slug='program-question-1')
+        QuestionTypeProgramTestCase.objects.create(
+            number=1,
+            test_input='2\n3',
+            expected_output='5\n',
+            question=program_question,
+        )
+        QuestionTypeProgramTestCase.objects.create(
+            number=2,
+            test_input='1\n1',
+            expected_output='2',
+            question=program_question,
+        )
+        function_question = QuestionTypeFunction.objects.get(slug='function-question-1')
+        QuestionTypeFunctionTestCase.objects.create(
+            number=1,
+            test_code='print(double(2))',
+            expected_output='4',
+            question=function_question,
+        )
+        QuestionTypeFunctionTestCase.objects.create(
+            number=2,
+            test_code='print(double("a"))',
+            expected_output='aa',
+            question=function_question,
+        )
+
+    def get_passed(self, grades):
+        return [grade['passed'] for grade in grades.values()]
+
+    def test_get_test_cases_from_base_question(self):
+        question = Question.objects.get(slug='program-question-1')
+        self.assertEqual([test_case.number for test_case in get_test_cases(question)], [1, 2])
+
+    def test_grade_program(self):
+        question = Question.objects.get(slug='program-question-1')
+        grades = grade_attempt(question, 'print(int(input()) + int(input()))')
+        self.assertEqual(self.get_passed(grades), [True, True])
+
+    def test_grade_program_failed(self):
+        question = Question.objects.get(slug='program-question-1')
+        grades = grade_attempt(question, 'print(int(input()) * int(input()))')
+        self.assertEqual(self.get_passed(grades), [False, False])
+        self.assertEqual([grade['received_output'] for grade in grades.values()], ['6\n', '1\n'])
+
+    def test_grade_function(self):
+        question = Question.objects.get(slug='function-question-1')
+        grades = grade_attempt(question, 'def double(x):\n    return x * 2')
+        self.assertEqual(self.get_passed(grades), [True, True])
+
+    def test_grade_function_runtime_error(self):
+        question = Question.objects.get(slug='function-question-1')
+        grades = grade_attempt(question, 'def double(x):\n    return x + 2')
+        self.assertEqual(self.get_passed(grades), [True, False])
+        self.assertTrue(list(grades.values())[1]['runtime_error'])
+
+    def test_grade_attempts(self):
+        program_question = Question.objects.get_subclass(slug='program-question-1')
+        function_question = Question.objects.get_subclass(slug='function-question-1')
+        grades = grade_attempts([
+            (program_question, get_test_cases(program_question), 'print(5)'),
+            (function_question, get_test_cases(function_question), 'def double(x):\n    return x * 2'),
+        ])
+        self.assertEqual([self.get_passed(grade) for grade in grades], [[True, False], [True, True]])
+
+    @override_settings(PROGRAMMING_SERVER_GRADING=True)
+    def test_save_question_attempt_graded_on_server(self):
+        self.client.login(email='john@uclive.ac.nz', password='onion')
+        question = Question.objects.get(slug='program-question-1')
+        test_case_pks = [test_case.pk for test_case in get_test_cases(question)]
+        response = self.client.post(
+            '/ajax/save_question_attempt/',
+            data={
+                'question': question.pk,
+                'user_input': 'print(5)',
+                'test_cases': {pk: {'passed': True} for pk in test_case_pks},
+            },
+            content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertTrue(json.loads(response.content)['success'])
+        attempt = Attempt.objects.get(question=question, user_code='print(5)')
+        self.assertFalse(attempt.passed_tests)
+        test_case_attempts = TestCaseAttempt.objects.filter(attempt=attempt).order_by('test_case__pk')
+        self.assertEqual(list(test_case_attempts.values_list('passed', flat=True)), [True, False])
+
+    @override_settings(PROGRAMMING_SERVER_GRADING=True)
+    def test_save_question_attempt_graded_outside_transaction(self):
+        test_savepoints = len(connection.savepoint_ids)
+        grading_savepoints = []
+
+        def grade(*args, **kwargs):
+            grading_savepoints.append(len(connection.savepoint_ids))
+            return grade_attempts(*args, **kwargs)
+
+        self.client.login(email='john@uclive.ac.nz', password='onion')
+        question = Question.objects.get(slug='program-question-1')
+        with mock.patch('programming.views.grade_attempts', side_effect=grade):
+            response = self.client.post(
+                '/ajax/save_question_attempt/',
+                data={'question': question.pk, 'user_input': 'print(5)', 'test_cases': {}},
+                content_type='application/json',
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            )
+        self.assertTrue(json.loads(response.content)['success'])
+        self.assertEqual(grading_savepoints, [test_savepoints])
+        self.assertTrue(Attempt.objects.filter(question=question, user_code='print(5)').exists())
@@ -0,0 +1,194 @@
+import datetime
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from programming.group_feed import get_group_feed, parse_cursor
+from programming.models import Attempt, GroupFeedEntry, Like, Question
+from tests.codewof_test_data_generator import (
+    generate_users,
+    generate_questions,
+    generate_groups,
+    generate_memberships,
+    generate_feed_attempts,
+)
+from tests.conftest import user
+from users.models import Group, GroupRole, Membership, User
+
+
+class GroupFeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_users(user)
+        generate_questions()
+        generate_groups()
+        generate_memberships()
+        cls.attempts = generate_feed_attempts()
+        cls.group = Group.objects.get(name='Group North')
+
+    def get_all_attempts(self, page_size):
+        attempts = []
+        cursor = None
+        while True:
+            entries, cursor = get_group_feed(self.group, cursor, page_size)
+            attempts.extend(entry.attempt for entry in entries)
+            if cursor is None:
+                return attempts
+
+    def sorted_attempts(self):
+        return sorted(self.attempts, key=lambda attempt: (attempt.datetime, attempt.pk), reverse=True)
+
+    def test_entries_created_for_passed_attempts(self):
+        self.assertEqual(GroupFeedEntry.objects.filter(group=self.group).count(), len(self.attempts))
+
+    def test_no_entries_for_disabled_feed(self):
+        group_east = Group.objects.get(name='Group East')
+        self.assertFalse(GroupFeedEntry.objects.filter(group=group_east).exists())
+
+    def test_no_entry_for_failed_attempt(self):
+        Attempt.objects.create(
+            profile_id=1,
+            question=Question.objects.first(),
+            user_code='failed',
+            passed_tests=False,
+        )
+        self.assertEqual(GroupFeedEntry.objects.filter(group=self.group).count(), len(self.attempts))
+
+    def test_first_page(self):
+        entries, cursor = get_group_feed(self.group)
+        self.assertEqual([entry.attempt for entry in entries], self.sorted_attempts()[:10])
+        self.assertIsNotNone(cursor)
+
+    def test_pages(self):
+        self.assertEqual(self.get_all_attempts(3), self.sorted_attempts())
+
+    def test_invalid_cursor_gives_first_page(self):
+        self.assertIsNone(parse_cursor('not-a-cursor'))
+        entries, _ = get_group_feed(self.group, 'not-a-cursor')
+        self.assertEqual([entry.attempt for entry in entries], self.sorted_attempts()[:10])
+
+    def test_cursor_with_attempt_id_out_of_range_gives_first_page(self):
+        self.assertIsNone(parse_cursor('1_99999999999999999999'))
+        self.assertIsNone(parse_cursor('1_0'))
+        self.client.login(email='john@uclive.ac.nz', password='onion')
+        resp = self.client.get(
+            reverse('users:groups-detail', args=[self.group.pk]),
+            {'feed_before': '1_99999999999999999999'},
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    def test_entries_created_when_feed_first_read(self):
+        GroupFeedEntry.objects.all().delete()
+        entries, _ = get_group_feed(self.group)
+        self.assertEqual([entry.attempt for entry in entries], self.sorted_attempts()[:10])
+        self.assertEqual(GroupFeedEntry.objects.filter(group=self.group).count(), len(self.attempts))
+
+    @mock.patch('programming.group_feed.FEED_BACKFILL_SIZE', 4)
+    def test_attempts_older_than_entries_read_from_attempts(self):
+        GroupFeedEntry.objects.all().delete()
+        self.assertEqual(self.get_all_attempts(3), self.sorted_attempts())
+        self.assertEqual(GroupFeedEntry.objects.filter(group=self.group).count(), 4)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.feed_entries_after, Attempt.objects.get(pk=self.sorted_attempts()[3].pk).datetime)
+
+    @mock.patch('programming.group_feed.FEED_BACKFILL_SIZE', 2)
+    def test_no_gaps_after_new_member_with_older_attempts(self):
+        # Sally leaves and the entries are created without her attempts, then she joins again
+        Membership.objects.filter(user_id=2, group=self.group).delete()
+        GroupFeedEntry.objects.all().delete()
+        get_group_feed(self.group)
+        for day in (1, 2):
+            Attempt.objects.create(
+                profile_id=2,
+                question=Question.objects.first(),
+                passed_tests=True,
+                datetime=datetime.datetime(2020, 12, day, tzinfo=datetime.timezone.utc),
+            )
+        Membership.objects.create(user_id=2, group=self.group, role=GroupRole.objects.get(name='Member'))
+        self.group.refresh_from_db()
+        self.assertEqual(
+            self.get_all_attempts(3),
+            list(Attempt.objects.filter(passed_tests=True, profile_id__in=[1, 2, 3]).order_by('-datetime', '-pk')),
+        )
+
+    def test_feed_disabled_deletes_entries(self):
+        self.group.feed_enabled = False
+        self.group.save()
+        self.assertFalse(GroupFeedEntry.objects.filter(group=self.group).exists())
+
+    def test_like_users(self):
+        attempt = self.sorted_attempts()[0]
+        Like.objects.create(attempt=attempt, user_id=3)
+        Like.objects.create(attempt=attempt, user_id=4)
+        entry = GroupFeedEntry.objects.get(group=self.group, attempt=attempt)
+        # User 4 is not a member of the group
+        self.assertEqual(entry.like_users, [3])
+        Like.objects.filter(attempt=attempt, user_id=3).delete()
+        entry.refresh_from_db()
+        self.assertEqual(entry.like_users, [])
+
+    def test_like_users_names_read_with_feed(self):
+        attempt = self.sorted_attempts()[0]
+        Like.objects.create(attempt=attempt, user_id=3)
+        Like.objects.create(attempt=attempt, user_id=1)
+        User.objects.filter(pk=3).update(first_name='Aaron')
+        entries, _ = get_group_feed(self.group)
+        self.assertEqual(
+            [user.full_name() for user in entries[0].group_like_users],
+            ['Aaron Atkinson', 'John Doe'],
+        )
+
+    def test_new_member(self):
+        group_east = Group.objects.get(name='Group East')
+        group_east.feed_enabled = True
+        group_east.save()
+        get_group_feed(group_east)
+        Membership.objects.create(user_id=2, group=group_east, role=GroupRole.objects.get(name='Member'))
+        sally_attempts = set(Attempt.objects.filter(profile_id=2, passed_tests=True))
+        self.assertEqual(
+            {entry.attempt for entry in GroupFeedEntry.objects.filter(group=group_east, attempt__profile_id=2)},
+            sally_attempts,
+        )
+
+    def test_member_leaves(self):
+        attempt = Attempt.objects.filter(profile_id=1).first()
+        Like.objects.create(attempt=attempt, user_id=2)
+        Membership.objects.filter(user_id=2, group=self.group).delete()
+        self.assertFalse(GroupFeedEntry.objects.filter(group=self.group, attempt__profile_id=2).exists())
+        self.assertEqual(GroupFeedEntry.objects.get(group=self.group, attempt=attempt).like_users, [])
+
+    def test_members_removed_together(self):
+        attempt = Attempt.objects.filter(profile_id=1).first()
+        Like.objects.create(attempt=attempt, user_id=2)
+        Like.objects.create(attempt=attempt, user_id=3)
+        self.client.login(email='john@uclive.ac.nz', password='onion')
+        body = json.dumps({
+            "memberships": [
+                {"id": membership.pk, "delete": True, "role": "Member"}
+                for membership in Membership.objects.filter(group=self.group, user_id__in=[2, 3])
+            ]
+        })
+        self.client.put(reverse('users:groups-memberships-update', args=[self.group.pk]), body,
+                        content_type="application/json")
+        self.assertFalse(GroupFeedEntry.objects.filter(group=self.group, attempt__profile_id__in=[2, 3]).exists())
+        self.assertEqual(GroupFeedEntry.objects.get(group=self.group, attempt=attempt).like_users, [])
+
+    def test_detail_view_queries_independent_of_feed_likes(self):
+        self.client.login(email='john@uclive.ac.nz', password='onion')
+        url = reverse('users:groups-detail', args=[self.group.pk])
+        Like.objects.create(attempt=self.sorted_attempts()[0], user_id=3)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        num_queries = len(context.captured_queries)
+        for attempt in self.sorted_attempts()[1:10]:
+            for user_id in (2, 3):
+                if attempt.profile_id != user_id:
+                    Like.objects.create(attempt=attempt, user_id=user_id)
+        with self.assertNumQueries(num_queries):
+            resp = self.client.get(url)
+        self.assertContains(resp, 'Alex Atkinson')
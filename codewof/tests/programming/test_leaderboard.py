@@ -0,0 +1,136 @@
+from django.test import SimpleTestCase, TestCase
+
+from programming.leaderboard import (
+    InMemoryLeaderboardStore,
+    get_rank,
+    get_store,
+    get_top_profiles,
+    get_leaderboard_size,
+)
+from programming.codewof_utils import backdate_profiles
+from programming.models import Profile
+from tests.codewof_test_data_generator import (
+    generate_users,
+    generate_groups,
+    generate_memberships,
+)
+from tests.conftest import user
+from users.models import Group, Membership
+
+
+class InMemoryLeaderboardStoreTest(SimpleTestCase):
+
+    def setUp(self):
+        self.store = InMemoryLeaderboardStore()
+
+    def test_top(self):
+        self.store.update('board', {1: 10, 2: 30, 3: 20})
+        self.assertEqual(self.store.top('board', 2), [(2, 30), (3, 20)])
+
+    def test_top_missing_board(self):
+        self.assertEqual(self.store.top('board', 2), [])
+
+    def test_update_existing_member(self):
+        self.store.update('board', {1: 10, 2: 30})
+        self.store.update('board', {1: 40})
+        self.assertEqual(self.store.top('board', 5), [(1, 40), (2, 30)])
+        self.assertEqual(self.store.size('board'), 2)
+
+    def test_rank(self):
+        self.store.update('board', {1: 10, 2: 30, 3: 20})
+        self.assertEqual(self.store.rank('board', 2), (1, 30))
+        self.assertEqual(self.store.rank('board', 1), (3, 10))
+        self.assertIsNone(self.store.rank('board', 4))
+
+    def test_rank_equal_scores(self):
+        self.store.update('board', {1: 20, 2: 30, 3: 20, 4: 10})
+        self.assertEqual(self.store.rank('board', 1), (2, 20))
+        self.assertEqual(self.store.rank('board', 3), (2, 20))
+        self.assertEqual(self.store.rank('board', 4), (4, 10))
+
+    def test_remove(self):
+        self.store.update('board', {1: 10, 2: 30})
+        self.store.remove('board', [2, 5])
+        self.assertEqual(self.store.top('board', 5), [(1, 10)])
+
+    def test_replace(self):
+        self.store.update('board', {1: 10, 2: 30})
+        self.assertFalse(self.store.is_built('board'))
+        self.store.replace('board', {3: 5})
+        self.assertTrue(self.store.is_built('board'))
+        self.assertEqual(self.store.top('board', 5), [(3, 5)])
+
+    def test_delete(self):
+        self.store.replace('board', {1: 10})
+        self.store.delete('board')
+        self.assertFalse(self.store.is_built('board'))
+        self.assertEqual(self.store.size('board'), 0)
+
+
+class LeaderboardTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_users(user)
+        generate_groups()
+        generate_memberships()
+        for pk, points in [(1, 30), (2, 50), (3, 10), (4, 20)]:
+            Profile.objects.filter(pk=pk).update(points=points)
+        cls.group = Group.objects.get(name='Group North')
+
+    def setUp(self):
+        get_store().clear()
+
+    def test_top_profiles_global(self):
+        top = get_top_profiles(3)
+        self.assertEqual([(rank, profile.pk, points) for rank, profile, points in top], [
+            (1, 2, 50),
+            (2, 1, 30),
+            (3, 4, 20),
+        ])
+
+    def test_top_profiles_group(self):
+        member_ids = set(Membership.objects.filter(group=self.group).values_list('user_id', flat=True))
+        top = get_top_profiles(10, self.group)
+        self.assertEqual({profile.pk for _, profile, _ in top}, member_ids)
+        self.assertEqual(get_leaderboard_size(self.group), len(member_ids))
+
+    def test_rank_does_not_query_profiles_once_built(self):
+        get_rank(Profile.objects.get(pk=1))
+        profile = Profile.objects.get(pk=3)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_rank(profile), (4, 10))
+
+    def test_points_change_updates_leaderboards(self):
+        get_rank(Profile.objects.get(pk=1), self.group)
+        profile = Profile.objects.get(pk=1)
+        profile.points = 100
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(get_rank(profile), (1, 100))
+        self.assertEqual(get_rank(profile, self.group), (1, 100))
+
+    def test_points_not_updated_before_commit(self):
+        profile = Profile.objects.get(pk=3)
+        self.assertEqual(get_rank(profile), (4, 10))
+        profile.points = 100
+        profile.save()
+        self.assertEqual(get_rank(profile), (4, 10))
+
+    def test_backdate_updates_leaderboards(self):
+        profile = Profile.objects.get(pk=2)
+        self.assertEqual(get_rank(profile), (1, 50))
+        with self.captureOnCommitCallbacks(execute=True):
+            # No attempts or achievements, so points are reset to 0
+            backdate_profiles([profile.pk], [])
+        self.assertEqual(get_rank(profile), (4, 0))
+
+    def test_membership_changes_update_group_leaderboard(self):
+        profile = Profile.objects.get(pk=4)
+        get_rank(profile, self.group)
+        membership = Membership.objects.filter(group=self.group).exclude(user_id=profile.pk).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            Membership.objects.filter(group=self.group, user_id=profile.pk).delete()
+        self.assertIsNone(get_rank(profile, self.group))
+        with self.captureOnCommitCallbacks(execute=True):
+            Membership.objects.create(group=self.group, user_id=profile.pk, role=membership.role)
+        self.assertEqual(get_rank(profile, self.group)[1], 20)
@@ -70,6 +70,17 @@ class ProfileModelTests(TestCase):
         double_check_user = User.objects.get(id=2)
         self.assertEqual(double_check_user.profile.goal, 4)
 
+    def test_profile_saved_with_user(self):
+        user = User.objects.get(id=2)
+        user.profile.goal = 4
+        user.save()
+        self.assertEqual(User.objects.get(id=2).profile.goal, 4)
+
+    def test_profile_not_saved_with_user_if_not_loaded(self):
+        user = User.objects.get(id=2)
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
     def test_cannot_set_goal_less_than_1(self):
         user = User.objects.get(id=2)
         with self.assertRaises(ValidationError):
@@ -414,3 +425,16 @@ class AttemptModelTests(TestCase):
         attempt = Attempt.objects.first()
         group_north = Group.objects.get(name="Group North")
         self.assertEqual(len(attempt.get_like_users_for_group(group_north.pk)), 2)
+
+    def test_get_like_users_for_groups(self):
+        attempt = Attempt.objects.first()
+        group_north = Group.objects.get(name="Group North")
+        group_east = Group.objects.get(name="Group East")
+        with self.assertNumQueries(1):
+            like_users = Attempt.get_like_users_for_groups([attempt], [group_north.pk, group_east.pk])
+        self.assertEqual(
+            like_users[(group_north.pk, attempt.pk)],
+            list(attempt.get_like_users_for_group(group_north.pk)),
+        )
+        self.assertEqual(len(like_users[(group_north.pk, attempt.pk)]), 2)
+        self.assertNotIn((group_east.pk, attempt.pk), like_users)
@@ -0,0 +1,88 @@
+import time
+from unittest import mock
+
+from django.test import TestCase
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from programming.models import Question, ProgrammingConcepts, QuestionBankVersion, QuestionContexts
+from programming.question_index import (
+    VERSION_TIMEOUT,
+    numbers_to_bitset,
+    get_question_index,
+    invalidate_question_index,
+)
+from programming.question_recommendations import get_recommendations
+from tests.codewof_test_data_generator import generate_questions
+
+
+class QuestionIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_questions()
+
+    def setUp(self):
+        invalidate_question_index()
+        self.all_pks = set(Question.objects.values_list('pk', flat=True))
+
+    def test_numbers_to_bitset(self):
+        self.assertEqual(numbers_to_bitset([]), 0)
+        self.assertEqual(numbers_to_bitset([0, 2]), 0b101)
+        self.assertEqual(numbers_to_bitset([3, 3]), 0b1000)
+
+    def test_filter_difficulty(self):
+        index = get_question_index()
+        questions = index.filter(self.all_pks, 2)
+        self.assertEqual(
+            [question.slug for question in questions],
+            ['parsons-question-1', 'debugging-question-1'],
+        )
+
+    def test_filter_concepts_and_contexts(self):
+        index = get_question_index()
+        display_text = ProgrammingConcepts.objects.get(slug='display-text').number
+        mathematics = QuestionContexts.objects.get(slug='mathematics').number
+        questions = index.filter(self.all_pks, 0, [display_text], [mathematics])
+        self.assertEqual([question.slug for question in questions], ['question-1', 'program-question-1'])
+        self.assertEqual(index.filter(self.all_pks, 0, [display_text + 1]), [])
+        self.assertEqual(index.filter(self.all_pks, 0, None, [mathematics + 1]), [])
+
+    def test_filter_only_given_pks(self):
+        index = get_question_index()
+        pk = Question.objects.get(slug='program-question-1').pk
+        questions = index.filter({pk}, 0)
+        self.assertEqual([question.pk for question in questions], [pk])
+
+    def test_filter_returns_subclasses(self):
+        index = get_question_index()
+        questions = index.filter(self.all_pks, 1)
+        self.assertEqual(questions[0].QUESTION_TYPE, 'function')
+
+    def test_index_reused(self):
+        index = get_question_index()
+        self.assertIs(get_question_index(), index)
+
+    def test_index_invalidated_on_question_change(self):
+        index = get_question_index()
+        question = Question.objects.get(slug='question-1')
+        question.concepts.clear()
+        new_index = get_question_index()
+        self.assertIsNot(new_index, index)
+        self.assertEqual(new_index.concept_bitsets[question.pk], 0)
+
+    def test_index_invalidated_by_another_process(self):
+        index = get_question_index()
+        # As the load_questions command would from another process
+        QuestionBankVersion.objects.update(version=F('version') + 1)
+        self.assertIs(get_question_index(), index)
+        later = time.monotonic() + VERSION_TIMEOUT + 1
+        with mock.patch('programming.question_index.time.monotonic', return_value=later):
+            self.assertIsNot(get_question_index(), index)
+
+    def test_get_recommendations_no_queries_when_warm(self):
+        get_question_index()
+        with CaptureQueriesContext(connection) as context:
+            recommendations = get_recommendations(self.all_pks, [1, 0, 2], [[1]], [[2]])
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual([question.slug for question in recommendations], ['function-question-1'])
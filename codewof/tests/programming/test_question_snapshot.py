@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from programming.models import (
+    Achievement,
+    LoadedContent,
+    Question,
+    QuestionTypeProgram,
+    QuestionTypeProgramTestCase,
+    TestCase as QuestionTestCase,
+)
+from programming.question_snapshot import (
+    SNAPSHOT_MODELS,
+    SnapshotError,
+    create_snapshot,
+    restore_snapshot,
+)
+from tests.codewof_test_data_generator import (
+    generate_achievements,
+    generate_questions,
+)
+
+
+class QuestionSnapshotTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_questions()
+        generate_achievements()
+        QuestionTypeProgramTestCase.objects.create(
+            number=1,
+            test_input='2\n3',
+            expected_output='5\n',
+            question=QuestionTypeProgram.objects.get(slug='program-question-1'),
+        )
+        LoadedContent.objects.create(key='question:program-question-1', content_hash='hash')
+
+    def setUp(self):
+        snapshot_file = tempfile.NamedTemporaryFile(suffix='.json.gz', delete=False)
+        snapshot_file.close()
+        self.path = snapshot_file.name
+        self.addCleanup(os.remove, self.path)
+
+    def get_rows(self):
+        return {
+            model._meta.db_table: list(model._base_manager.order_by('pk').values_list())
+            for model in SNAPSHOT_MODELS
+        }
+
+    def clear_question_bank(self):
+        for model in reversed(SNAPSHOT_MODELS):
+            model._base_manager.all().delete()
+
+    def test_restore(self):
+        rows = self.get_rows()
+        create_snapshot(self.path)
+        self.clear_question_bank()
+        restored_rows = restore_snapshot(self.path)
+        self.assertEqual(self.get_rows(), rows)
+        self.assertEqual(restored_rows, {table: len(table_rows) for table, table_rows in rows.items()})
+        self.assertEqual(
+            set(Question.objects.select_subclasses().values_list('slug', flat=True)),
+            set(Question.objects.values_list('slug', flat=True)),
+        )
+        self.assertEqual(type(QuestionTestCase.objects.select_subclasses().get()), QuestionTypeProgramTestCase)
+
+    def test_restore_resets_sequences(self):
+        create_snapshot(self.path)
+        max_pk = Achievement.objects.order_by('-pk').first().pk
+        self.clear_question_bank()
+        restore_snapshot(self.path)
+        achievement = Achievement.objects.create(id_name='new', display_name='New', description='New')
+        self.assertGreater(achievement.pk, max_pk)
+
+    def get_restore_query_count(self):
+        create_snapshot(self.path)
+        self.clear_question_bank()
+        with CaptureQueriesContext(connection) as queries:
+            restore_snapshot(self.path)
+        return len(queries)
+
+    def test_restore_query_count_independent_of_questions(self):
+        query_count = self.get_restore_query_count()
+        for i in range(10):
+            question = QuestionTypeProgram.objects.create(slug='extra-{}'.format(i), title='Extra', solution='')
+            QuestionTypeProgramTestCase.objects.create(question=question, expected_output='')
+        self.assertEqual(self.get_restore_query_count(), query_count)
+
+    def test_restore_into_loaded_question_bank(self):
+        create_snapshot(self.path)
+        with self.assertRaisesMessage(SnapshotError, 'empty question bank'):
+            restore_snapshot(self.path)
+
+    def test_restore_with_different_migrations(self):
+        create_snapshot(self.path)
+        with gzip.open(self.path, 'rt') as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        snapshot['migrations'].append('programming.9999_future')
+        with gzip.open(self.path, 'wt') as snapshot_file:
+            json.dump(snapshot, snapshot_file)
+        self.clear_question_bank()
+        with self.assertRaisesMessage(SnapshotError, 'different migrations'):
+            restore_snapshot(self.path)
+
+    def test_commands(self):
+        stdout = StringIO()
+        call_command('create_question_snapshot', self.path, stdout=stdout)
+        self.assertIn('Snapshot of ', stdout.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('restore_question_snapshot', self.path, stdout=StringIO())
+        self.clear_question_bank()
+        stdout = StringIO()
+        call_command('restore_question_snapshot', self.path, stdout=stdout)
+        self.assertIn('Restored ', stdout.getvalue())
+        self.assertTrue(Question.objects.exists())
@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from programming.models import (
+    Attempt,
+    Profile,
+    QuestionTypeProgram,
+    QuestionTypeProgramTestCase,
+    TestCaseAttempt,
+)
+from tests.codewof_test_data_generator import (
+    generate_users,
+    generate_questions,
+)
+from tests.conftest import user
+
+
+class RegradeAttemptsCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_users(user)
+        generate_questions()
+        cls.question = QuestionTypeProgram.objects.get(slug='program-question-1')
+        cls.test_case = QuestionTypeProgramTestCase.objects.create(
+            number=1,
+            test_input='2',
+            expected_output='4',
+            question=cls.question,
+        )
+        profile = Profile.objects.get(user__pk=1)
+        cls.passing_code = 'print(int(input()) * 2)'
+        cls.failing_code = 'print(int(input()) + 3)'
+        # Stored results are the opposite of the current test case results
+        for code, passed in [(cls.passing_code, False), (cls.failing_code, True), ('print(4)', True)]:
+            attempt = Attempt.objects.create(
+                profile=profile,
+                question=cls.question,
+                user_code=code,
+                passed_tests=passed,
+            )
+            TestCaseAttempt.objects.create(attempt=attempt, test_case=cls.test_case, passed=passed)
+
+    def call_command(self, *args, **kwargs):
+        stdout = StringIO()
+        call_command('regrade_attempts', *args, workers=0, stdout=stdout, **kwargs)
+        return stdout.getvalue()
+
+    def test_regrade(self):
+        output = self.call_command('program-question-1')
+        self.assertIn('program-question-1: 1 now passed, 1 now failed', output)
+        self.assertIn('3 attempts regraded (1 now passed, 1 now failed).', output)
+        self.assertTrue(Attempt.objects.get(user_code=self.passing_code).passed_tests)
+        self.assertFalse(Attempt.objects.get(user_code=self.failing_code).passed_tests)
+        self.assertTrue(TestCaseAttempt.objects.get(attempt__user_code=self.passing_code).passed)
+        self.assertFalse(TestCaseAttempt.objects.get(attempt__user_code=self.failing_code).passed)
+        self.assertEqual(Profile.objects.get(user__pk=1).stats.questions_solved, 1)
+
+    def test_regrade_new_test_case(self):
+        new_test_case = QuestionTypeProgramTestCase.objects.create(
+            number=2,
+            test_input='3',
+            expected_output='6',
+            question=self.question,
+        )
+        self.call_command(chunk_size=2)
+        self.assertFalse(Attempt.objects.get(user_code='print(4)').passed_tests)
+        self.assertEqual(TestCaseAttempt.objects.filter(test_case=new_test_case).count(), 3)
+        test_case_attempt = TestCaseAttempt.objects.get(test_case=new_test_case, attempt__user_code=self.passing_code)
+        self.assertTrue(test_case_attempt.passed)
+
+    def test_regrade_dry_run(self):
+        output = self.call_command(dry_run=True)
+        self.assertIn('3 attempts regraded (1 now passed, 1 now failed), changes not saved.', output)
+        self.assertFalse(Attempt.objects.get(user_code=self.passing_code).passed_tests)
+
+    def test_regrade_dry_run_does_not_change_checkpoint(self):
+        progress = {
+            'questions': [],
+            'last_attempt_pk': 0,
+            'regraded': 0,
+            'now_passed': {},
+            'now_failed': {},
+            'profiles': [],
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_path = os.path.join(directory, 'checkpoint.json')
+            with open(checkpoint_path, 'w') as checkpoint_file:
+                json.dump(progress, checkpoint_file)
+            self.call_command(dry_run=True, checkpoint=checkpoint_path, chunk_size=1)
+            with open(checkpoint_path) as checkpoint_file:
+                self.assertEqual(json.load(checkpoint_file), progress)
+
+    def test_regrade_question_without_test_cases(self):
+        self.test_case.delete()
+        output = self.call_command('program-question-1')
+        self.assertIn('3 attempts regraded (0 now passed, 0 now failed).', output)
+        self.assertFalse(Attempt.objects.get(user_code=self.passing_code).passed_tests)
+        self.assertTrue(Attempt.objects.get(user_code=self.failing_code).passed_tests)
+
+    def test_regrade_resume_from_checkpoint(self):
+        last_attempt_pk = Attempt.objects.get(user_code=self.passing_code).pk
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_path = os.path.join(directory, 'checkpoint.json')
+            with open(checkpoint_path, 'w') as checkpoint_file:
+                json.dump({
+                    'questions': [],
+                    'last_attempt_pk': last_attempt_pk,
+                    'regraded': 1,
+                    'now_passed': {'program-question-1': 1},
+                    'now_failed': {},
+                    'profiles': [],
+                }, checkpoint_file)
+            output = self.call_command(checkpoint=checkpoint_path)
+            self.assertFalse(os.path.exists(checkpoint_path))
+        self.assertIn('Resuming after attempt {}.'.format(last_attempt_pk), output)
+        self.assertIn('3 attempts regraded (1 now passed, 1 now failed).', output)
+        # Attempt before the checkpoint is not regraded
+        self.assertFalse(Attempt.objects.get(user_code=self.passing_code).passed_tests)
+        self.assertFalse(Attempt.objects.get(user_code=self.failing_code).passed_tests)
+
+    def test_regrade_checkpoint_for_other_questions(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as checkpoint_file:
+            json.dump({'questions': ['function-question-1'], 'last_attempt_pk': 0}, checkpoint_file)
+            checkpoint_file.flush()
+            with self.assertRaises(CommandError):
+                self.call_command('program-question-1', checkpoint=checkpoint_file.name)
+
+    def test_regrade_unknown_question(self):
+        with self.assertRaises(CommandError):
+            self.call_command('not-a-question')
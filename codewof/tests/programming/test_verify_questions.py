@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from programming.models import (
+    QuestionTypeFunction,
+    QuestionTypeFunctionTestCase,
+    QuestionTypeProgram,
+    QuestionTypeProgramTestCase,
+)
+from tests.codewof_test_data_generator import generate_questions
+
+
+class VerifyQuestionsCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_questions()
+        QuestionTypeProgram.objects.filter(slug='program-question-1').update(
+            solution='age = int(input("How old are you? "))\nprint(age * 2)',
+        )
+        QuestionTypeProgramTestCase.objects.create(
+            number=1,
+            test_input='2',
+            expected_output='4\n',
+            question=QuestionTypeProgram.objects.get(slug='program-question-1'),
+        )
+        QuestionTypeFunction.objects.filter(slug='function-question-1').update(
+            solution='def double(x):\n    return x * 2',
+        )
+        QuestionTypeFunctionTestCase.objects.create(
+            number=1,
+            test_code='print(double(2))',
+            expected_output='4',
+            question=QuestionTypeFunction.objects.get(slug='function-question-1'),
+        )
+
+    def call_command(self, *args):
+        stdout = StringIO()
+        call_command('verify_questions', *args, workers=0, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_verify(self):
+        output = self.call_command('program-question-1', 'function-question-1')
+        self.assertIn('Verified 2 questions with 2 test cases in ', output)
+        self.assertNotIn('failed', output)
+
+    def test_verify_failed(self):
+        QuestionTypeFunctionTestCase.objects.create(
+            number=2,
+            test_code='print(double(3))',
+            expected_output='5',
+            question=QuestionTypeFunction.objects.get(slug='function-question-1'),
+        )
+        stdout = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 test cases failed.'):
+            call_command('verify_questions', workers=0, stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn('function-question-1 failed test case 2 (Program):\n', output)
+        self.assertIn('  -5\n  +6\n', output)
+        self.assertNotIn('program-question-1 failed', output)
+
+    def test_verify_runtime_error(self):
+        QuestionTypeProgram.objects.filter(slug='program-question-1').update(solution='print(1 / 0)')
+        stdout = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('verify_questions', 'program-question-1', workers=0, stdout=stdout)
+        self.assertIn('  Runtime error:\n', stdout.getvalue())
+        self.assertIn('ZeroDivisionError', stdout.getvalue())
+
+    def test_verify_missing_question(self):
+        with self.assertRaisesMessage(CommandError, 'Questions not found: missing-question'):
+            self.call_command('program-question-1', 'missing-question')
@@ -1,9 +1,18 @@
 import datetime
 
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from programming.models import Question, QuestionTypeProgram, Attempt, Like
+from programming.models import (
+    Question,
+    QuestionTypeProgram,
+    QuestionTypeFunction,
+    QuestionTypeFunctionTestCase,
+    Attempt,
+    Like,
+)
 from tests.codewof_test_data_generator import (
     generate_users,
     generate_questions,
@@ -233,6 +242,56 @@ class SaveQuestionAttemptTest(TestCase):
             {'success': False, 'message': 'Attempt not saved, same as previous attempt.'}
         )
 
+    def post_function_attempt(self, question, user_code, num_test_cases):
+        test_cases = {}
+        for number in range(1, num_test_cases + 1):
+            # IDs given, as the test data creates a test case with a set ID
+            test_case = QuestionTypeFunctionTestCase.objects.create(
+                id=num_test_cases * 100 + number,
+                number=number,
+                test_code='print({})'.format(number),
+                expected_output=str(number),
+                question=question,
+            )
+            test_cases[test_case.pk] = {'passed': True}
+        with CaptureQueriesContext(connection) as context:
+            resp = self.client.post(
+                '/ajax/save_question_attempt/',
+                data={'question': question.pk, 'user_input': user_code, 'test_cases': test_cases},
+                content_type='application/json',
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            )
+        self.assertTrue(json.loads(resp.content)['success'])
+        return len(context.captured_queries)
+
+    def test_save_question_attempt_queries_independent_of_test_cases(self):
+        self.login_user()
+        question = QuestionTypeFunction.objects.get(slug='function-question-1')
+        self.post_function_attempt(question, 'first', 1)
+        QuestionTypeFunctionTestCase.objects.filter(question=question).delete()
+        num_queries_few = self.post_function_attempt(question, 'second', 2)
+        QuestionTypeFunctionTestCase.objects.filter(question=question).delete()
+        num_queries_many = self.post_function_attempt(question, 'third', 20)
+        self.assertEqual(num_queries_few, num_queries_many)
+        attempt = Attempt.objects.get(question=question, user_code='third')
+        self.assertTrue(attempt.passed_tests)
+        self.assertEqual(attempt.testcaseattempt_set.count(), 20)
+
+    def test_save_question_attempt_invalid_test_case(self):
+        self.login_user()
+        question = Question.objects.get(slug='function-question-1')
+        resp = self.client.post(
+            '/ajax/save_question_attempt/',
+            data={'question': question.pk, 'user_input': 'test', 'test_cases': {1: {'passed': True}}},
+            content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertJSONEqual(
+            str(resp.content, encoding='utf8'),
+            {'success': False, 'message': 'Attempt not saved, test cases do not belong to question.'}
+        )
+        self.assertFalse(Attempt.objects.filter(question=question, user_code='test').exists())
+
 
 class TestLikeAttempt(TestCase):
     @classmethod
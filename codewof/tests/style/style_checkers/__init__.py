@@ -0,0 +1 @@
+"""Module for tests of the style checkers."""
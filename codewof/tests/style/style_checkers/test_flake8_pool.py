@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from style.style_checkers.flake8_pool import (
+    Flake8Checker,
+    Flake8Pool,
+    StyleCheckTimeoutError,
+)
+
+CONFIG = settings.STYLE_CHECKER_LANGUAGES['python3']['checker-config']
+SAMPLE_PROGRAM = """\"\"\"Sample program.\"\"\"
+
+x=1
+print( x)
+y = 2  # noqa
+z = (x +
+     y)
+"""
+SAMPLE_PROGRAM_RESULT = (
+    "code.py:3:2: E225 missing whitespace around operator\n"
+    "code.py:4:7: E201 whitespace after '('"
+)
+
+
+class Flake8CheckerTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.checker = Flake8Checker(CONFIG)
+
+    def test_check(self):
+        self.assertEqual(self.checker.check(SAMPLE_PROGRAM), SAMPLE_PROGRAM_RESULT)
+
+    def test_check_no_errors(self):
+        self.assertEqual(self.checker.check('"""Sample program."""\n\nprint(1)\n'), '')
+
+    def test_check_syntax_error(self):
+        result = self.checker.check('"""Sample program."""\n\ndef f(:\n    pass\n')
+        self.assertTrue(result.startswith('code.py:3:8: E999 SyntaxError'))
+
+    def test_check_repeated(self):
+        self.checker.check('print( 1)\n')
+        self.assertEqual(self.checker.check(SAMPLE_PROGRAM), SAMPLE_PROGRAM_RESULT)
+
+
+class Flake8PoolTest(SimpleTestCase):
+
+    def test_check_in_process(self):
+        pool = Flake8Pool(CONFIG, processes=0, timeout=10, max_jobs_per_worker=None)
+        self.assertEqual(pool.check(SAMPLE_PROGRAM), SAMPLE_PROGRAM_RESULT)
+        self.assertIsNone(pool._pool)
+
+    def test_check_in_workers(self):
+        pool = Flake8Pool(CONFIG, processes=1, timeout=30, max_jobs_per_worker=2)
+        try:
+            for i in range(3):
+                self.assertEqual(pool.check(SAMPLE_PROGRAM), SAMPLE_PROGRAM_RESULT)
+            self.assertIs(pool.get_pool(), pool.get_pool())
+        finally:
+            pool.close()
+        self.assertIsNone(pool._pool)
+
+    def test_check_timeout(self):
+        pool = Flake8Pool(CONFIG, processes=1, timeout=0, max_jobs_per_worker=None)
+        with self.assertRaises(StyleCheckTimeoutError):
+            pool.check(SAMPLE_PROGRAM)
+        self.assertIsNone(pool._pool)
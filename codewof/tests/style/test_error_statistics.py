@@ -0,0 +1,86 @@
+import time
+from unittest import mock
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from style.models import Error, ErrorsVersion
+from style.error_statistics import (
+    VERSION_TIMEOUT,
+    ErrorCountBuffer,
+    clear_errors,
+    get_error,
+)
+
+
+class ErrorStatisticsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Error.objects.create(language='python3', code='E101', count=0)
+        Error.objects.create(language='python3', code='E225', count=5)
+
+    def setUp(self):
+        clear_errors()
+
+    def test_get_error_loaded_once(self):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(get_error('python3', 'E101').code, 'E101')
+            self.assertEqual(get_error('python3', 'E225').code, 'E225')
+            self.assertIsNone(get_error('python3', 'E999'))
+        # The errors version and the errors
+        self.assertEqual(len(context.captured_queries), 2)
+
+    def test_clear_errors(self):
+        get_error('python3', 'E101')
+        Error.objects.create(language='python3', code='W291', count=0)
+        self.assertIsNone(get_error('python3', 'W291'))
+        clear_errors()
+        self.assertEqual(get_error('python3', 'W291').code, 'W291')
+
+    def test_errors_reloaded_after_change_by_another_process(self):
+        get_error('python3', 'E101')
+        # As the load_style_errors command would from another process
+        Error.objects.create(language='python3', code='W291', count=0)
+        ErrorsVersion.objects.update(version=F('version') + 1)
+        self.assertIsNone(get_error('python3', 'W291'))
+        later = time.monotonic() + VERSION_TIMEOUT + 1
+        with mock.patch('style.error_statistics.time.monotonic', return_value=later):
+            self.assertEqual(get_error('python3', 'W291').code, 'W291')
+
+    def test_buffer_immediate_flush(self):
+        buffer = ErrorCountBuffer(0)
+        buffer.add('python3', [{'code': 'E101'}, {'code': 'E101'}])
+        self.assertEqual(Error.objects.get(code='E101').count, 2)
+        self.assertEqual(buffer.pending(), {})
+
+    def test_buffer_counts_aggregated(self):
+        buffer = ErrorCountBuffer(60)
+        with mock.patch.object(buffer, 'start_flusher') as start_flusher:
+            buffer.add('python3', [{'code': 'E101'}, {'code': 'E225'}, {'code': 'E101'}])
+            buffer.add('python3', [{'code': 'E225'}, {'code': 'E999'}])
+        start_flusher.assert_called()
+        self.assertEqual(Error.objects.get(code='E101').count, 0)
+        self.assertEqual(
+            buffer.pending(),
+            {('python3', 'E101'): 2, ('python3', 'E225'): 2, ('python3', 'E999'): 1},
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(buffer.flush(), 3)
+        # One update for each error code, within a savepoint
+        updates = [query for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(Error.objects.get(code='E101').count, 2)
+        self.assertEqual(Error.objects.get(code='E225').count, 7)
+        self.assertEqual(buffer.pending(), {})
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_buffer_kept_on_failed_flush(self):
+        buffer = ErrorCountBuffer(60)
+        with mock.patch.object(buffer, 'start_flusher'):
+            buffer.add('python3', [{'code': 'E101'}])
+        with mock.patch('style.error_statistics.transaction.atomic', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                buffer.flush()
+        self.assertEqual(buffer.pending(), {('python3', 'E101'): 1})
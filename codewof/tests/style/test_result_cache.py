@@ -0,0 +1,60 @@
+from django.test import SimpleTestCase, override_settings
+
+from style.result_cache import (
+    ResultCache,
+    get_result_key,
+)
+
+
+class ResultCacheTest(SimpleTestCase):
+
+    def test_get_missing(self):
+        cache = ResultCache(2)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, 0)
+
+    def test_get_stored(self):
+        cache = ResultCache(2)
+        cache.set('a', [1])
+        self.assertEqual(cache.get('a'), [1])
+        self.assertEqual(cache.hits, 1)
+
+    def test_least_recently_used_removed(self):
+        cache = ResultCache(2)
+        cache.set('a', [1])
+        cache.set('b', [2])
+        cache.get('a')
+        cache.set('c', [3])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), [1])
+        self.assertEqual(cache.get('c'), [3])
+
+    def test_zero_size(self):
+        cache = ResultCache(0)
+        cache.set('a', [1])
+        self.assertIsNone(cache.get('a'))
+
+    def test_statistics(self):
+        cache = ResultCache(2)
+        cache.set('a', [1])
+        cache.get('a')
+        cache.get('b')
+        cache.get('a')
+        self.assertEqual(
+            cache.statistics(),
+            {'size': 1, 'max_size': 2, 'hits': 2, 'misses': 1, 'hit_rate': 2 / 3},
+        )
+        cache.clear()
+        self.assertEqual(cache.statistics()['size'], 0)
+        self.assertEqual(cache.statistics()['hits'], 0)
+
+    def test_get_result_key(self):
+        key = get_result_key('python3', 'print(1)', 0)
+        self.assertEqual(key, get_result_key('python3', 'print(1)', 0))
+        self.assertNotEqual(key, get_result_key('python3', 'print(2)', 0))
+        self.assertNotEqual(key, get_result_key('python3', 'print(1)', 1))
+
+    @override_settings(STYLE_CHECKER_LANGUAGES={'python3': {}, 'other': {}})
+    def test_get_result_key_includes_language(self):
+        self.assertNotEqual(get_result_key('python3', 'print(1)', 0), get_result_key('other', 'print(1)', 0))
@@ -1,9 +1,14 @@
 import json
 from http import HTTPStatus
+from django.conf import settings
 from django.test import TestCase, override_settings
 from django.urls import reverse
+from style.models import Error
+from style.error_statistics import clear_errors
+from style.result_cache import RESULT_CACHE
 
 SAMPLE_PROGRAM_1 = "print('Hello world!')"
+SAMPLE_PROGRAM_2 = "x=1\nprint( x)\ny=2\n"
 
 
 class CheckCodeViewTest(TestCase):
@@ -12,6 +17,24 @@ class CheckCodeViewTest(TestCase):
         super().__init__(*args, **kwargs)
         self.language = 'en'
 
+    def setUp(self):
+        RESULT_CACHE.clear()
+        clear_errors()
+
+    def post_code(self, user_code):
+        data = {
+            'language': 'python3',
+            'user_code': user_code,
+        }
+        url = reverse('style:check_code')
+        response = self.client.post(
+            url,
+            json.dumps(data),
+            'json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        return json.loads(response.content)
+
     @override_settings(STYLE_CHECKER_LANGUAGES={
         'python3': {
             'name': 'Python 3',
@@ -114,3 +137,35 @@ class CheckCodeViewTest(TestCase):
         json_string = response.content
         response_data = json.loads(json_string)
         self.assertFalse(response_data['success'])
+
+    def test_check_code_cached_result(self):
+        Error.objects.create(language='python3', code='E225', count=0)
+        Error.objects.create(language='python3', code='E201', count=0)
+        first_response_data = self.post_code(SAMPLE_PROGRAM_2)
+        second_response_data = self.post_code(SAMPLE_PROGRAM_2)
+        self.assertTrue(second_response_data['success'])
+        self.assertEqual(first_response_data, second_response_data)
+        statistics = RESULT_CACHE.statistics()
+        self.assertEqual(statistics['hits'], 1)
+        self.assertEqual(statistics['misses'], 1)
+        # Counts are incremented for cached results
+        self.assertEqual(Error.objects.get(code='E225').count, 4)
+        self.assertEqual(Error.objects.get(code='E201').count, 2)
+
+    def test_check_code_cached_result_not_used_after_errors_loaded(self):
+        Error.objects.create(language='python3', code='E225', count=0, title='Old title')
+        Error.objects.create(language='python3', code='E201', count=0)
+        self.post_code(SAMPLE_PROGRAM_2)
+        Error.objects.filter(code='E225').update(title='New title')
+        # As the load_style_errors command does
+        clear_errors()
+        response_data = self.post_code(SAMPLE_PROGRAM_2)
+        self.assertIn('New title', response_data['result_html'])
+        self.assertEqual(RESULT_CACHE.statistics()['hits'], 0)
+
+    def test_check_code_example_code_not_counted(self):
+        Error.objects.create(language='python3', code='E203', count=0)
+        example_code = settings.STYLE_CHECKER_LANGUAGES['python3']['example_code']
+        self.post_code(example_code)
+        self.post_code(example_code)
+        self.assertEqual(Error.objects.get(code='E203').count, 0)
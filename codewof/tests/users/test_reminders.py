@@ -0,0 +1,119 @@
+import datetime
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from tests.codewof_test_data_generator import generate_users
+from tests.conftest import user
+from users.forms import UserChangeForm
+from users.reminders import (
+    get_hour_of_week,
+    get_reminder_hours,
+    get_reminder_schedule,
+    get_users_due_reminder,
+    refresh_reminder_schedules,
+)
+
+User = get_user_model()
+
+MONDAY = [True, False, False, False, False, False, False]
+SUNDAY = [False, False, False, False, False, False, True]
+
+
+class GetReminderHoursTests(SimpleTestCase):
+
+    def test_hour_of_week(self):
+        self.assertEqual(get_hour_of_week(datetime.datetime(2021, 5, 24, 9, 30, tzinfo=pytz.utc)), 9)
+        self.assertEqual(get_hour_of_week(datetime.datetime(2021, 5, 30, 23, 0, tzinfo=pytz.utc)), 167)
+
+    def test_utc(self):
+        self.assertEqual(get_reminder_hours(MONDAY, datetime.timedelta(0)), [9])
+
+    def test_wraps_to_end_of_week(self):
+        # Monday 9am at UTC+12 is Sunday 9pm UTC
+        self.assertEqual(get_reminder_hours(MONDAY, datetime.timedelta(hours=12)), [6 * 24 + 21])
+
+    def test_half_hour_offset_sent_at_next_hour(self):
+        # Monday 9am at UTC+5:30 is 3:30am UTC, so is sent at 4am UTC (9:30am local)
+        self.assertEqual(get_reminder_hours(MONDAY, datetime.timedelta(hours=5, minutes=30)), [4])
+
+    def test_no_days(self):
+        self.assertEqual(get_reminder_hours([False] * 7, datetime.timedelta(0)), [])
+
+    def test_schedule_valid_between_transitions(self):
+        schedule = get_reminder_schedule(
+            MONDAY, 'Pacific/Auckland', datetime.datetime(2021, 5, 24, tzinfo=pytz.utc),
+        )
+        self.assertEqual(schedule['reminder_schedule_valid_from'],
+                         datetime.datetime(2021, 4, 3, 14, 0, tzinfo=pytz.utc))
+        self.assertEqual(schedule['reminder_schedule_valid_until'],
+                         datetime.datetime(2021, 9, 25, 14, 0, tzinfo=pytz.utc))
+
+    def test_schedule_without_transitions(self):
+        schedule = get_reminder_schedule(MONDAY, 'UTC', datetime.datetime(2021, 5, 24, tzinfo=pytz.utc))
+        self.assertIsNone(schedule['reminder_schedule_valid_from'])
+        self.assertIsNone(schedule['reminder_schedule_valid_until'])
+
+
+class ReminderScheduleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_users(user)
+
+    def set_schedule(self, user, days, time_zone, now):
+        user.timezone = time_zone
+        for field, remind in zip(['remind_on_monday', 'remind_on_tuesday', 'remind_on_wednesday',
+                                  'remind_on_thursday', 'remind_on_friday', 'remind_on_saturday',
+                                  'remind_on_sunday'], days):
+            setattr(user, field, remind)
+        user.save()
+        User.objects.filter(pk=user.pk).update(**get_reminder_schedule(days, time_zone, now))
+
+    def get_due_users(self, now):
+        refresh_reminder_schedules(now)
+        return set(get_users_due_reminder(now))
+
+    def test_daylight_saving_ends(self):
+        john = User.objects.get(pk=1)
+        # Calculated during New Zealand daylight time (UTC+13)
+        self.set_schedule(john, SUNDAY, 'Pacific/Auckland', datetime.datetime(2021, 4, 1, tzinfo=pytz.utc))
+        # Daylight time ends at 2021-04-03 14:00 UTC, so 9am on Sunday is 9pm UTC (UTC+12)
+        self.assertEqual(self.get_due_users(datetime.datetime(2021, 4, 3, 20, 0, tzinfo=pytz.utc)), set())
+        self.assertEqual(self.get_due_users(datetime.datetime(2021, 4, 3, 21, 0, tzinfo=pytz.utc)), {john})
+
+    def test_daylight_saving_starts(self):
+        john = User.objects.get(pk=1)
+        # Calculated during Eastern standard time (UTC-5)
+        self.set_schedule(john, MONDAY, 'America/New_York', datetime.datetime(2021, 3, 10, tzinfo=pytz.utc))
+        self.assertEqual(User.objects.get(pk=1).reminder_hours, [14])
+        # Daylight time starts at 2021-03-14 07:00 UTC, so 9am on Monday is 1pm UTC (UTC-4)
+        self.assertEqual(self.get_due_users(datetime.datetime(2021, 3, 15, 13, 0, tzinfo=pytz.utc)), {john})
+        self.assertEqual(self.get_due_users(datetime.datetime(2021, 3, 15, 14, 0, tzinfo=pytz.utc)), set())
+        self.assertEqual(User.objects.get(pk=1).reminder_hours, [13])
+
+    def test_refresh_only_invalid_schedules(self):
+        now = datetime.datetime(2021, 5, 24, tzinfo=pytz.utc)
+        refresh_reminder_schedules(now)
+        self.assertEqual(refresh_reminder_schedules(now), 0)
+
+    def test_save_with_update_fields_updates_schedule(self):
+        john = User.objects.get(pk=1)
+        john.remind_on_monday = True
+        john.timezone = 'UTC'
+        john.save(update_fields=['remind_on_monday', 'timezone'])
+        self.assertEqual(User.objects.get(pk=1).reminder_hours, [9])
+
+    def test_user_change_form_updates_schedule(self):
+        john = User.objects.get(pk=1)
+        form = UserChangeForm(instance=john, data={
+            'first_name': john.first_name,
+            'last_name': john.last_name,
+            'user_type': john.user_type.pk,
+            'remind_on_tuesday': True,
+            'timezone': 'Asia/Kolkata',
+        })
+        self.assertTrue(form.is_valid())
+        form.save()
+        # Tuesday 9am at UTC+5:30 is sent at 4am UTC
+        self.assertEqual(User.objects.get(pk=1).reminder_hours, [24 + 4])
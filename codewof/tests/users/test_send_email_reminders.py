@@ -13,105 +13,23 @@ from programming.models import Attempt, Question
 from django.utils import timezone
 from django.http import HttpResponse
 from unittest import mock
-from django.core import mail
+from general.models import OutboxEmail
+from tests.users.test_views import get_outbox_sorted
 
 User = get_user_model()
 
 
-NZT_TIME_ZONE = pytz.timezone("Pacific/Auckland")
-EST_TIME_ZONE = pytz.timezone("EST")
-IST_TIME_ZONE = pytz.timezone("Asia/Kolkata")
-CHAAST_TIME_ZONE = pytz.timezone("Pacific/Chatham")
-
-
-def mocked_today_monday_9am_side_effect(*args, **kwargs):
-    nzt = datetime.datetime(2021, 5, 24, 9, 0, 0, tzinfo=timezone.get_current_timezone())
-    if args[0] == NZT_TIME_ZONE:
-        return nzt
-    elif args[0] == EST_TIME_ZONE:
-        # NZT is 16 hours ahead of EST
-        return nzt - datetime.timedelta(hours=16)
-    elif args[0] == IST_TIME_ZONE:
-        # NZT is 6.5 hours ahead of IST
-        return nzt - datetime.timedelta(hours=6, minutes=30)
-    elif args[0] == CHAAST_TIME_ZONE:
-        # NZT is 0.75 hours behind CHAAST
-        return nzt + datetime.timedelta(hours=0, minutes=45)
-
-
-def mocked_today_monday_4pm_side_effect(*args, **kwargs):
-    nzt = datetime.datetime(2021, 5, 24, 16, 0, 0, tzinfo=timezone.get_current_timezone())
-    if args[0] == NZT_TIME_ZONE:
-        return nzt
-    elif args[0] == EST_TIME_ZONE:
-        # NZT is 16 hours ahead of EST
-        return nzt - datetime.timedelta(hours=16)
-    elif args[0] == IST_TIME_ZONE:
-        # NZT is 6.5 hours ahead of IST
-        return nzt - datetime.timedelta(hours=6, minutes=30)
-    elif args[0] == CHAAST_TIME_ZONE:
-        # NZT is 0.75 hours behind CHAAST
-        return nzt + datetime.timedelta(hours=0, minutes=45)
-
-
-def mocked_today_tuesday_1am_side_effect(*args, **kwargs):
-    nzt = datetime.datetime(2021, 5, 25, 1, 0, 0, tzinfo=timezone.get_current_timezone())
-    if args[0] == NZT_TIME_ZONE:
-        return nzt
-    elif args[0] == EST_TIME_ZONE:
-        # NZT is 16 hours ahead of EST
-        return nzt - datetime.timedelta(hours=16)
-    elif args[0] == IST_TIME_ZONE:
-        # NZT is 6.5 hours ahead of IST
-        return nzt - datetime.timedelta(hours=6, minutes=30)
-    elif args[0] == CHAAST_TIME_ZONE:
-        # NZT is 0.75 hours behind CHAAST
-        return nzt + datetime.timedelta(hours=0, minutes=45)
-
-
-def mocked_today_tuesday_9am_side_effect(*args, **kwargs):
-    nzt = datetime.datetime(2021, 5, 25, 9, 0, 0, tzinfo=timezone.get_current_timezone())
-    if args[0] == NZT_TIME_ZONE:
-        return nzt
-
-
-def mocked_today_wednesday_9am_side_effect(*args, **kwargs):
-    nzt = datetime.datetime(2021, 5, 26, 9, 0, 0, tzinfo=timezone.get_current_timezone())
-    if args[0] == NZT_TIME_ZONE:
-        return nzt
-
-
-def mocked_today_thursday_9am_side_effect(*args, **kwargs):
-    nzt = datetime.datetime(2021, 5, 27, 9, 0, 0, tzinfo=timezone.get_current_timezone())
-    if args[0] == NZT_TIME_ZONE:
-        return nzt
-
-
-def mocked_today_friday_9am_side_effect(*args, **kwargs):
-    nzt = datetime.datetime(2021, 5, 28, 9, 0, 0, tzinfo=timezone.get_current_timezone())
-    if args[0] == NZT_TIME_ZONE:
-        return nzt
-
-
-def mocked_today_saturday_9am_side_effect(*args, **kwargs):
-    nzt = datetime.datetime(2021, 5, 29, 9, 0, 0, tzinfo=timezone.get_current_timezone())
-    if args[0] == NZT_TIME_ZONE:
-        return nzt
-
-
-def mocked_today_sunday_9am_side_effect(*args, **kwargs):
-    nzt = datetime.datetime(2021, 5, 30, 9, 0, 0, tzinfo=timezone.get_current_timezone())
-    if args[0] == NZT_TIME_ZONE:
-        return nzt
-
-
-def mocked_timezones():
-    return ("Pacific/Auckland", "Pacific/Auckland"), ("EST", "EST"), ("Asia/Kolkata", "Asia/Kolkata"), \
-           ("Pacific/Chatham", "Pacific/Chatham")
-
-
-def mocked_timezones_nz_only():
-    return ("Pacific/Auckland", "Pacific/Auckland"),
+# Times in UTC, when New Zealand is 12 hours ahead of UTC
+MONDAY_9AM_NZT = datetime.datetime(2021, 5, 23, 21, 0, 0, tzinfo=pytz.utc)
+MONDAY_4PM_NZT = datetime.datetime(2021, 5, 24, 4, 0, 0, tzinfo=pytz.utc)
+# Monday 9am EST
+TUESDAY_2AM_NZT = datetime.datetime(2021, 5, 24, 14, 0, 0, tzinfo=pytz.utc)
+TUESDAY_9AM_NZT = datetime.datetime(2021, 5, 24, 21, 0, 0, tzinfo=pytz.utc)
+WEDNESDAY_9AM_NZT = datetime.datetime(2021, 5, 25, 21, 0, 0, tzinfo=pytz.utc)
+THURSDAY_9AM_NZT = datetime.datetime(2021, 5, 26, 21, 0, 0, tzinfo=pytz.utc)
+FRIDAY_9AM_NZT = datetime.datetime(2021, 5, 27, 21, 0, 0, tzinfo=pytz.utc)
+SATURDAY_9AM_NZT = datetime.datetime(2021, 5, 28, 21, 0, 0, tzinfo=pytz.utc)
+SUNDAY_9AM_NZT = datetime.datetime(2021, 5, 29, 21, 0, 0, tzinfo=pytz.utc)
 
 
 class GetUsersToEmailTests(TestCase):
@@ -130,69 +48,52 @@ class GetUsersToEmailTests(TestCase):
         self.oddball = User.objects.get(id=7)
         self.chatham = User.objects.get(id=8)
 
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones())
-    def test_monday_9am_returns_four_users_from_two_timezones(self, mocked_datetime):
-        mocked_datetime.now.side_effect = mocked_today_monday_9am_side_effect
-        result = Command().get_users_to_email()
+    def test_monday_9am_returns_four_users_from_two_timezones(self):
+        result = Command().get_users_to_email(MONDAY_9AM_NZT)
         self.assertEqual({self.john, self.sally, self.brown, self.chatham}, set(result))
 
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones())
-    def test_monday_4pm_returns_one_user(self, mocked_datetime):
-        mocked_datetime.now.side_effect = mocked_today_monday_4pm_side_effect
-        result = Command().get_users_to_email()
+    def test_monday_4pm_returns_one_user(self):
+        result = Command().get_users_to_email(MONDAY_4PM_NZT)
         self.assertEqual({self.oddball}, set(result))
 
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones_nz_only())
-    def test_tuesday_returns_one_user(self, mocked_datetime):
-        mocked_datetime.now.side_effect = mocked_today_tuesday_9am_side_effect
-        result = Command().get_users_to_email()
+    def test_tuesday_returns_one_user(self):
+        result = Command().get_users_to_email(TUESDAY_9AM_NZT)
         self.assertEqual({self.brown}, set(result))
 
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones())
-    def test_tuesday_1am_returns_one_user(self, mocked_datetime):
-        mocked_datetime.now.side_effect = mocked_today_tuesday_1am_side_effect
-        result = Command().get_users_to_email()
+    def test_tuesday_2am_returns_one_user(self):
+        result = Command().get_users_to_email(TUESDAY_2AM_NZT)
         self.assertEqual({self.yankee}, set(result))
 
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones_nz_only())
-    def test_wednesday_returns_two_users(self, mocked_datetime):
-        mocked_datetime.now.side_effect = mocked_today_wednesday_9am_side_effect
-        result = Command().get_users_to_email()
+    def test_wednesday_returns_two_users(self):
+        result = Command().get_users_to_email(WEDNESDAY_9AM_NZT)
         self.assertEqual({self.sally, self.brown}, set(result))
 
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones_nz_only())
-    def test_thursday_returns_two_users(self, mocked_datetime):
-        mocked_datetime.now.side_effect = mocked_today_thursday_9am_side_effect
-        result = Command().get_users_to_email()
+    def test_thursday_returns_two_users(self):
+        result = Command().get_users_to_email(THURSDAY_9AM_NZT)
         self.assertEqual({self.john, self.brown}, set(result))
 
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones_nz_only())
-    def test_friday_returns_two_users(self, mocked_datetime):
-        mocked_datetime.now.side_effect = mocked_today_friday_9am_side_effect
-        result = Command().get_users_to_email()
+    def test_friday_returns_two_users(self):
+        result = Command().get_users_to_email(FRIDAY_9AM_NZT)
         self.assertEqual({self.sally, self.brown}, set(result))
 
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones_nz_only())
-    def test_saturday_returns_two_users(self, mocked_datetime):
-        mocked_datetime.now.side_effect = mocked_today_saturday_9am_side_effect
-        result = Command().get_users_to_email()
+    def test_saturday_returns_two_users(self):
+        result = Command().get_users_to_email(SATURDAY_9AM_NZT)
         self.assertEqual({self.jane, self.brown}, set(result))
 
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones_nz_only())
-    def test_sunday_returns_no_users(self, mocked_datetime):
-        mocked_datetime.now.side_effect = mocked_today_sunday_9am_side_effect
-        result = Command().get_users_to_email()
+    def test_sunday_returns_no_users(self):
+        result = Command().get_users_to_email(SUNDAY_9AM_NZT)
         self.assertEqual(set(), set(result))
 
+    def test_no_users_an_hour_early(self):
+        result = Command().get_users_to_email(MONDAY_9AM_NZT - datetime.timedelta(hours=1))
+        self.assertEqual(set(), set(result))
+
+    def test_lookup_is_one_query_once_schedules_are_valid(self):
+        Command().get_users_to_email(MONDAY_9AM_NZT)
+        with self.assertNumQueries(2):
+            # One query to find schedules to refresh, and one to select the users
+            self.assertEqual(len(Command().get_users_to_email(MONDAY_9AM_NZT)), 4)
+
 
 class GetDaysSinceLastAttemptTests(TestCase):
     @classmethod
@@ -333,25 +234,16 @@ class HandleTests(TestCase):
         )
 
     @mock.patch("users.management.commands.send_email_reminders.timezone")
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones())
-    def get_monday_outbox_sorted(self, mocked_datetime, mocked_timezone):
-        mocked_datetime.now.side_effect = mocked_today_monday_9am_side_effect
-        mocked_timezone.now.return_value = datetime.datetime(2021, 5, 24, 9, 0, 0,
-                                                             tzinfo=timezone.get_current_timezone())
+    def get_monday_outbox_sorted(self, mocked_timezone):
+        mocked_timezone.now.return_value = MONDAY_9AM_NZT
         self.call_command()
-        result = sorted(mail.outbox, key=lambda x: x.to)
-        mail.outbox = []
-        return result
-
-    @mock.patch("users.management.commands.send_email_reminders.datetime")
-    @mock.patch("users.management.commands.send_email_reminders.User.TIMEZONES", mocked_timezones_nz_only())
-    def get_saturday_outbox_sorted(self, mocked_datetime):
-        mocked_datetime.now.side_effect = mocked_today_saturday_9am_side_effect
+        return get_outbox_sorted()
+
+    @mock.patch("users.management.commands.send_email_reminders.timezone")
+    def get_saturday_outbox_sorted(self, mocked_timezone):
+        mocked_timezone.now.return_value = SATURDAY_9AM_NZT
         self.call_command()
-        result = sorted(mail.outbox, key=lambda x: x.to)
-        mail.outbox = []
-        return result
+        return get_outbox_sorted()
 
     # MONDAY TESTS
     def test_monday_notifies_four_users(self):
@@ -384,3 +276,46 @@ class HandleTests(TestCase):
     def test_brown_notified_on_saturday_with_no_attempts_message(self):
         self.assertTrue(self.brown.first_name in self.saturday_outbox_sorted[1].body)
         self.assertTrue(self.no_attempts_message in self.saturday_outbox_sorted[1].body)
+
+    @mock.patch("users.management.commands.send_email_reminders.timezone")
+    def test_emails_added_to_outbox_in_batches(self, mocked_timezone):
+        # Reminders for this week were added in setUp
+        mocked_timezone.now.return_value = MONDAY_9AM_NZT + datetime.timedelta(days=7)
+        stdout = StringIO()
+        with mock.patch("sys.stdout", stdout):
+            self.call_command(batch_size=3)
+        self.assertIn(" - Batch 2: 1 emails added to the outbox", stdout.getvalue())
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.PENDING).count(), 4)
+
+    @mock.patch("users.management.commands.send_email_reminders.timezone")
+    def test_reminders_not_repeated_in_same_hour(self, mocked_timezone):
+        mocked_timezone.now.return_value = MONDAY_9AM_NZT + datetime.timedelta(minutes=30)
+        self.call_command()
+        self.assertEqual(len(get_outbox_sorted()), 0)
+
+    @mock.patch("users.management.commands.send_email_reminders.timezone")
+    def test_html_contains_escaped_username(self, mocked_timezone):
+        User.objects.filter(pk=self.john.pk).update(first_name="<John>")
+        mocked_timezone.now.return_value = MONDAY_9AM_NZT + datetime.timedelta(days=7)
+        self.call_command()
+        outbox = get_outbox_sorted()
+        html = outbox[0].alternatives[0][0]
+        self.assertIn("&lt;John&gt;", html)
+        self.assertNotIn("<John>", html)
+        self.assertIn("<John>", outbox[0].body)
+
+    @mock.patch("users.management.commands.send_email_reminders.timezone")
+    def test_attempt_after_start_of_command_ignored(self, mocked_timezone):
+        now = MONDAY_9AM_NZT + datetime.timedelta(days=7)
+        Attempt.objects.create(
+            profile=self.john.profile,
+            question=Question.objects.get(slug='question-1'),
+            user_code='print(1)',
+            datetime=now + datetime.timedelta(minutes=1),
+        )
+        mocked_timezone.now.return_value = now
+        self.call_command()
+        outbox = get_outbox_sorted()
+        self.assertEqual(len(outbox), 4)
+        self.assertTrue(self.john.first_name in outbox[0].body)
+        self.assertFalse(self.recent_message in outbox[0].body)
@@ -4,12 +4,15 @@ import json
 import pytest
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models.functions import Lower
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.core import management
 from django.core import mail
 from django.urls import reverse
 from users.views import UserRedirectView, UserUpdateView
+from general.outbox import deliver_outbox
 from tests.conftest import user
 from allauth.account.admin import EmailAddress
 
@@ -28,7 +31,7 @@ from tests.codewof_test_data_generator import (
     generate_feed_attempts_non_member
 )
 from programming.codewof_utils import check_achievement_conditions
-from programming.models import Achievement, Attempt
+from programming.models import Achievement, Attempt, Like, Question
 from users.models import Group, Membership, GroupRole, Invitation
 
 pytestmark = pytest.mark.django_db
@@ -687,6 +690,24 @@ class TestGroupDetailView(TestCase):
         attempts.remove(Attempt.objects.get(datetime=datetime.datetime(2020, 1, 1, 0, 0)))
         self.assertEqual(set(feed), set(attempts))
 
+    def test_feed_queries_independent_of_feed_length(self):
+        self.login_user()
+        url = reverse('users:groups-detail', args=[self.group_north.pk])
+        question = Question.objects.get(slug='program-question-1')
+        Attempt.objects.create(profile_id=2, question=question, passed_tests=True)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        attempts = generate_feed_attempts()
+        for attempt in attempts:
+            if attempt.profile_id != 3:
+                Like.objects.create(attempt=attempt, user_id=3)
+        with CaptureQueriesContext(connection) as full_context:
+            resp = self.client.get(url)
+        self.assertEqual(len(resp.context['feed']), 10)
+        # A full page does not need to check for attempts older than the stored entries
+        self.assertLessEqual(len(full_context.captured_queries), len(context.captured_queries))
+
     def test_context_has_no_feed_if_disabled(self):
         generate_feed_attempts()
         self.login_user()
@@ -1078,6 +1099,94 @@ class TestAdminRequired(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(set(Membership.objects.filter(group=self.group_north)), initial_memberships)
 
+    def test_membership_of_other_group_does_not_exist(self):
+        self.login_user()
+        membership = Membership.objects.get(group__name="Group East", user__pk=1)
+        body = json.dumps(
+            {
+                "memberships": [
+                    {
+                        "id": membership.pk,
+                        "delete": True,
+                        "role": "Member"
+                    }
+                ]
+            }
+        )
+        with self.assertRaises(ObjectDoesNotExist):
+            self.client.put(reverse('users:groups-memberships-update', args=[self.group_north.pk]), body,
+                            content_type="application/json")
+        self.assertTrue(Membership.objects.filter(pk=membership.pk).exists())
+
+    def test_invalid_membership_prevents_all_changes(self):
+        self.login_user()
+        sally = User.objects.get(pk=2)
+        membership = Membership.objects.get(group=self.group_north, user=sally)
+        body = json.dumps(
+            {
+                "memberships": [
+                    {
+                        "id": membership.pk,
+                        "delete": True,
+                        "role": "Member"
+                    },
+                    {
+                        "id": -1,
+                        "delete": False,
+                        "role": "Member"
+                    }
+                ]
+            }
+        )
+        with self.assertRaises(ObjectDoesNotExist):
+            self.client.put(reverse('users:groups-memberships-update', args=[self.group_north.pk]), body,
+                            content_type="application/json")
+        self.assertTrue(Membership.objects.filter(pk=membership.pk).exists())
+
+    def test_queries_independent_of_number_of_memberships(self):
+        self.login_user()
+        url = reverse('users:groups-memberships-update', args=[self.group_north.pk])
+        sally = User.objects.get(pk=2)
+        alex = User.objects.get(pk=3)
+        memberships = [
+            Membership.objects.get(group=self.group_north, user=sally),
+            Membership.objects.get(group=self.group_north, user=alex),
+        ]
+
+        def get_body(role, memberships):
+            return json.dumps({
+                "memberships": [
+                    {"id": membership.pk, "delete": False, "role": role} for membership in memberships
+                ]
+            })
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.put(url, get_body("Member", memberships[:1]), content_type="application/json")
+        num_queries = len(context.captured_queries)
+        with self.assertNumQueries(num_queries):
+            resp = self.client.put(url, get_body("Admin", memberships), content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(Membership.objects.filter(group=self.group_north, role__name="Admin").count(), 3)
+
+    def test_memberships_deleted_with_one_query(self):
+        self.login_user()
+        url = reverse('users:groups-memberships-update', args=[self.group_north.pk])
+        body = json.dumps({
+            "memberships": [
+                {"id": membership.pk, "delete": True, "role": "Member"}
+                for membership in Membership.objects.filter(group=self.group_north, user__in=[2, 3])
+            ]
+        })
+        with CaptureQueriesContext(connection) as context:
+            resp = self.client.put(url, body, content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        membership_deletes = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('DELETE FROM "users_membership"')
+        ]
+        self.assertEqual(len(membership_deletes), 1)
+        self.assertEqual(list(Membership.objects.filter(group=self.group_north).values_list('user', flat=True)), [1])
+
 
 class TestMembershipDeleteView(TestCase):
     @classmethod
@@ -1178,6 +1287,8 @@ class TestMembershipDeleteView(TestCase):
 
 
 def get_outbox_sorted():
+    # Invitation emails are sent from the outbox by the deliver_emails command
+    deliver_outbox(once=True)
     result = sorted(mail.outbox, key=lambda x: x.to)
     mail.outbox = []
     return result
@@ -1414,6 +1525,18 @@ class TestCreateInvitationsView(TestCase):
         resp = self.client.get(reverse('users:groups-memberships-invite', args=[self.group_north.pk]))
         self.assertContains(resp, "<h1>Send Invitations</h1>", html=True)
 
+    def test_queries_independent_of_number_of_emails(self):
+        self.login_user(self.john)
+        url = reverse('users:groups-memberships-invite', args=[self.group_north.pk])
+        emails = ['user{}@mail.com'.format(i) for i in range(30)]
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(url, {'emails': '\n'.join(emails[:2] + [self.sally.email])})
+        num_queries = len(context.captured_queries)
+        with self.assertNumQueries(num_queries):
+            self.client.post(url, {'emails': '\n'.join(emails[2:] + [self.john.email])})
+        self.assertEqual(Invitation.objects.filter(group=self.group_north).count(), 30)
+        self.assertEqual(len(get_outbox_sorted()), 30)
+
 
 class TestAcceptInvitation(TestCase):
     @classmethod
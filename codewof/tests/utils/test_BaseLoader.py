@@ -0,0 +1,54 @@
+"""Test class for BaseLoader."""
+
+import os
+
+from django.test import SimpleTestCase
+from utils.BaseLoader import BaseLoader, get_converter
+from utils.errors.CouldNotFindMarkdownFileError import CouldNotFindMarkdownFileError
+
+BASE_PATH = "tests/programming/loaders/assets/questions/"
+
+
+class BaseLoaderTest(SimpleTestCase):
+    """Test class for converting Markdown with BaseLoader."""
+
+    def setUp(self):
+        self.config_file_path = os.path.join(BASE_PATH, "structure", "multiple-questions.yaml")
+        self.md_file_paths = [
+            os.path.join(BASE_PATH, "en", slug, "question.md")
+            for slug in ["say-hello-2", "say-hello", "say-hello-3"]
+        ]
+
+    def test_converter_reused(self):
+        BaseLoader().convert_md_file(self.md_file_paths[0], self.config_file_path)
+        converter = get_converter.cache_info()
+        BaseLoader().convert_md_file(self.md_file_paths[1], self.config_file_path)
+        self.assertEqual(get_converter.cache_info().misses, converter.misses)
+
+    def test_convert_md_files_in_order(self):
+        results = BaseLoader().convert_md_files(self.md_file_paths, self.config_file_path)
+        self.assertEqual([result.title for result in results], ["Say Hello 2!", "Say Hello!", "Say Hello 3!"])
+
+    def test_convert_md_files_across_processes(self):
+        results = BaseLoader().convert_md_files(self.md_file_paths, self.config_file_path)
+        expected = [result.html_string for result in results]
+        results = BaseLoader(processes=2).convert_md_files(self.md_file_paths, self.config_file_path)
+        self.assertEqual([result.html_string for result in results], expected)
+
+    def test_convert_md_files_across_processes_raises_error(self):
+        loader = BaseLoader(processes=2)
+        with self.assertRaises(CouldNotFindMarkdownFileError):
+            loader.convert_md_files(self.md_file_paths + ["missing.md"], self.config_file_path)
+
+    def test_converted_file_not_converted_again(self):
+        loader = BaseLoader()
+        result = loader.convert_md_files(self.md_file_paths, self.config_file_path)[0]
+        self.assertIs(loader.convert_md_file(self.md_file_paths[0], self.config_file_path), result)
+        self.assertIsNot(loader.convert_md_file(self.md_file_paths[0], self.config_file_path), result)
+
+    def test_files_converted_independently(self):
+        loader = BaseLoader()
+        first = loader.convert_md_file(self.md_file_paths[1], self.config_file_path, remove_title=False)
+        loader.convert_md_file(self.md_file_paths[0], self.config_file_path, remove_title=False)
+        again = loader.convert_md_file(self.md_file_paths[1], self.config_file_path, remove_title=False)
+        self.assertEqual(again.html_string, first.html_string)
@@ -1,19 +1,22 @@
 """Module for the custom Django send_email_reminders command."""
 
-from datetime import datetime
-from datetime import time
 from time import perf_counter
 import pytz
 from django.conf import settings
-from django.core.mail import send_mail
 from django.core.management import BaseCommand
+from django.db.models import Max, Q
 from django.utils import timezone
-from users.models import User
+from django.utils.html import escape
+from general.outbox import create_outbox_email, queue_emails
+from users.reminders import get_users_due_reminder, refresh_reminder_schedules
 from programming.models import Attempt
-from utils.Weekday import Weekday
 from django.template.loader import get_template
 from django.urls import reverse
 
+EMAIL_BATCH_SIZE = 1000
+# Replaced with the name of each user after rendering the email once for each message
+USERNAME_PLACEHOLDER = '__codewof_username__'
+
 
 class Command(BaseCommand):
     """
@@ -22,38 +25,90 @@ class Command(BaseCommand):
     The script should run once every hour, preferably near the beginning of the hour.
     """
 
+    def add_arguments(self, parser):
+        """Interprets arguments passed to command."""
+        parser.add_argument(
+            '--batch_size',
+            default=EMAIL_BATCH_SIZE,
+            help='number of emails to add to the outbox with each insert',
+        )
+
     def handle(self, *args, **options):
         """
-        Send an email to each user that should get a reminder with a customised message based on recent usage.
+        Add an email to the outbox for each user that should get a reminder, with a message based on recent usage.
+
+        Users and the dates of their last attempts are read with one query. Emails are rendered once for each
+        message, and added to the outbox in batches, to be sent by the deliver_emails command. Each reminder has a
+        dedup key of the user and hour, so running the command again in the same hour does not repeat reminders.
 
         :param args:
         :param options:
         :return:
         """
+        batch_size = int(options['batch_size'])
         start_time = perf_counter()
         print('Starting task for sending reminder emails.')
-        users_to_email = self.get_users_to_email()
+        now = timezone.now()
+        # Attempts made while the command runs are ignored, as they are after the time emails are created for
+        users_to_email = self.get_users_to_email(now).annotate(
+            last_attempt_datetime=Max('profile__attempt__datetime', filter=Q(profile__attempt__datetime__lte=now)),
+        ).only('pk', 'first_name', 'email').order_by('pk')
+
+        num_batches = 0
+        num_queued = 0
+        num_skipped = 0
+        batch_start_time = perf_counter()
+        for batch in self.create_batches(users_to_email, now, batch_size):
+            num_added = queue_emails(batch)
+            num_batches += 1
+            num_queued += num_added
+            num_skipped += len(batch) - num_added
+            duration = perf_counter() - batch_start_time
+            print(f' - Batch {num_batches}: {num_added} emails added to the outbox in {duration:0.4f} seconds '
+                  f'({num_added / max(duration, 1e-9):0.1f} emails/sec)')
+            batch_start_time = perf_counter()
+        duration = perf_counter() - start_time
+        print('Completed task for sending reminder emails.')
+        print(f' - Emails added to the outbox: {num_queued}')
+        if num_skipped:
+            print(f' - Emails already in the outbox: {num_skipped}')
+        print(f' - Task duration: {duration:0.4f}')
 
-        for user in users_to_email:
-            days_since_last_attempt = self.get_days_since_last_attempt(timezone.now(), user)
+    def create_batches(self, users, today, batch_size):
+        """
+        Create the reminder email for each user, in batches.
 
-            message = self.create_message(days_since_last_attempt)
-            html = self.build_email_html(user.first_name, message)
-            body = self.build_email_plain(user.first_name, message)
+        The email for each message is only rendered once, with the name of each user inserted afterwards.
 
-            send_mail(
+        :param users: Iterable of Users, annotated with the datetime of their last attempt.
+        :param today: Today's date.
+        :param batch_size: The number of emails in each batch.
+        :return: Generator of lists of unsaved OutboxEmail objects.
+        """
+        rendered_emails = dict()
+        hour = today.astimezone(pytz.utc).strftime('%Y-%m-%dT%H')
+        batch = []
+        for user in users.iterator(chunk_size=batch_size):
+            days_since_last_attempt = self.get_days_since(today, user.last_attempt_datetime)
+            message = self.create_message(days_since_last_attempt)
+            if message not in rendered_emails:
+                rendered_emails[message] = (
+                    self.build_email_plain(USERNAME_PLACEHOLDER, message),
+                    self.build_email_html(USERNAME_PLACEHOLDER, message),
+                )
+            body, html = rendered_emails[message]
+            batch.append(create_outbox_email(
                 'CodeWOF Reminder',
-                body,
-                settings.DEFAULT_FROM_EMAIL,
+                body.replace(USERNAME_PLACEHOLDER, user.first_name),
                 [user.email],
-                fail_silently=False,
-                html_message=html
-            )
-            print(f' - Reminder email sent to {user}.')
-        duration = perf_counter() - start_time
-        print('Completed task for sending reminder emails.')
-        print(f' - Emails sent: {len(users_to_email)}')
-        print(f' - Task duration: {duration:0.4f}')
+                html_message=html.replace(USERNAME_PLACEHOLDER, escape(user.first_name)),
+                dedup_key='reminder-{}-{}'.format(user.pk, hour),
+            ))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
     def get_days_since_last_attempt(self, today, user):
         """
@@ -65,11 +120,21 @@ class Command(BaseCommand):
         :param user: The User.
         :return: The number of days since their last attempt or None if the user has no attempts.
         """
-        attempts_sorted_by_datetime = Attempt.objects.filter(profile=user.profile).order_by('-datetime')
-        if len(attempts_sorted_by_datetime) == 0:
-            return None
+        date_of_last_attempt = Attempt.objects.filter(profile=user.profile).aggregate(
+            last_attempt=Max('datetime'),
+        )['last_attempt']
+        return self.get_days_since(today, date_of_last_attempt)
 
-        date_of_last_attempt = attempts_sorted_by_datetime[0].datetime
+    def get_days_since(self, today, date_of_last_attempt):
+        """
+        Obtain the number of days between a specified date and the date of the last attempt.
+
+        :param today: Today's date.
+        :param date_of_last_attempt: The date of the last attempt, or None if there are no attempts.
+        :return: The number of days since the last attempt or None if there are no attempts.
+        """
+        if date_of_last_attempt is None:
+            return None
         if today < date_of_last_attempt:
             raise ValueError("Specified date is behind the user's last attempt")
         return (today - date_of_last_attempt).days
@@ -101,51 +166,20 @@ class Command(BaseCommand):
             .format(username, message, settings.CODEWOF_DOMAIN + reverse('users:dashboard'),
                     settings.CODEWOF_DOMAIN + reverse('users:update'), settings.CODEWOF_DOMAIN)
 
-    def get_users_to_email(self):
+    def get_users_to_email(self, now=None):
         """
         Obtain the collection of users to email.
 
-        Iterates through each timezone, getting the day of the week for that timezone, then adding users that have
-        opted to get a reminder in that timezone on that day.
+        Reminder schedules that are no longer valid, due to a daylight saving transition, are recalculated first.
+        Then the users with a reminder in the current UTC hour of the week are selected with one indexed lookup.
 
+        :param now: The current datetime, which defaults to now.
         :return: A QuerySet of Users.
         """
-        users_to_email = User.objects.none()
-        for time_zone_string, _ in User.TIMEZONES:
-            time_zone = pytz.timezone(time_zone_string)
-            date_time = datetime.now(time_zone)
-            if date_time.time() < time(9, 0, 0) or date_time.time() >= time(10, 0, 0):
-                continue
-
-            weekday_num = Weekday(date_time.weekday())
-
-            if weekday_num == Weekday.MONDAY:
-                batch = User.objects.filter(remind_on_monday=True, timezone=time_zone_string)
-
-            elif weekday_num == Weekday.TUESDAY:
-                batch = User.objects.filter(remind_on_tuesday=True, timezone=time_zone_string)
-
-            elif weekday_num == Weekday.WEDNESDAY:
-                batch = User.objects.filter(remind_on_wednesday=True, timezone=time_zone_string)
-
-            elif weekday_num == Weekday.THURSDAY:
-                batch = User.objects.filter(remind_on_thursday=True, timezone=time_zone_string)
-
-            elif weekday_num == Weekday.FRIDAY:
-                batch = User.objects.filter(remind_on_friday=True, timezone=time_zone_string)
-
-            elif weekday_num == Weekday.SATURDAY:
-                batch = User.objects.filter(remind_on_saturday=True, timezone=time_zone_string)
-
-            else:
-                batch = User.objects.filter(remind_on_sunday=True, timezone=time_zone_string)
-
-            if len(users_to_email) == 0:
-                users_to_email = batch
-            else:
-                users_to_email = users_to_email.union(batch)
-
-        return users_to_email
+        if now is None:
+            now = timezone.now()
+        refresh_reminder_schedules(now)
+        return get_users_due_reminder(now)
 
     def create_message(self, days_since_last_attempt):
         """
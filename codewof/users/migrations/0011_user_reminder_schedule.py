@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:42
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_alter_user_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='reminder_hours',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.PositiveSmallIntegerField(), blank=True, editable=False, null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='reminder_schedule_valid_from',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='reminder_schedule_valid_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['reminder_hours'], name='users_user_reminde_067ee3_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['reminder_schedule_valid_until'], name='users_user_reminde_0ffffe_idx'),
+        ),
+    ]
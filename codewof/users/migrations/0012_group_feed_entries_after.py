@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_user_reminder_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='feed_entries_after',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
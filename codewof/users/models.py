@@ -1,9 +1,12 @@
 """Models for user application."""
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.urls import reverse
 from django.utils import timezone as django_timezone
+from users.reminders import REMINDER_DAY_FIELDS, REMINDER_SCHEDULE_FIELDS, update_reminder_schedule
 
 
 class UserType(models.Model):
@@ -63,11 +66,25 @@ class User(AbstractUser):
     # Determine when to send the email reminder
     timezone = models.CharField(max_length=100, choices=TIMEZONES, default='Pacific/Auckland')
 
+    # UTC hours of the week to send email reminders, calculated from the reminder days and timezone
+    reminder_hours = ArrayField(models.PositiveSmallIntegerField(), null=True, blank=True, editable=False)
+    reminder_schedule_valid_from = models.DateTimeField(null=True, blank=True, editable=False)
+    reminder_schedule_valid_until = models.DateTimeField(null=True, blank=True, editable=False)
+
     REMINDER_DAYS = [remind_on_monday, remind_on_tuesday, remind_on_wednesday, remind_on_thursday, remind_on_friday,
                      remind_on_saturday, remind_on_sunday]
     USERNAME_FIELD = 'id'
     REQUIRED_FIELDS = ['first_name', 'user_type']
 
+    def save(self, *args, **kwargs):
+        """Save the user, calculating their reminder schedule when their reminder days or timezone are saved."""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields).intersection(REMINDER_DAY_FIELDS + ('timezone', )):
+            update_reminder_schedule(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields).union(REMINDER_SCHEDULE_FIELDS)
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         """Return URL for user's dashboard."""
         return reverse('users:dashboard')
@@ -84,6 +101,10 @@ class User(AbstractUser):
         """Meta options for class."""
 
         ordering = ['first_name', 'last_name']
+        indexes = [
+            GinIndex(fields=['reminder_hours']),
+            models.Index(fields=['reminder_schedule_valid_until']),
+        ]
 
 
 class Group(models.Model):
@@ -99,6 +120,9 @@ class Group(models.Model):
     date_created = models.DateTimeField(default=django_timezone.now)
     users = models.ManyToManyField(User, through='Membership')
     feed_enabled = models.BooleanField(default=False)
+    # The feed entries of the group include every passed attempt of its members made after this datetime,
+    # older attempts are read from the attempts of members. None until the entries are first created.
+    feed_entries_after = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         """Label of the user."""
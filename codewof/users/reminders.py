@@ -0,0 +1,151 @@
+"""
+Schedule of email reminders for users.
+
+Each user stores the UTC hours of the week (0 is Monday 00:00 UTC) when they are sent a reminder, so the hourly
+send_email_reminders command finds the users due a reminder with one indexed lookup of the current hour.
+
+Reminders are sent at REMINDER_HOUR in the timezone of the user, so the UTC hours depend on the UTC offset of
+their timezone, which changes at daylight saving transitions. A schedule is stored with the period it is valid
+for, between the transitions of the timezone before and after it was calculated, and is recalculated by
+refresh_reminder_schedules once that period has passed.
+"""
+
+import bisect
+import datetime
+import pytz
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+REMINDER_HOUR = 9
+HOURS_IN_WEEK = 7 * 24
+REMINDER_DAY_FIELDS = (
+    'remind_on_monday',
+    'remind_on_tuesday',
+    'remind_on_wednesday',
+    'remind_on_thursday',
+    'remind_on_friday',
+    'remind_on_saturday',
+    'remind_on_sunday',
+)
+REMINDER_SCHEDULE_FIELDS = (
+    'reminder_hours',
+    'reminder_schedule_valid_from',
+    'reminder_schedule_valid_until',
+)
+
+
+def get_hour_of_week(date_time):
+    """Return the UTC hour of the week of the given datetime, where 0 is Monday 00:00 UTC."""
+    date_time = date_time.astimezone(pytz.utc)
+    return date_time.weekday() * 24 + date_time.hour
+
+
+def get_offset_period(time_zone, now):
+    """Return the UTC offset of a timezone at the given time, and the period it is in effect for.
+
+    Args:
+        time_zone (tzinfo): pytz timezone.
+        now (datetime): Aware datetime.
+
+    Returns:
+        Tuple of the UTC offset as a timedelta, and the aware UTC datetimes of the transitions of the timezone
+        before and after the given time (None if there is no transition).
+    """
+    offset = now.astimezone(time_zone).utcoffset()
+    # pytz timezones with daylight saving list the naive UTC datetimes of their transitions
+    transitions = getattr(time_zone, '_utc_transition_times', [])
+    index = bisect.bisect_right(transitions, now.astimezone(pytz.utc).replace(tzinfo=None))
+    valid_from = None
+    valid_until = None
+    if index > 0:
+        valid_from = pytz.utc.localize(transitions[index - 1])
+    if index < len(transitions):
+        valid_until = pytz.utc.localize(transitions[index])
+    return offset, valid_from, valid_until
+
+
+def get_reminder_hours(days, offset):
+    """Return the sorted UTC hours of the week when reminders are sent.
+
+    The command runs at the start of each hour, so when REMINDER_HOUR in a timezone is not on a UTC hour,
+    reminders are sent at the following UTC hour, within the reminder hour.
+
+    Args:
+        days (iterable): Booleans for each day of the week, starting from Monday.
+        offset (timedelta): UTC offset of the timezone.
+
+    Returns:
+        List of int hours of the week.
+    """
+    offset_minutes = offset // datetime.timedelta(minutes=1)
+    hours = set()
+    for day, remind in enumerate(days):
+        if remind:
+            utc_minutes = (day * 24 + REMINDER_HOUR) * 60 - offset_minutes
+            hours.add(-(-utc_minutes // 60) % HOURS_IN_WEEK)
+    return sorted(hours)
+
+
+def get_reminder_schedule(days, time_zone_string, now):
+    """Return the reminder schedule for the given reminder days and timezone.
+
+    Args:
+        days (iterable): Booleans for each day of the week, starting from Monday.
+        time_zone_string (str): Name of the timezone.
+        now (datetime): Aware datetime to calculate the schedule at.
+
+    Returns:
+        Dictionary of the values of the schedule fields of a user.
+    """
+    offset, valid_from, valid_until = get_offset_period(pytz.timezone(time_zone_string), now)
+    return {
+        'reminder_hours': get_reminder_hours(days, offset),
+        'reminder_schedule_valid_from': valid_from,
+        'reminder_schedule_valid_until': valid_until,
+    }
+
+
+def update_reminder_schedule(user, now=None):
+    """Set the reminder schedule of a user from their reminder days and timezone, without saving it."""
+    if now is None:
+        now = datetime.datetime.now(pytz.utc)
+    schedule = get_reminder_schedule([getattr(user, field) for field in REMINDER_DAY_FIELDS], user.timezone, now)
+    for field, value in schedule.items():
+        setattr(user, field, value)
+
+
+def refresh_reminder_schedules(now):
+    """Recalculate the reminder schedules that are not valid at the given time.
+
+    These are the schedules of users in timezones that have had a daylight saving transition since their
+    schedule was calculated, and users that do not have a schedule yet.
+
+    Args:
+        now (datetime): Aware datetime.
+
+    Returns:
+        Number of users with an updated schedule.
+    """
+    user_model = get_user_model()
+    users = user_model.objects.filter(
+        Q(reminder_hours__isnull=True)
+        | Q(reminder_schedule_valid_until__lte=now)
+        | Q(reminder_schedule_valid_from__gt=now)
+    ).only('pk', 'timezone', *REMINDER_DAY_FIELDS)
+    offset_periods = dict()
+    users_to_update = []
+    for user in users.iterator():
+        if user.timezone not in offset_periods:
+            offset_periods[user.timezone] = get_offset_period(pytz.timezone(user.timezone), now)
+        offset, valid_from, valid_until = offset_periods[user.timezone]
+        user.reminder_hours = get_reminder_hours([getattr(user, field) for field in REMINDER_DAY_FIELDS], offset)
+        user.reminder_schedule_valid_from = valid_from
+        user.reminder_schedule_valid_until = valid_until
+        users_to_update.append(user)
+    user_model.objects.bulk_update(users_to_update, REMINDER_SCHEDULE_FIELDS, batch_size=1000)
+    return len(users_to_update)
+
+
+def get_users_due_reminder(now):
+    """Return a queryset of the users due a reminder at the given time."""
+    return get_user_model().objects.filter(reminder_hours__contains=[get_hour_of_week(now)])
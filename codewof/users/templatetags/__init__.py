@@ -1 +0,0 @@
-"""Module for the user templatetags extras."""
@@ -1,38 +1,109 @@
 """Utilities for the User app, primarily for views."""
 
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db.models.functions import Lower
 from django.template.loader import get_template
 from django.urls import reverse
+from allauth.account.models import EmailAddress
+from general.outbox import create_outbox_email, queue_emails
+from users.models import Invitation, Membership
+
+
+def invite_emails(group, inviter, emails):
+    """
+    Create invitations to join a group for the given emails, and add their emails to the outbox.
+
+    Emails are skipped if they have already been invited, or they belong to a user that is already a member of the
+    group or has been invited with another of their emails. All emails are checked with the same few queries.
+
+    :param group: The Group to be joined.
+    :param inviter: The User creating the invites.
+    :param emails: A list of email addresses, in the order they were entered.
+    :return: A tuple of the list of emails invited, and the list of emails skipped.
+    """
+    emails = [email.lower().strip() for email in emails]
+    invited_emails = set(Invitation.objects.filter(group=group, email__in=emails).values_list('email', flat=True))
+
+    # Users and first names of existing accounts with each email
+    email_users = dict()
+    addresses = EmailAddress.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=emails)
+    for email, user_id, first_name in addresses.values_list('email_lower', 'user_id', 'user__first_name'):
+        email_users[email] = (user_id, first_name)
+    user_ids = {user_id for user_id, _ in email_users.values()}
+
+    # Users that are members, or have been invited with any of their emails, are skipped
+    skipped_user_ids = set(Membership.objects.filter(group=group, user_id__in=user_ids).values_list(
+        'user_id', flat=True))
+    user_emails = EmailAddress.objects.annotate(email_lower=Lower('email')).filter(
+        user_id__in=user_ids).values_list('user_id', 'email_lower')
+    user_emails = [(user_id, email) for user_id, email in user_emails]
+    user_invited_emails = set(Invitation.objects.filter(
+        group=group,
+        email__in={email for _, email in user_emails},
+    ).values_list('email', flat=True))
+    skipped_user_ids.update(user_id for user_id, email in user_emails if email in user_invited_emails)
+
+    sent = []
+    skipped = []
+    invitations = []
+    invitees = []
+    for email in emails:
+        user_id, first_name = email_users.get(email, (None, None))
+        if email in invited_emails or user_id in skipped_user_ids:
+            skipped.append(email)
+            continue
+        # Later emails of the same user in this request are skipped
+        invited_emails.add(email)
+        if user_id is not None:
+            skipped_user_ids.add(user_id)
+        invitations.append(Invitation(group=group, inviter=inviter, email=email))
+        invitees.append((user_id is not None, first_name))
+        sent.append(email)
+
+    invitations = Invitation.objects.bulk_create(invitations)
+    queue_emails([
+        create_invitation_email(user_exists, first_name, inviter, group.name, invitation.email,
+                                dedup_key='invitation-{}'.format(invitation.pk))
+        for invitation, (user_exists, first_name) in zip(invitations, invitees)
+    ])
+    return sent, skipped
 
 
 def send_invitation_email(invitee, inviter, group_name, email):
     """
-    Create and send an invitation email.
+    Create an invitation email and add it to the outbox, to be sent by the deliver_emails command.
 
     :param invitee: The User receiving the invite, which is null if the User does not exist yet.
     :param inviter: The User creating the invite.
     :param group_name: The name of the Group to be joined.
     :param email: The invitee's email address.
-    :return:
+    :return: The saved OutboxEmail.
     """
-    if invitee is None:
-        html = create_invitation_html(False, None, inviter.first_name + " " + inviter.last_name, group_name, email)
-        plain = create_invitation_plaintext(False, None, inviter.first_name + " " + inviter.last_name, group_name,
-                                            email)
-    else:
-        html = create_invitation_html(True, invitee.first_name, inviter.first_name + " " + inviter.last_name,
-                                      group_name, email)
-        plain = create_invitation_plaintext(True, invitee.first_name, inviter.first_name + " " + inviter.last_name,
-                                            group_name, email)
+    outbox_email = create_invitation_email(invitee is not None, invitee.first_name if invitee else None,
+                                           inviter, group_name, email)
+    outbox_email.save()
+    return outbox_email
+
+
+def create_invitation_email(user_exists, invitee_name, inviter, group_name, email, dedup_key=None):
+    """
+    Create an invitation email, without adding it to the outbox.
 
-    send_mail(
+    :param user_exists: Whether a User object with this email exists.
+    :param invitee_name: The first name of the invitee, which is null if the User does not exist yet.
+    :param inviter: The User creating the invite.
+    :param group_name: The name of the Group to be joined.
+    :param email: The invitee's email address.
+    :param dedup_key: The key of the email in the outbox, so it is only sent once.
+    :return: An unsaved OutboxEmail.
+    """
+    inviter_name = inviter.first_name + " " + inviter.last_name
+    return create_outbox_email(
         'CodeWOF Invitation',
-        plain,
-        settings.DEFAULT_FROM_EMAIL,
+        create_invitation_plaintext(user_exists, invitee_name, inviter_name, group_name, email),
         [email],
-        fail_silently=False,
-        html_message=html
+        html_message=create_invitation_html(user_exists, invitee_name, inviter_name, group_name, email),
+        dedup_key=dedup_key,
     )
 
 
@@ -29,10 +29,7 @@ from users.forms import UserChangeForm, GroupCreateUpdateForm, GroupInvitationsF
 from functools import wraps
 from allauth.account.admin import EmailAddress
 
-from programming.models import (
-    Attempt,
-    Achievement
-)
+from programming.models import Achievement
 from users.models import (
     Group,
     Membership,
@@ -42,9 +39,10 @@ from users.models import (
 )
 from programming.codewof_utils import get_questions_answered_in_past_month, backdate_user
 from programming.question_recommendations import get_recommended_questions, get_recommendation_descriptions
+from programming.group_feed import get_group_feed
 from users.mixins import AdminRequiredMixin, AdminOrMemberRequiredMixin, SufficientAdminsMixin, \
     RequestUserIsMembershipUserMixin
-from users.utils import send_invitation_email
+from users.utils import invite_emails
 
 User = get_user_model()
 
@@ -212,8 +210,8 @@ class GroupDetailView(LoginRequiredMixin, AdminOrMemberRequiredMixin, DetailView
         context['is_admin'] = user_membership.role == admin_role
         context['user_membership'] = user_membership
 
-        memberships = Membership.objects.filter(group=group).order_by('role__name', 'user__first_name',
-                                                                      'user__last_name')
+        memberships = Membership.objects.filter(group=group).select_related('user', 'role').order_by(
+            'role__name', 'user__first_name', 'user__last_name')
         context['memberships'] = memberships
 
         context['only_admin'] = False
@@ -223,8 +221,14 @@ class GroupDetailView(LoginRequiredMixin, AdminOrMemberRequiredMixin, DetailView
         context['roles'] = GroupRole.objects.all()
 
         if group.feed_enabled:
-            context['feed'] = Attempt.objects.filter(passed_tests=True, profile__user__in=memberships.values('user')
-                                                     ).order_by('-datetime')[:10]
+            feed_entries, context['feed_next_cursor'] = get_group_feed(group, self.request.GET.get('feed_before'))
+            feed = []
+            for entry in feed_entries:
+                attempt = entry.attempt
+                attempt.group_like_users = entry.group_like_users
+                attempt.liked = user.pk in entry.like_users
+                feed.append(attempt)
+            context['feed'] = feed
 
         return context
 
@@ -275,38 +279,48 @@ def member_or_admin_required(f):
 @admin_required
 @transaction.atomic
 def update_memberships(request, pk, group):
-    """View for updating memberships from JSON."""
+    """View for updating memberships from JSON.
+
+    The whole payload is validated before any changes are made, and the changes are applied with one update and one
+    delete, no matter how many memberships are given.
+    """
     body_unicode = request.body.decode('utf-8')
     body = json.loads(body_unicode)
     memberships = body['memberships']
 
     for membership in memberships:
         id = membership['id']
-        delete = membership['delete']
-        role = membership['role']
-
         if type(id) != int:
             raise Exception("One of the membership objects has an id that is not an integer (id={}).".format(id))
-        if type(delete) != bool:
+        if type(membership['delete']) != bool:
             raise Exception("One of the membership objects has delete value that is not a boolean (id={}).".format(id))
 
-        membership_object = Membership.objects.filter(id=id)
-        if len(membership_object) == 0:
-            raise ObjectDoesNotExist
-        else:
-            membership_object = membership_object[0]
-
-        if delete:
-            membership_object.delete()
-        else:
-            role_object = GroupRole.objects.filter(name=role)
-            if len(role_object) == 0:
-                raise Exception("One of the membership objects has a non-existent role (id={}).".format(id))
-            else:
-                membership_object.role = role_object[0]
-                membership_object.save()
-
-    if len(Membership.objects.filter(group=group, role=GroupRole.objects.get(name='Admin'))) == 0:
+    # Later changes to the same membership replace earlier ones
+    changes = {membership['id']: membership for membership in memberships}
+    role_names = {change['role'] for change in changes.values() if not change['delete']}
+    roles = {role.name: role for role in GroupRole.objects.filter(name__in=role_names | {'Admin'})}
+    for id, change in changes.items():
+        if not change['delete'] and change['role'] not in roles:
+            raise Exception("One of the membership objects has a non-existent role (id={}).".format(id))
+
+    membership_objects = Membership.objects.filter(group=group, id__in=changes).in_bulk()
+    if len(membership_objects) != len(changes):
+        raise ObjectDoesNotExist
+
+    ids_to_delete = [id for id, change in changes.items() if change['delete']]
+    memberships_to_update = []
+    for id, change in changes.items():
+        if not change['delete']:
+            membership_object = membership_objects[id]
+            membership_object.role = roles[change['role']]
+            memberships_to_update.append(membership_object)
+
+    if ids_to_delete:
+        Membership.objects.filter(group=group, id__in=ids_to_delete).delete()
+    if memberships_to_update:
+        Membership.objects.bulk_update(memberships_to_update, ['role'])
+
+    if not Membership.objects.filter(group=group, role=roles['Admin']).exists():
         raise Exception("Must have at least one Admin in the group.")
 
     return HttpResponse()
@@ -330,33 +344,7 @@ def create_invitations(request, pk, group):
         form = GroupInvitationsForm(request.POST)
         if form.is_valid():
             emails = form.cleaned_data.get('emails').splitlines()
-            sent = []
-            skipped = []
-
-            for email in emails:
-                email = email.lower().strip()
-                if len(Invitation.objects.filter(email=email, group=group)) > 0:
-                    skipped.append(email)
-                    continue
-
-                try:
-                    user = EmailAddress.objects.annotate(email_lower=Lower('email')).get(email_lower=email).user
-                    invitee_emails = EmailAddress.objects.annotate(email_lower=Lower('email')).filter(user=user)
-                except EmailAddress.DoesNotExist:
-                    user = None
-
-                # If user with that email exists and they are already a member or an invitation has been sent to one of
-                # their other emails.
-                if user is not None and (len(Membership.objects.filter(user=user, group=group)) > 0
-                                         or len(Invitation.objects.filter(
-                        email__in=invitee_emails.values('email_lower'), group=group)) > 0):
-                    skipped.append(email)
-                    continue
-
-                Invitation(group=group, inviter=request.user, email=email).save()
-                send_invitation_email(user, request.user, group.name, email)
-                sent.append(email)
-
+            sent, skipped = invite_emails(group, request.user, emails)
             build_messages(sent, skipped, request)
             return HttpResponseRedirect(reverse('users:groups-detail', args=[pk]))
     else:
@@ -3,9 +3,12 @@
 import yaml
 import mdx_math
 import abc
+import copy
+import functools
 import sys
 import re
 import os.path
+from concurrent.futures import ProcessPoolExecutor
 from os import listdir
 from verto import Verto
 from verto.errors.Error import Error as VertoError
@@ -18,13 +21,14 @@ from utils.errors.EmptyYAMLFileError import EmptyYAMLFileError
 from utils.errors.InvalidYAMLFileError import InvalidYAMLFileError
 from utils.errors.NoHeadingFoundInMarkdownFileError import NoHeadingFoundInMarkdownFileError
 from utils.errors.CouldNotFindYAMLFileError import CouldNotFindYAMLFileError
+from utils.errors.Error import Error as LoaderError
 
 
 class BaseLoader():
     """Base loader class for individual loaders."""
 
     def __init__(self, base_path="", structure_dir="structure", content_path="",
-                 structure_filename="", lite_loader=False):
+                 structure_filename="", lite_loader=False, processes=1):
         """Create a BaseLoader object.
 
         Args:
@@ -34,12 +38,16 @@ class BaseLoader():
             structure_filename (str): name of yaml file, eg. "unit-plan.yaml".
             lite_loader (bool): Boolean to state whether loader should only
                 be loading key content and perform minimal checks."
+            processes (int): Number of processes convert_md_files converts
+                Markdown files across.
         """
         self.base_path = base_path
         self.structure_dir = structure_dir
         self.content_path = content_path
         self.structure_filename = structure_filename
         self.lite_loader = lite_loader
+        self.processes = processes
+        self.converted_md_files = dict()
         self.setup_md_to_html_converter()
 
     def get_localised_file(self, language, filename):
@@ -91,21 +99,15 @@ class BaseLoader():
         """Create Markdown converter.
 
         The converter is created with custom processors, html templates,
-        and extensions.
+        and extensions, and is shared with other loaders in this process.
         """
-        templates = self.load_template_files()
-        extensions = [
-            "markdown.extensions.fenced_code",
-            "markdown.extensions.codehilite",
-            "markdown.extensions.sane_lists",
-            "markdown.extensions.tables",
-            mdx_math.MathExtension()
-        ]
-        self.converter = Verto(html_templates=templates, extensions=extensions)
+        self.converter = get_converter(settings.CUSTOM_VERTO_TEMPLATES)
 
     def convert_md_file(self, md_file_path, config_file_path, heading_required=True, remove_title=True):
         """Return the Verto object for a given Markdown file.
 
+        Files already converted by convert_md_files are not converted again.
+
         Args:
             md_file_path: Location of Markdown file to convert (str).
             config_file_path: Path to related the config file (str).
@@ -123,77 +125,45 @@ class BaseLoader():
                 file.
             VertoConversionError: when a verto StyleError is thrown.
         """
-        try:
-            # Check file exists
-            content = open(md_file_path, encoding="UTF-8").read()
-        except FileNotFoundError:
-            raise CouldNotFindMarkdownFileError(md_file_path, config_file_path)
+        result = self.converted_md_files.pop((md_file_path, heading_required, remove_title), None)
+        if result is None:
+            result = convert_md_file(md_file_path, config_file_path, heading_required, remove_title)
+        return result
 
-        """ Below is a hack to make the image-inline tag not require alt text to be
-            given when the language is not in English.
-            TODO: Remove this hack once translations are complete.
-        """
-        directories = md_file_path.split('/')
-        if 'en' not in directories:
-            processor_argument_overrides = {
-                "image-container": {
-                    "alt": False
-                },
-                "image-inline": {
-                    "alt": False
-                },
-                "image-tag": {
-                    "alt": False
-                }
-            }
-        else:
-            processor_argument_overrides = {
-                "image-container": {
-                    "alt": True
-                },
-                "image-inline": {
-                    "alt": True
-                },
-                "image-tag": {
-                    "alt": True
-                }
-            }
-
-        custom_processors = self.converter.processor_defaults()
-        if remove_title:
-            custom_processors.add("remove-title")
-        settings = {
-            "processor_argument_overrides": processor_argument_overrides,
-        }
-        templates = self.load_template_files()
-        extensions = [
-            "markdown.extensions.fenced_code",
-            "markdown.extensions.codehilite",
-            "markdown.extensions.sane_lists",
-            "markdown.extensions.tables",
-            mdx_math.MathExtension()
-        ]
-        self.converter = Verto(
-            html_templates=templates,
-            extensions=extensions,
-            settings=settings,
-            processors=custom_processors
-        )
-        """ End of hack. """
-        result = None
-        try:
-            result = self.converter.convert(content)
-        except VertoError as e:
-            raise VertoConversionError(md_file_path, e) from e
+    def convert_md_files(self, md_file_paths, config_file_path, heading_required=True, remove_title=True):
+        """Convert the given Markdown files, across a pool of processes if the loader has more than one.
 
-        if heading_required:
-            if result.title is None:
-                raise NoHeadingFoundInMarkdownFileError(md_file_path)
+        The results are kept until convert_md_file is called for the same file, so a loader can convert
+        all of its files up front and then load them one at a time.
 
-        if len(result.html_string) == 0:
-            raise EmptyMarkdownFileError(md_file_path)
+        Args:
+            md_file_paths: Locations of Markdown files to convert (list).
+            config_file_path: Path to related the config file (str).
+            heading_required: Boolean if the files require a heading (bool).
+            remove_title: Boolean if the files' first headings should be removed (bool).
 
-        return result
+        Returns:
+            List of VertoResult objects, in the order of the given files.
+
+        Raises:
+            The same errors as convert_md_file, for the first file that cannot be converted.
+        """
+        arguments = [
+            (md_file_path, config_file_path, heading_required, remove_title) for md_file_path in md_file_paths
+        ]
+        if self.processes > 1 and len(arguments) > 1:
+            chunksize = max(1, len(arguments) // (self.processes * 4))
+            with ProcessPoolExecutor(max_workers=self.processes) as executor:
+                results = list(executor.map(try_convert_md_file, arguments, chunksize=chunksize))
+        else:
+            results = [try_convert_md_file(argument) for argument in arguments]
+        for index, result in enumerate(results):
+            if result is None:
+                # Convert the file again in this process, to raise its error
+                results[index] = convert_md_file(*arguments[index])
+        for md_file_path, result in zip(md_file_paths, results):
+            self.converted_md_files[(md_file_path, heading_required, remove_title)] = result
+        return results
 
     def log(self, message, indent_amount=0):
         """Output the log message to the load log.
@@ -244,14 +214,7 @@ class BaseLoader():
         Returns:
             templates: dictionary of html templates
         """
-        templates = dict()
-        template_path = settings.CUSTOM_VERTO_TEMPLATES
-        for file in listdir(template_path):
-            template_file = re.search(r"(.*?).html$", file)
-            if template_file:
-                template_name = template_file.groups()[0]
-                templates[template_name] = open(template_path + file).read()
-        return templates
+        return dict(get_template_files(settings.CUSTOM_VERTO_TEMPLATES))
 
     @abc.abstractmethod
     def load(self):
@@ -262,3 +225,116 @@ class BaseLoader():
                 BaseLoader class.
         """
         raise NotImplementedError("Subclass does not implement this method")  # pragma: no cover
+
+
+@functools.lru_cache(maxsize=None)
+def get_template_files(template_path):
+    """Read the custom HTML templates in the given directory, once per process.
+
+    Returns:
+        templates: dictionary of html templates, which must not be modified
+    """
+    templates = dict()
+    for file in listdir(template_path):
+        template_file = re.search(r"(.*?).html$", file)
+        if template_file:
+            template_name = template_file.groups()[0]
+            with open(os.path.join(template_path, file)) as f:
+                templates[template_name] = f.read()
+    return templates
+
+
+@functools.lru_cache(maxsize=None)
+def get_converter(template_path, alt_required=True, remove_title=False):
+    """Return the Markdown converter for the given options, created once per process.
+
+    Args:
+        template_path: Directory of custom HTML templates (str).
+        alt_required: Boolean if images require alt text (bool).
+        remove_title: Boolean if the first heading should be removed (bool).
+
+    Returns:
+        Verto object.
+    """
+    processors = Verto.processor_defaults()
+    if remove_title:
+        processors.add("remove-title")
+    processor_argument_overrides = {
+        "image-container": {
+            "alt": alt_required
+        },
+        "image-inline": {
+            "alt": alt_required
+        },
+        "image-tag": {
+            "alt": alt_required
+        }
+    }
+    extensions = [
+        "markdown.extensions.fenced_code",
+        "markdown.extensions.codehilite",
+        "markdown.extensions.sane_lists",
+        "markdown.extensions.tables",
+        mdx_math.MathExtension()
+    ]
+    return Verto(
+        html_templates=get_template_files(template_path),
+        extensions=extensions,
+        settings={"processor_argument_overrides": processor_argument_overrides},
+        processors=processors,
+    )
+
+
+def convert_md_file(md_file_path, config_file_path, heading_required=True, remove_title=True):
+    """Return the Verto object for a given Markdown file, taking the same arguments as BaseLoader.convert_md_file.
+
+    Raises:
+        The same errors as BaseLoader.convert_md_file.
+    """
+    try:
+        # Check file exists
+        content = open(md_file_path, encoding="UTF-8").read()
+    except FileNotFoundError:
+        raise CouldNotFindMarkdownFileError(md_file_path, config_file_path)
+
+    """ Below is a hack to make the image-inline tag not require alt text to be
+        given when the language is not in English.
+        TODO: Remove this hack once translations are complete.
+    """
+    alt_required = 'en' in md_file_path.split('/')
+    converter = get_converter(settings.CUSTOM_VERTO_TEMPLATES, alt_required, remove_title)
+    """ End of hack. """
+    # The converter keeps the HTML and slugs of the previous file, so is reset as each file is unrelated
+    converter.converter.reset()
+    converter.clear_saved_data()
+    try:
+        result = converter.convert(content)
+    except VertoError as e:
+        raise VertoConversionError(md_file_path, e) from e
+    # Saved data is cleared in place by the next conversion, so the result keeps a copy
+    result.required_files = copy.deepcopy(result.required_files)
+    result.required_glossary_terms = copy.deepcopy(result.required_glossary_terms)
+
+    if heading_required:
+        if result.title is None:
+            raise NoHeadingFoundInMarkdownFileError(md_file_path)
+
+    if len(result.html_string) == 0:
+        raise EmptyMarkdownFileError(md_file_path)
+
+    return result
+
+
+def try_convert_md_file(arguments):
+    """Return the Verto object for a Markdown file, or None if it cannot be converted.
+
+    Loader errors cannot be sent back from other processes, so they are raised by
+    converting the file again in the loader's process.
+
+    Args:
+        arguments: Tuple of arguments of convert_md_file (tuple).
+    """
+    try:
+        return convert_md_file(*arguments)
+    except (LoaderError, VertoError):
+        return None